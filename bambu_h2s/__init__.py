@@ -1,11 +1,47 @@
 """
 Bambu Lab H2S 完整控制库
 支持所有 MQTT 命令
+
+子模块按需加载：`import bambu_h2s` 不会导入 paho.mqtt / ssl / ftplib，
+首次访问对应属性时才导入。
 """
 
-from .client import BambuClient
-from .commands import BambuCommands
-from .ftp import BambuFTP
+import importlib
+
+# 不导入 typing (约 10ms)，仅供类型检查器识别
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from .client import BambuClient
+    from .commands import BambuCommands
+    from .ftp import BambuFTP
+    from .ftp_async import AsyncBambuFTP
+    from .gateway import StatusGateway
+    from .stream import GcodeStreamer
 
 __version__ = "1.0.0"
-__all__ = ["BambuClient", "BambuCommands", "BambuFTP"]
+__all__ = ["BambuClient", "BambuCommands", "BambuFTP", "AsyncBambuFTP", "StatusGateway", "GcodeStreamer"]
+
+# 属性名 -> 子模块
+_LAZY_ATTRS = {
+    "BambuClient": ".client",
+    "BambuCommands": ".commands",
+    "BambuFTP": ".ftp",
+    "AsyncBambuFTP": ".ftp_async",
+    "StatusGateway": ".gateway",
+    "GcodeStreamer": ".stream",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # 缓存到模块字典，后续访问不再经过 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
@@ -0,0 +1,123 @@
+"""
+批量命令流水线
+一次提交一串命令，按在途深度连续发送，按 sequence_id 并发收集回复
+总耗时接近一次往返加打印机处理时间，而不是 N 次往返
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .registry import get_spec
+
+if TYPE_CHECKING:
+    from .commands import BambuCommands
+
+# 单条命令: "push_all" 或 ("set_fan", {"fan_index": 0, "speed": 50})
+BatchItem = Union[str, Tuple[str, Dict[str, Any]]]
+
+
+@dataclass
+class CommandResult:
+    """单条命令的结果"""
+    name: str
+    params: Dict[str, Any]
+    sequence_id: str
+    status: str = "pending"             # success / failed / unknown / timeout / error
+    reply: Optional[Dict[str, Any]] = None
+    elapsed: float = 0.0                # 发送到收到回复的秒数
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "success"
+
+
+def run_batch(
+    commands: "BambuCommands",
+    items: Iterable[BatchItem],
+    depth: int = 4,
+    timeout: float = 5.0
+) -> List[CommandResult]:
+    """
+    流水线执行一批命令
+
+    Args:
+        commands: 命令对象
+        items: 命令列表，元素为命令名或 (命令名, 参数字典)
+        depth: 最大在途命令数 (已发送未回复)
+        timeout: 每条命令从发送起等待回复的秒数
+
+    所有命令先全部校验编码，任一参数错误则抛出异常且不发送任何命令
+    """
+    if depth < 1:
+        raise ValueError(f"depth 必须 >= 1: {depth}")
+
+    client = commands.client
+
+    prepared = []
+    for item in items:
+        name, params = (item, {}) if isinstance(item, str) else item
+        spec = get_spec(name)
+        sequence_id = commands._seq()
+        payload = spec.render(params, sequence_id)
+        prepared.append((spec.command, payload, CommandResult(name, dict(params), sequence_id)))
+
+    cond = threading.Condition()
+    in_flight: Dict[str, Tuple[CommandResult, float, float]] = {}
+
+    def make_callback(result: CommandResult):
+        def on_reply(section: Dict[str, Any]):
+            with cond:
+                entry = in_flight.pop(result.sequence_id, None)
+                if entry is None:
+                    return
+                result.reply = section
+                result.elapsed = time.monotonic() - entry[1]
+                outcome = str(section.get("result", "")).lower()
+                if outcome in ("fail", "failed", "failure"):
+                    result.status = "failed"
+                elif outcome in ("success", "ok"):
+                    result.status = "success"
+                else:
+                    # 回复中没有 result (或无法识别)，不能断定已成功执行
+                    result.status = "unknown"
+                cond.notify_all()
+        return on_reply
+
+    def expire(now: float):
+        """把超时的在途命令标记为 timeout (需持有锁)"""
+        for sequence_id, (result, sent_at, deadline) in list(in_flight.items()):
+            if now >= deadline:
+                client.cancel_reply(sequence_id)
+                del in_flight[sequence_id]
+                result.status = "timeout"
+                result.elapsed = now - sent_at
+
+    def wait_until(limit: int):
+        """等待在途命令数降到 limit 以下 (需持有锁)"""
+        while len(in_flight) > limit:
+            now = time.monotonic()
+            expire(now)
+            if len(in_flight) <= limit:
+                break
+            earliest = min(deadline for _, _, deadline in in_flight.values())
+            cond.wait(max(earliest - now, 0.0))
+
+    for command, payload, result in prepared:
+        with cond:
+            wait_until(depth - 1)
+            client.expect_reply(result.sequence_id, command, make_callback(result))
+            sent_at = time.monotonic()
+            in_flight[result.sequence_id] = (result, sent_at, sent_at + timeout)
+
+        if client.publish(payload) is None:
+            client.cancel_reply(result.sequence_id)
+            with cond:
+                in_flight.pop(result.sequence_id, None)
+                result.status = "error"
+
+    with cond:
+        wait_until(0)
+
+    return [result for _, _, result in prepared]
@@ -6,7 +6,7 @@ import json
 import ssl
 import time
 import threading
-from typing import Callable, Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, List, Union
 import paho.mqtt.client as mqtt
 
 
@@ -36,11 +36,15 @@ class BambuClient:
         self._on_message_callback: Optional[Callable] = None
         self._on_connect_callback: Optional[Callable] = None
         self._on_disconnect_callback: Optional[Callable] = None
+        self._state_listeners: List[Callable[[Dict[str, Any]], None]] = []
 
         # 状态存储
         self.state: Dict[str, Any] = {}
+        self.state_version = 0
         self._last_response: Optional[Dict] = None
         self._response_event = threading.Event()
+        # 等待回复的命令: sequence_id -> (命令名, 回调)
+        self._pending: Dict[str, tuple] = {}
 
     def get_sequence_id(self) -> str:
         """获取递增的序列号"""
@@ -117,6 +121,18 @@ class BambuClient:
             # 更新状态
             if "print" in payload:
                 self.state.update(payload["print"])
+                self.state_version += 1
+                for listener in list(self._state_listeners):
+                    # 单个监听器出错不影响其他监听器和后续的回复分发
+                    try:
+                        listener(payload["print"])
+                    except Exception as e:
+                        print(f"状态监听器出错: {e}")
+
+            # 按 sequence_id 分发命令回复 (只看打印机的 report；订阅了 "#"，
+            # 自己发出的 request 也会收到，不能当作回复)
+            if self._pending and topic == f"device/{self.serial}/report":
+                self._dispatch_reply(payload)
 
             # 存储响应
             self._last_response = payload
@@ -129,20 +145,39 @@ class BambuClient:
         except Exception as e:
             pass
 
+    def _dispatch_reply(self, payload: Dict[str, Any]):
+        """把回复交给对应的等待者"""
+        for section in payload.values():
+            if not isinstance(section, dict):
+                continue
+            sequence_id = str(section.get("sequence_id", ""))
+            with self._lock:
+                pending = self._pending.get(sequence_id)
+                # 状态推送也带 sequence_id，命令名一致才算回复
+                if pending is None or section.get("command") != pending[0]:
+                    continue
+                del self._pending[sequence_id]
+            pending[1](section)
+
     def _on_disconnect(self, client, userdata, disconnect_flags, rc, properties=None):
         """断开连接回调"""
         self._connected = False
         if self._on_disconnect_callback:
             self._on_disconnect_callback(rc)
 
-    def publish(self, command: Dict[str, Any], wait_response: bool = False, timeout: float = 5.0) -> Optional[Dict]:
-        """发送命令"""
+    def publish(
+        self,
+        command: Union[Dict[str, Any], bytes],
+        wait_response: bool = False,
+        timeout: float = 5.0
+    ) -> Optional[Dict]:
+        """发送命令 (字典，或已编码的 JSON 字节)"""
         if not self._connected or self.serial is None:
             print("未连接或序列号未知")
             return None
 
         topic = f"device/{self.serial}/request"
-        payload = json.dumps(command)
+        payload = command if isinstance(command, bytes) else json.dumps(command)
 
         if wait_response:
             self._response_event.clear()
@@ -156,6 +191,16 @@ class BambuClient:
             return None
         return {"status": "sent"}
 
+    def expect_reply(self, sequence_id: str, command: str, callback: Callable[[Dict[str, Any]], None]):
+        """登记等待某条命令的回复，收到后以回复内容调用 callback (在 MQTT 线程中)"""
+        with self._lock:
+            self._pending[sequence_id] = (command, callback)
+
+    def cancel_reply(self, sequence_id: str):
+        """取消等待回复"""
+        with self._lock:
+            self._pending.pop(sequence_id, None)
+
     def on_message(self, callback: Callable):
         """设置消息回调"""
         self._on_message_callback = callback
@@ -168,6 +213,15 @@ class BambuClient:
         """设置断开回调"""
         self._on_disconnect_callback = callback
 
+    def add_state_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """添加状态监听器，每次状态合并后以增量字段调用"""
+        self._state_listeners.append(callback)
+
+    def remove_state_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """移除状态监听器"""
+        if callback in self._state_listeners:
+            self._state_listeners.remove(callback)
+
     @property
     def is_connected(self) -> bool:
         return self._connected
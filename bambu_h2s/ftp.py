@@ -3,34 +3,328 @@ Bambu Lab FTP 文件上传
 用于上传打印文件到打印机
 """
 
+from __future__ import annotations
+
 import ftplib
+import posixpath
+import socket
 import ssl
 import os
-from typing import Optional, Callable
+import threading
+import time
+from contextlib import contextmanager
+
+# typing、dataclasses (连带 inspect)、json、mmap、calendar 等只在类型检查或少数操作中用到，
+# 不在导入时加载；注解由 __future__ annotations 保持为字符串
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, BinaryIO, Dict, List, Optional, Callable, Iterable, Iterator, Tuple, Union
+
+    from .ftp_pool import TransferReport
+    from .ftp_sync import SyncReport
+
+    # upload_stream 可接受的数据源: bytes 类对象、二进制文件对象、数据块迭代器
+    UploadSource = Union[bytes, bytearray, memoryview, BinaryIO, Iterable[Any]]
+
+
+# 数据连接的默认块大小和套接字缓冲区
+DEFAULT_BLOCK_SIZE = 256 * 1024
+DEFAULT_SOCKET_BUFFER = 1024 * 1024
+
+# 视为连接断开、可以重连的异常；本地文件错误 (FileNotFoundError 等) 不在其中，
+# 4xx 应答中只有 421 (服务不可用，即将关闭连接) 按断开处理，见 _connection_lost
+_CONNECTION_ERRORS = (ConnectionError, TimeoutError, socket.timeout, ssl.SSLError, EOFError, ftplib.error_temp)
+
+
+def _connection_lost(e: BaseException) -> bool:
+    """异常是否表示控制连接已断开"""
+    if isinstance(e, ftplib.error_temp):
+        return str(e).startswith("421")
+    return True
+
+# 断点续传检查点文件后缀
+CHECKPOINT_SUFFIX = ".ftpresume"
+
+
+# LIST 输出中的月份
+_MONTHS = {m: i for i, m in enumerate(
+    ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1
+)}
+
+
+class RemoteEntry:
+    """远程目录项"""
+
+    __slots__ = ("name", "path", "type", "size", "mtime")
+
+    def __init__(self, name: str, path: str, type: str, size: int = -1, mtime: Optional[float] = None):
+        self.name = name
+        self.path = path
+        self.type = type        # "file" / "dir" / "link"
+        self.size = size
+        self.mtime = mtime      # Unix 时间戳 (UTC)，未知时为 None
+
+    def __repr__(self) -> str:
+        return (f"RemoteEntry(name={self.name!r}, path={self.path!r}, type={self.type!r}, "
+                f"size={self.size!r}, mtime={self.mtime!r})")
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, key) == getattr(other, key) for key in self.__slots__)
+
+    __hash__ = None
+
+    @property
+    def is_dir(self) -> bool:
+        return self.type == "dir"
+
+
+def _parse_mlsd_time(value: str) -> Optional[float]:
+    """MLSD modify 事实 (YYYYMMDDHHMMSS[.sss]，UTC) 转时间戳"""
+    import calendar
+
+    try:
+        seconds, _, fraction = value.partition(".")
+        t = time.strptime(seconds, "%Y%m%d%H%M%S")
+        return calendar.timegm(t) + (float("0." + fraction) if fraction else 0.0)
+    except ValueError:
+        return None
+
+
+def _parse_list_line(line: str, directory: str) -> Optional[RemoteEntry]:
+    """解析 Unix 风格的 LIST 行，无法识别时返回 None"""
+    parts = line.split(None, 8)
+    if len(parts) < 9 or parts[5] not in _MONTHS:
+        return None
+
+    mode, size, month, day, clock, name = parts[0], parts[4], parts[5], parts[6], parts[7], parts[8]
+    kind = {"d": "dir", "l": "link"}.get(mode[:1], "file")
+    if kind == "link":
+        name = name.split(" -> ", 1)[0]
+    if name in (".", ".."):
+        return None
+
+    import calendar
+
+    mtime = None
+    try:
+        if ":" in clock:
+            # 近半年内的文件只有时:分，年份取最近的一个不在未来的年份
+            hour, minute = map(int, clock.split(":"))
+            now = time.gmtime()
+            year = now.tm_year
+            mtime = calendar.timegm((year, _MONTHS[month], int(day), hour, minute, 0))
+            if mtime > time.time() + 86400:
+                mtime = calendar.timegm((year - 1, _MONTHS[month], int(day), hour, minute, 0))
+        else:
+            mtime = calendar.timegm((int(clock), _MONTHS[month], int(day), 0, 0, 0))
+    except ValueError:
+        pass
+
+    return RemoteEntry(
+        name=name,
+        path=posixpath.join(directory, name),
+        type=kind,
+        size=int(size) if size.isdigit() else -1,
+        mtime=mtime
+    )
+
+
+def _load_checkpoint(path: str) -> dict:
+    import json
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_checkpoint(path: str, data: dict):
+    import json
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class FTPMetrics:
+    """连接指标"""
+
+    __slots__ = (
+        "connects", "reconnects", "connect_time", "last_connect_time",
+        "keepalives", "data_connections", "tls_resumed"
+    )
+
+    def __init__(self):
+        self.connects = 0
+        self.reconnects = 0
+        self.connect_time = 0.0         # 累计建立连接秒数 (TCP + TLS + 登录)
+        self.last_connect_time = 0.0
+        self.keepalives = 0
+        self.data_connections = 0
+        self.tls_resumed = 0            # 复用了控制连接 TLS 会话的数据连接数
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={getattr(self, key)!r}" for key in self.__slots__)
+        return f"FTPMetrics({fields})"
+
+    @property
+    def avg_connect_time(self) -> float:
+        return self.connect_time / self.connects if self.connects else 0.0
+
+    @property
+    def reuse_ratio(self) -> float:
+        """数据连接 TLS 会话复用比例"""
+        return self.tls_resumed / self.data_connections if self.data_connections else 0.0
+
+
+class _SessionReuseFTP_TLS(ftplib.FTP_TLS):
+    """隐式 TLS 的 FTP_TLS；数据连接复用控制连接的 TLS 会话，省去每次传输的完整握手
+
+    打印机的 990 端口是隐式 FTPS: 连接建立后立即 TLS 握手，不接受明文的 AUTH TLS。
+    ftplib 只支持显式 TLS，这里在控制连接套接字创建时就包装为 TLS，
+    login() 看到已是 SSLSocket 便不再发送 AUTH
+    """
+
+    metrics: Optional[FTPMetrics] = None
+    _sock: Optional[socket.socket] = None
+
+    @property
+    def sock(self) -> Optional[socket.socket]:
+        return self._sock
+
+    @sock.setter
+    def sock(self, value: Optional[socket.socket]):
+        if value is not None and not isinstance(value, ssl.SSLSocket):
+            value = self.context.wrap_socket(value, server_hostname=self.host)
+        self._sock = value
+
+    def ntransfercmd(self, cmd, rest=None):
+        conn, size = ftplib.FTP.ntransfercmd(self, cmd, rest)
+        if self._prot_p:
+            conn = self.context.wrap_socket(conn, server_hostname=self.host, session=self.sock.session)
+            if self.metrics is not None:
+                self.metrics.data_connections += 1
+                if conn.session_reused:
+                    self.metrics.tls_resumed += 1
+        return conn, size
+
+
+class _Progress:
+    """按时间或字节间隔节流的进度回调，结束时保证回调最终值"""
+
+    def __init__(
+        self,
+        callback: Optional[Callable[..., None]],
+        total: Optional[int] = None,
+        done: int = 0,
+        interval: float = 0.1,
+        min_bytes: int = 0
+    ):
+        self.callback = callback
+        self.total = total
+        self.done = done
+        self.interval = interval
+        self.min_bytes = min_bytes
+        self._last_time = time.monotonic()
+        self._last_done = done
+
+    def update(self, n: int):
+        self.done += n
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if now - self._last_time >= self.interval or (
+            self.min_bytes and self.done - self._last_done >= self.min_bytes
+        ):
+            self._emit(now)
+
+    def finish(self):
+        if self.callback is not None and self.done != self._last_done:
+            self._emit(time.monotonic())
+
+    def _emit(self, now: float):
+        self._last_time = now
+        self._last_done = self.done
+        if self.total is None:
+            self.callback(self.done)
+        else:
+            self.callback(self.done, self.total)
 
 
 class BambuFTP:
-    """Bambu Lab 打印机 FTP 客户端"""
+    """Bambu Lab 打印机 FTP 客户端
+
+    Args:
+        block_size: 数据连接每次发送/接收的块大小
+        socket_buffer: 数据连接的 SO_SNDBUF/SO_RCVBUF，0 表示使用系统默认
+        progress_interval: 进度回调的最小时间间隔 (秒)
+        progress_bytes: 进度回调的字节间隔，0 表示只按时间节流
+        list_ttl: 目录列表缓存秒数，0 表示不缓存
+        keepalive: 空闲多少秒后发送 NOOP 保活，0 表示不保活
+        auto_reconnect: 连接断开时自动重连，幂等操作 (列表、SIZE、下载、
+                        从文件上传) 重连后重试一次
+    """
 
     def __init__(
         self,
         ip: str,
         access_code: str,
         port: int = 990,
-        username: str = "bblp"
+        username: str = "bblp",
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        socket_buffer: int = DEFAULT_SOCKET_BUFFER,
+        progress_interval: float = 0.1,
+        progress_bytes: int = 0,
+        list_ttl: float = 10.0,
+        keepalive: float = 30.0,
+        auto_reconnect: bool = True
     ):
+        if block_size <= 0:
+            raise ValueError(f"block_size 必须 > 0: {block_size}")
         self.ip = ip
         self.port = port
         self.username = username
         self.access_code = access_code
+        self.block_size = block_size
+        self.socket_buffer = socket_buffer
+        self.progress_interval = progress_interval
+        self.progress_bytes = progress_bytes
+        self.list_ttl = list_ttl
+        self.keepalive = keepalive
+        self.auto_reconnect = auto_reconnect
+        self.metrics = FTPMetrics()
         self._ftp: Optional[ftplib.FTP_TLS] = None
 
+        # 控制连接锁: 每个操作 (含保活 NOOP 和重连) 全程持有
+        self._lock = threading.RLock()
+        self._last_activity = time.monotonic()
+        self._keepalive_stop: Optional[threading.Event] = None
+        self._mlsd_supported = True
+        self._streaming = False
+        # 目录 -> (缓存时间, 目录项)
+        self._list_cache: Dict[str, Tuple[float, List[RemoteEntry]]] = {}
+
     def connect(self) -> bool:
         """连接到打印机 FTP"""
+        with self._lock:
+            return self._connect()
+
+    def _connect(self) -> bool:
+        start = time.monotonic()
         try:
-            # 创建 FTP_TLS 连接
-            self._ftp = ftplib.FTP_TLS()
+            # 创建 FTP_TLS 连接 (数据连接复用 TLS 会话)
+            self._ftp = _SessionReuseFTP_TLS()
             self._ftp.ssl_version = ssl.PROTOCOL_TLS
+            self._ftp.metrics = self.metrics
 
             # 连接
             self._ftp.connect(self.ip, self.port, timeout=30)
@@ -41,6 +335,13 @@ class BambuFTP:
             # 切换到安全数据连接
             self._ftp.prot_p()
 
+            elapsed = time.monotonic() - start
+            self.metrics.connects += 1
+            self.metrics.connect_time += elapsed
+            self.metrics.last_connect_time = elapsed
+            self._last_activity = time.monotonic()
+            self._start_keepalive()
+
             print(f"FTP 连接成功: {self.ip}:{self.port}")
             return True
 
@@ -50,26 +351,323 @@ class BambuFTP:
 
     def disconnect(self):
         """断开 FTP 连接"""
-        if self._ftp:
+        if self._keepalive_stop:
+            self._keepalive_stop.set()
+            self._keepalive_stop = None
+        with self._lock:
+            if self._ftp:
+                try:
+                    self._ftp.quit()
+                except:
+                    pass
+                self._ftp = None
+
+    # ========================================
+    # 保活与重连
+    # ========================================
+
+    def _reconnect(self) -> bool:
+        """丢弃旧的控制连接并重新连接"""
+        with self._lock:
+            if self._ftp:
+                try:
+                    self._ftp.close()
+                except Exception:
+                    pass
+            self.metrics.reconnects += 1
+            return self._connect()
+
+    @contextmanager
+    def _active(self):
+        """独占控制连接直到操作结束 (命令和应答不会与其他线程或保活 NOOP 交错)"""
+        with self._lock:
+            if self._streaming:
+                # 只可能是消费流式下载的线程重入: 在 RETR 中间发命令会打乱应答
+                raise RuntimeError("流式下载进行中，迭代结束 (或 close()) 前不能执行其他 FTP 操作")
             try:
-                self._ftp.quit()
-            except:
+                yield
+            finally:
+                self._last_activity = time.monotonic()
+
+    def _call(self, op: Callable[[], Any], idempotent: bool = True) -> Any:
+        """执行控制连接操作；连接已断开时重连，幂等操作重试一次"""
+        with self._active():
+            try:
+                return op()
+            except _CONNECTION_ERRORS as e:
+                if not self.auto_reconnect or not _connection_lost(e):
+                    raise
+                print(f"FTP 连接已断开 ({e})，重新连接")
+                if not self._reconnect() or not idempotent:
+                    raise
+                return op()
+
+    def _start_keepalive(self):
+        if self.keepalive <= 0 or self._keepalive_stop is not None:
+            return
+        self._keepalive_stop = threading.Event()
+        thread = threading.Thread(target=self._keepalive_loop, args=(self._keepalive_stop,), daemon=True)
+        thread.start()
+
+    def _keepalive_loop(self, stop: threading.Event):
+        while not stop.wait(self.keepalive / 2):
+            # 控制连接正在使用时本身就不空闲，跳过这一轮
+            if not self._lock.acquire(blocking=False):
+                continue
+            try:
+                idle = time.monotonic() - self._last_activity
+                if stop.is_set() or self._ftp is None or idle < self.keepalive:
+                    continue
+                try:
+                    self._ftp.voidcmd("NOOP")
+                    self.metrics.keepalives += 1
+                except Exception as e:
+                    if self.auto_reconnect and not stop.is_set():
+                        print(f"FTP 保活失败 ({e})，重新连接")
+                        self._reconnect()
+                self._last_activity = time.monotonic()
+            finally:
+                self._lock.release()
+
+    # ========================================
+    # 数据传输
+    # ========================================
+
+    def _progress(self, callback, total: Optional[int] = None, done: int = 0) -> _Progress:
+        return _Progress(callback, total, done, self.progress_interval, self.progress_bytes)
+
+    def _tune_socket(self, conn: socket.socket, option: int):
+        if self.socket_buffer:
+            try:
+                conn.setsockopt(socket.SOL_SOCKET, option, self.socket_buffer)
+            except OSError:
                 pass
-            self._ftp = None
+
+    def _file_blocks(self, f, offset: int = 0) -> Iterator[memoryview]:
+        """把文件 mmap 后按块产出 memoryview 切片 (不复制数据)"""
+        import mmap
+
+        size = os.fstat(f.fileno()).st_size
+        if size <= offset:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            for pos in range(offset, size, self.block_size):
+                with view[pos:pos + self.block_size] as block:
+                    yield block
+
+    def _source_blocks(self, source: UploadSource) -> Iterator:
+        """把各种数据源转换为不超过约 block_size 的数据块，内存占用有上限"""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            with memoryview(source) as view, view.cast("B") as data:
+                for pos in range(0, len(data), self.block_size):
+                    with data[pos:pos + self.block_size] as block:
+                        yield block
+            return
+
+        if hasattr(source, "readinto") or hasattr(source, "read"):
+            # 文件对象: 复用同一个缓冲区读取
+            buffer = bytearray(self.block_size)
+            with memoryview(buffer) as view:
+                while True:
+                    if hasattr(source, "readinto"):
+                        n = source.readinto(view)
+                    else:
+                        data = source.read(self.block_size)
+                        n = len(data)
+                        view[:n] = data
+                    if not n:
+                        return
+                    with view[:n] as block:
+                        yield block
+
+        # 迭代器: 小块合并到缓冲区，str 按 UTF-8 编码
+        buffer = bytearray()
+        for chunk in source:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if not buffer and len(chunk) >= self.block_size:
+                yield chunk
+                continue
+            buffer += chunk
+            if len(buffer) >= self.block_size:
+                yield buffer
+                buffer = bytearray()
+        if buffer:
+            yield buffer
+
+    def _send_blocks(self, command: str, blocks: Iterable, progress: _Progress):
+        """通过数据连接发送数据块 (STOR/APPE)"""
+        # 即使上传中断，远程目录也可能已经变化
+        self.invalidate(command.split(" ", 1)[1])
+        with self._active():
+            self._ftp.voidcmd("TYPE I")
+            with self._ftp.transfercmd(command) as conn:
+                self._tune_socket(conn, socket.SO_SNDBUF)
+                for block in blocks:
+                    conn.sendall(block)
+                    progress.update(len(block))
+                if isinstance(conn, ssl.SSLSocket):
+                    conn.unwrap()
+            self._ftp.voidresp()
+        progress.finish()
+
+    def _recv_blocks(
+        self,
+        command: str,
+        progress: _Progress,
+        rest: Optional[int] = None,
+        block_size: Optional[int] = None
+    ) -> Iterator[memoryview]:
+        """
+        通过数据连接接收 (RETR)，复用同一个缓冲区按块产出 memoryview
+
+        消费者处理完一块才会接收下一块 (背压)；提前关闭迭代器时中止传输。
+        迭代结束前，同一线程的其他 FTP 操作抛出 RuntimeError，其他线程等待
+        """
+        buffer = bytearray(block_size or self.block_size)
+        with self._active():
+            # 迭代期间控制连接被这次 RETR 占用 (锁在 yield 之间仍由消费线程持有)
+            self._streaming = True
+            try:
+                self._ftp.voidcmd("TYPE I")
+                try:
+                    with memoryview(buffer) as view, self._ftp.transfercmd(command, rest) as conn:
+                        self._tune_socket(conn, socket.SO_RCVBUF)
+                        while True:
+                            n = conn.recv_into(view)
+                            if not n:
+                                break
+                            with view[:n] as block:
+                                yield block
+                            progress.update(n)
+                        if isinstance(conn, ssl.SSLSocket):
+                            conn.unwrap()
+                except GeneratorExit:
+                    # 数据连接已关闭，读掉服务器的 426/226 回复
+                    try:
+                        self._ftp.getresp()
+                    except ftplib.all_errors:
+                        pass
+                    raise
+                self._ftp.voidresp()
+            finally:
+                self._streaming = False
+        progress.finish()
+
+    def _recv_into(self, command: str, f, progress: _Progress, rest: Optional[int] = None):
+        """通过数据连接接收数据写入文件 (RETR)"""
+        for block in self._recv_blocks(command, progress, rest):
+            f.write(block)
 
     def list_files(self, path: str = "/") -> list:
         """列出目录内容"""
         if not self._ftp:
             return []
 
-        try:
+        def fetch():
             files = []
             self._ftp.retrlines(f"LIST {path}", files.append)
             return files
+
+        try:
+            return self._call(fetch)
         except Exception as e:
             print(f"列出文件失败: {e}")
             return []
 
+    # ========================================
+    # 结构化目录列表
+    # ========================================
+
+    @property
+    def supports_mlsd(self) -> bool:
+        """目录列表是否使用 MLSD；服务器不支持时为 False，此时修改时间来自 LIST，只精确到分钟"""
+        return self._mlsd_supported
+
+    def invalidate(self, remote_path: str):
+        """
+        丢弃受影响目录 (父目录及自身子树) 的列表缓存
+
+        本客户端的修改会自动失效；由其他会话 (如连接池) 修改远程文件后需要手动调用
+        """
+        path = posixpath.normpath(remote_path)
+        self._list_cache.pop(posixpath.dirname(path), None)
+        prefix = path.rstrip("/") + "/"
+        for key in [k for k in self._list_cache if k == path or k.startswith(prefix)]:
+            del self._list_cache[key]
+
+    def _mlsd(self, path: str) -> List[RemoteEntry]:
+        entries = []
+        for name, facts in self._ftp.mlsd(path, ["type", "size", "modify"]):
+            kind = facts.get("type", "file").lower()
+            if kind in ("cdir", "pdir") or name in (".", ".."):
+                continue
+            entries.append(RemoteEntry(
+                name=name,
+                path=posixpath.join(path, name),
+                type="dir" if kind == "dir" else "link" if kind.startswith("os.unix=slink") else "file",
+                size=int(facts["size"]) if facts.get("size", "").isdigit() else -1,
+                mtime=_parse_mlsd_time(facts["modify"]) if "modify" in facts else None
+            ))
+        return entries
+
+    def list_entries(self, path: str = "/", refresh: bool = False) -> List[RemoteEntry]:
+        """
+        结构化列出目录 (优先 MLSD，不支持时解析 LIST)
+
+        结果按目录缓存 list_ttl 秒；本客户端的上传、删除和建目录会使相关缓存失效
+
+        Args:
+            path: 远程目录
+            refresh: 忽略缓存重新获取
+        """
+        if not self._ftp:
+            return []
+
+        path = posixpath.normpath(path)
+        cached = self._list_cache.get(path)
+        if cached and not refresh and time.monotonic() - cached[0] < self.list_ttl:
+            return list(cached[1])
+
+        def fetch() -> List[RemoteEntry]:
+            if self._mlsd_supported:
+                try:
+                    return self._mlsd(path)
+                except ftplib.error_perm as e:
+                    # 500/502: 服务器不支持 MLSD，之后直接用 LIST
+                    if not str(e).startswith(("500", "502")):
+                        raise
+                    self._mlsd_supported = False
+
+            lines = []
+            self._ftp.retrlines(f"LIST {path}", lines.append)
+            return [e for e in (_parse_list_line(line, path) for line in lines) if e]
+
+        try:
+            entries = self._call(fetch)
+        except Exception as e:
+            print(f"列出文件失败: {e}")
+            return []
+
+        if self.list_ttl > 0:
+            self._list_cache[path] = (time.monotonic(), entries)
+        return list(entries)
+
+    def walk(self, path: str = "/", refresh: bool = False) -> Iterator[Tuple[str, List[RemoteEntry], List[RemoteEntry]]]:
+        """
+        递归遍历远程目录，类似 os.walk，产出 (目录, 子目录项, 文件项)
+
+        未过期的子目录列表直接取自缓存，重复扫描不会再请求服务器
+        """
+        pending = [posixpath.normpath(path)]
+        while pending:
+            directory = pending.pop()
+            entries = self.list_entries(directory, refresh)
+            dirs = [e for e in entries if e.is_dir]
+            files = [e for e in entries if not e.is_dir]
+            yield directory, dirs, files
+            pending.extend(e.path for e in reversed(dirs))
+
     def upload_file(
         self,
         local_path: str,
@@ -97,22 +695,15 @@ class BambuFTP:
             remote_path = f"/cache/{filename}"
 
         file_size = os.path.getsize(local_path)
-        uploaded = [0]  # 使用列表以便在闭包中修改
 
-        def callback(data):
-            uploaded[0] += len(data)
-            if progress_callback:
-                progress_callback(uploaded[0], file_size)
+        def store():
+            with open(local_path, "rb") as f:
+                # 使用 STOR 命令上传 (整体覆盖，可安全重试)
+                progress = self._progress(progress_callback, file_size)
+                self._send_blocks(f"STOR {remote_path}", self._file_blocks(f), progress)
 
         try:
-            with open(local_path, "rb") as f:
-                # 使用 STOR 命令上传
-                self._ftp.storbinary(
-                    f"STOR {remote_path}",
-                    f,
-                    blocksize=8192,
-                    callback=callback
-                )
+            self._call(store)
 
             print(f"上传成功: {local_path} -> {remote_path}")
             return True
@@ -121,6 +712,129 @@ class BambuFTP:
             print(f"上传失败: {e}")
             return False
 
+    def _retry_wait(self, attempt: int, retries: int, backoff: float) -> bool:
+        """重试前等待 (指数退避) 并重新连接"""
+        delay = min(backoff * 2 ** (attempt - 1), 60.0)
+        print(f"{delay:.1f}s 后重试 ({attempt}/{retries})")
+        time.sleep(delay)
+        return self._reconnect()
+
+    def upload_resumable(
+        self,
+        local_path: str,
+        remote_path: Optional[str] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        retries: int = 5,
+        backoff: float = 1.0
+    ) -> bool:
+        """
+        可断点续传的上传
+
+        中断后重新连接，按远程已有大小用 APPE 续传。本地检查点文件
+        (<local_path>.ftpresume) 记录远程路径和本地文件大小/修改时间，
+        只有检查点匹配时才信任远程的部分文件，否则从头上传
+
+        Args:
+            local_path: 本地文件路径
+            remote_path: 远程路径（默认为 /cache/）
+            progress_callback: 进度回调函数 (已上传字节, 总字节)
+            retries: 最大重试次数
+            backoff: 首次重试等待秒数，之后每次翻倍
+        """
+        if not self._ftp:
+            print("未连接到 FTP")
+            return False
+
+        if not os.path.exists(local_path):
+            print(f"文件不存在: {local_path}")
+            return False
+
+        if remote_path is None:
+            remote_path = f"/cache/{os.path.basename(local_path)}"
+
+        file_size = os.path.getsize(local_path)
+        checkpoint_path = local_path + CHECKPOINT_SUFFIX
+        identity = {
+            "remote_path": remote_path,
+            "size": file_size,
+            "mtime": os.path.getmtime(local_path)
+        }
+        trusted = _load_checkpoint(checkpoint_path) == identity
+        _save_checkpoint(checkpoint_path, identity)
+
+        for attempt in range(retries + 1):
+            if attempt and not self._retry_wait(attempt, retries, backoff):
+                continue
+
+            offset = self.get_size(remote_path) if trusted else 0
+            if offset < 0 or offset > file_size:
+                offset = 0
+            # 从这里开始远程文件由本次上传写入
+            trusted = True
+            progress = self._progress(progress_callback, file_size, offset)
+
+            try:
+                if offset < file_size or file_size == 0:
+                    with open(local_path, "rb") as f:
+                        command = f"APPE {remote_path}" if offset else f"STOR {remote_path}"
+                        self._send_blocks(command, self._file_blocks(f, offset), progress)
+
+                _remove_file(checkpoint_path)
+                if offset:
+                    print(f"上传成功: {local_path} -> {remote_path} (从 {offset} 字节续传)")
+                else:
+                    print(f"上传成功: {local_path} -> {remote_path}")
+                return True
+
+            except ftplib.error_perm as e:
+                # 权限/路径错误，重试无意义
+                print(f"上传失败: {e}")
+                return False
+
+            except Exception as e:
+                print(f"上传中断: {e} (已上传 {progress.done}/{file_size} 字节)")
+
+        print(f"上传失败: 重试 {retries} 次后仍未完成")
+        return False
+
+    def upload_stream(
+        self,
+        source: UploadSource,
+        remote_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> bool:
+        """
+        从内存数据、文件对象或数据块迭代器上传 (不经过本地文件)
+
+        Args:
+            source: bytes 类对象、二进制文件对象 (read/readinto)，
+                    或产出 bytes/str 的迭代器 (str 按 UTF-8 编码)；按需读取，
+                    内存占用约为 block_size
+            remote_path: 远程路径
+            progress_callback: 进度回调函数 (已上传字节)
+        """
+        if not self._ftp:
+            print("未连接到 FTP")
+            return False
+
+        if isinstance(source, str):
+            raise TypeError("upload_stream 不接受 str，请先 encode 或传入行迭代器")
+
+        progress = self._progress(progress_callback)
+
+        try:
+            # 数据源只能读取一次，断线时只重连不重试
+            self._call(
+                lambda: self._send_blocks(f"STOR {remote_path}", self._source_blocks(source), progress),
+                idempotent=False
+            )
+            print(f"上传成功: {progress.done} 字节 -> {remote_path}")
+            return True
+
+        except Exception as e:
+            print(f"上传失败: {e}")
+            return False
+
     def download_file(
         self,
         remote_path: str,
@@ -139,23 +853,12 @@ class BambuFTP:
             print("未连接到 FTP")
             return False
 
-        downloaded = [0]
-
-        def callback(data):
-            downloaded[0] += len(data)
-            if progress_callback:
-                progress_callback(downloaded[0])
-            return data
-
-        try:
+        def retrieve():
             with open(local_path, "wb") as f:
-                def write_callback(data):
-                    downloaded[0] += len(data)
-                    if progress_callback:
-                        progress_callback(downloaded[0])
-                    f.write(data)
+                self._recv_into(f"RETR {remote_path}", f, self._progress(progress_callback))
 
-                self._ftp.retrbinary(f"RETR {remote_path}", write_callback)
+        try:
+            self._call(retrieve)
 
             print(f"下载成功: {remote_path} -> {local_path}")
             return True
@@ -164,13 +867,167 @@ class BambuFTP:
             print(f"下载失败: {e}")
             return False
 
+    def iter_download(
+        self,
+        remote_path: str,
+        chunk_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        offset: int = 0
+    ) -> Iterator[memoryview]:
+        """
+        流式下载，按块产出 memoryview (不写本地文件)
+
+        每块在下一次迭代时失效 (缓冲区复用)，需要保留时用 bytes(chunk) 复制。
+        消费者处理完一块才接收下一块；提前停止迭代 (break/close) 会中止传输。
+        迭代器无法用返回值表示失败，传输错误以 ftplib 异常抛出。
+        迭代结束前同一线程不能执行其他 FTP 操作 (抛出 RuntimeError)。
+        连接断开时先重新连接 (供之后的调用使用) 再抛出异常，不会自动续传，
+        需要时以 offset=已收到的字节数 重新调用，或使用 download_resumable
+
+        Args:
+            remote_path: 远程文件路径
+            chunk_size: 每块最大字节数，默认为 block_size
+            progress_callback: 进度回调函数 (已下载字节)
+            offset: 从该字节开始 (REST)
+        """
+        if not self._ftp:
+            raise ConnectionError("未连接到 FTP")
+        return self._reconnect_on_loss(self._recv_blocks(
+            f"RETR {remote_path}",
+            self._progress(progress_callback, done=offset),
+            rest=offset or None,
+            block_size=chunk_size
+        ))
+
+    def _reconnect_on_loss(self, blocks: Iterator[memoryview]) -> Iterator[memoryview]:
+        """传输迭代器中连接断开时重新连接，再把异常抛给消费者"""
+        try:
+            yield from blocks
+        except _CONNECTION_ERRORS as e:
+            if self.auto_reconnect and _connection_lost(e):
+                print(f"FTP 连接已断开 ({e})，重新连接")
+                self._reconnect()
+            raise
+
+    def read_bytes(
+        self,
+        remote_path: str,
+        max_size: int = 16 * 1024 * 1024,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> Optional[bytes]:
+        """
+        把小文件下载到内存
+
+        Args:
+            remote_path: 远程文件路径
+            max_size: 大小上限 (字节)，超过时中止并返回 None
+            progress_callback: 进度回调函数 (已下载字节)
+        """
+        if not self._ftp:
+            print("未连接到 FTP")
+            return None
+
+        size = self.get_size(remote_path)
+        if size > max_size:
+            print(f"文件过大: {remote_path} ({size} > {max_size} 字节)")
+            return None
+
+        def fetch() -> Optional[bytes]:
+            data = bytearray()
+            blocks = self._recv_blocks(f"RETR {remote_path}", self._progress(progress_callback))
+            for block in blocks:
+                data += block
+                # SIZE 不可用或文件在下载中变大时也不超过上限
+                if len(data) > max_size:
+                    blocks.close()
+                    print(f"文件过大: {remote_path} (> {max_size} 字节)")
+                    return None
+            return bytes(data)
+
+        try:
+            return self._call(fetch)
+
+        except Exception as e:
+            print(f"下载失败: {e}")
+            return None
+
+    def download_resumable(
+        self,
+        remote_path: str,
+        local_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        retries: int = 5,
+        backoff: float = 1.0
+    ) -> bool:
+        """
+        可断点续传的下载
+
+        数据先写入 <local_path>.part，中断后用 REST 从已下载的位置继续，
+        完成后改名为 local_path。检查点文件 (<local_path>.ftpresume) 记录远程
+        路径和大小，远程文件变化时从头下载
+
+        Args:
+            remote_path: 远程文件路径
+            local_path: 本地保存路径
+            progress_callback: 进度回调函数 (已下载字节)
+            retries: 最大重试次数
+            backoff: 首次重试等待秒数，之后每次翻倍
+        """
+        if not self._ftp:
+            print("未连接到 FTP")
+            return False
+
+        part_path = local_path + ".part"
+        checkpoint_path = local_path + CHECKPOINT_SUFFIX
+
+        for attempt in range(retries + 1):
+            if attempt and not self._retry_wait(attempt, retries, backoff):
+                continue
+
+            remote_size = self.get_size(remote_path)
+            identity = {"remote_path": remote_path, "size": remote_size}
+            offset = 0
+            if _load_checkpoint(checkpoint_path) == identity and os.path.exists(part_path):
+                offset = os.path.getsize(part_path)
+                if 0 <= remote_size < offset:
+                    offset = 0
+            _save_checkpoint(checkpoint_path, identity)
+            progress = self._progress(progress_callback, done=offset)
+
+            try:
+                with open(part_path, "ab" if offset else "wb") as f:
+                    if offset != remote_size:
+                        self._recv_into(f"RETR {remote_path}", f, progress, rest=offset or None)
+
+                os.replace(part_path, local_path)
+                _remove_file(checkpoint_path)
+                if offset:
+                    print(f"下载成功: {remote_path} -> {local_path} (从 {offset} 字节续传)")
+                else:
+                    print(f"下载成功: {remote_path} -> {local_path}")
+                return True
+
+            except ftplib.error_perm as e:
+                print(f"下载失败: {e}")
+                if not offset:
+                    _remove_file(part_path)
+                    _remove_file(checkpoint_path)
+                return False
+
+            except Exception as e:
+                print(f"下载中断: {e} (已下载 {progress.done} 字节)")
+
+        print(f"下载失败: 重试 {retries} 次后仍未完成")
+        return False
+
     def delete_file(self, remote_path: str) -> bool:
         """删除远程文件"""
         if not self._ftp:
             return False
 
         try:
-            self._ftp.delete(remote_path)
+            self._call(lambda: self._ftp.delete(remote_path), idempotent=False)
+            self.invalidate(remote_path)
             print(f"删除成功: {remote_path}")
             return True
         except Exception as e:
@@ -183,7 +1040,8 @@ class BambuFTP:
             return False
 
         try:
-            self._ftp.mkd(path)
+            self._call(lambda: self._ftp.mkd(path), idempotent=False)
+            self.invalidate(path)
             return True
         except Exception as e:
             print(f"创建目录失败: {e}")
@@ -195,10 +1053,93 @@ class BambuFTP:
             return -1
 
         try:
-            return self._ftp.size(remote_path)
+            # SIZE 在 ASCII 模式下可能被拒绝，先切换到二进制模式
+            def query():
+                self._ftp.voidcmd("TYPE I")
+                return self._ftp.size(remote_path)
+
+            size = self._call(query)
+            return size if size is not None else -1
         except:
             return -1
 
+    def get_mtime(self, remote_path: str) -> Optional[str]:
+        """获取文件修改时间 (MDTM 原始值 YYYYMMDDHHMMSS)，不支持时为 None"""
+        if not self._ftp:
+            return None
+
+        try:
+            resp = self._call(lambda: self._ftp.sendcmd(f"MDTM {remote_path}"))
+            return resp.split(None, 1)[1].strip() if resp.startswith("213") else None
+        except:
+            return None
+
+    def upload_many(
+        self,
+        items: Iterable[Union[str, Tuple[str, str]]],
+        pool_size: int = 2,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> "TransferReport":
+        """
+        用连接池并发上传多个文件
+
+        Args:
+            items: 本地路径或 (本地路径, 远程路径)
+            pool_size: 并发会话数 (上限见 ftp_pool.MAX_POOL_SIZE)
+            progress_callback: 汇总进度回调 (已上传字节, 总字节)
+        """
+        from .ftp_pool import FTPPool
+
+        with FTPPool(self.ip, self.access_code, pool_size, self.port, self.username) as pool:
+            return pool.upload_many(items, progress_callback)
+
+    def download_many(
+        self,
+        items: Iterable[Tuple[str, str]],
+        pool_size: int = 2,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> "TransferReport":
+        """
+        用连接池并发下载多个文件
+
+        Args:
+            items: (远程路径, 本地路径)
+            pool_size: 并发会话数 (上限见 ftp_pool.MAX_POOL_SIZE)
+            progress_callback: 汇总进度回调 (已下载字节, 总字节)
+        """
+        from .ftp_pool import FTPPool
+
+        with FTPPool(self.ip, self.access_code, pool_size, self.port, self.username) as pool:
+            return pool.download_many(items, progress_callback)
+
+    def sync(
+        self,
+        local_dir: str,
+        remote_dir: str,
+        delete: bool = True,
+        dry_run: bool = False,
+        pool_size: int = 2,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> "SyncReport":
+        """
+        把本地目录增量同步到打印机 (只传输新增和变更的文件)
+
+        Args:
+            local_dir: 本地目录
+            remote_dir: 远程目录
+            delete: 删除本地已不存在的远程文件
+            dry_run: 只计算计划 (report.plan)，不做任何修改
+            pool_size: 并发上传会话数
+            progress_callback: 汇总上传进度回调 (已上传字节, 总字节)
+        """
+        from .ftp_sync import SyncReport, plan_sync, run_sync
+
+        plan = plan_sync(self, local_dir, remote_dir, delete)
+        print(f"同步计划: {plan.summary()}")
+        if dry_run:
+            return SyncReport(plan, dry_run=True)
+        return run_sync(self, plan, pool_size, progress_callback=progress_callback)
+
     def __enter__(self):
         self.connect()
         return self
@@ -0,0 +1,549 @@
+"""
+Bambu Lab FTP 异步客户端
+基于 asyncio 的隐式 TLS (端口 990) FTPS 客户端，与 BambuFTP 操作对应，
+多台打印机的大量小操作在同一个事件循环中交错执行，无需每个传输一个线程
+
+数据连接复用控制连接的 TLS 会话
+"""
+
+import asyncio
+import ftplib
+import inspect
+import os
+import posixpath
+import re
+import ssl
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterable, Awaitable, Callable, Iterable, List, Optional, Tuple, Union
+
+from .ftp import (
+    DEFAULT_BLOCK_SIZE,
+    FTPMetrics,
+    RemoteEntry,
+    _parse_list_line,
+    _parse_mlsd_time,
+    _Progress,
+)
+
+_PASV_RE = re.compile(r"(\d+),(\d+),(\d+),(\d+),(\d+),(\d+)")
+
+
+class _SessionContext(ssl.SSLContext):
+    """新建的 TLS 连接复用 session (asyncio 通过 wrap_bio 创建 SSLObject)"""
+
+    session: Optional[ssl.SSLSession] = None
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        return super().wrap_bio(
+            incoming, outgoing, server_side, server_hostname,
+            session=session or self.session
+        )
+
+
+class AsyncBambuFTP:
+    """Bambu Lab 打印机 FTP 异步客户端
+
+    同一个实例的命令在控制连接上串行执行；需要并发传输时为同一台打印机
+    创建多个实例
+
+    Args:
+        block_size: 数据连接每次读写的块大小
+        timeout: 单次网络等待的超时秒数
+        progress_interval: 进度回调的最小时间间隔 (秒)
+    """
+
+    def __init__(
+        self,
+        ip: str,
+        access_code: str,
+        port: int = 990,
+        username: str = "bblp",
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        timeout: float = 30.0,
+        progress_interval: float = 0.1
+    ):
+        self.ip = ip
+        self.port = port
+        self.username = username
+        self.access_code = access_code
+        self.block_size = block_size
+        self.timeout = timeout
+        self.progress_interval = progress_interval
+        self.metrics = FTPMetrics()
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._context: Optional[_SessionContext] = None
+
+    # ========================================
+    # 连接
+    # ========================================
+
+    @staticmethod
+    def _make_context() -> _SessionContext:
+        # 打印机使用自签名证书，与 BambuFTP 一样不校验
+        context = _SessionContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        return context
+
+    async def connect(self) -> bool:
+        """连接到打印机 FTP (隐式 TLS)"""
+        self._context = self._make_context()
+        self._lock = asyncio.Lock()
+        return await self._login()
+
+    async def _login(self) -> bool:
+        """建立控制连接并登录 (重新连接时沿用原有的锁)"""
+        start = time.monotonic()
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip, self.port, ssl=self._context, server_hostname=""),
+                self.timeout
+            )
+            await self._expect("2")
+
+            resp = await self._command(f"USER {self.username}", "23")
+            if resp.startswith("3"):
+                await self._command(f"PASS {self.access_code}", "2")
+            await self._command("PBSZ 0", "2")
+            await self._command("PROT P", "2")
+            await self._command("TYPE I", "2")
+
+            # 数据连接复用控制连接的 TLS 会话
+            self._context.session = self._writer.get_extra_info("ssl_object").session
+
+            elapsed = time.monotonic() - start
+            self.metrics.connects += 1
+            self.metrics.connect_time += elapsed
+            self.metrics.last_connect_time = elapsed
+            print(f"FTP 连接成功: {self.ip}:{self.port}")
+            return True
+
+        except Exception as e:
+            print(f"FTP 连接失败: {e}")
+            await self._close()
+            return False
+
+    async def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await asyncio.wait_for(self._writer.wait_closed(), self.timeout)
+            except Exception:
+                pass
+        self._reader = self._writer = None
+
+    async def disconnect(self):
+        """断开 FTP 连接"""
+        if self._writer is None:
+            return
+        try:
+            await self._command("QUIT")
+        except Exception:
+            pass
+        await self._close()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
+
+    # ========================================
+    # 控制连接
+    # ========================================
+
+    async def _readline(self) -> str:
+        line = await asyncio.wait_for(self._reader.readline(), self.timeout)
+        if not line:
+            raise EOFError("FTP 控制连接已关闭")
+        return line.decode("utf-8", "replace").rstrip("\r\n")
+
+    async def _response(self) -> str:
+        """读取一个 (可能多行的) 回复"""
+        first = await self._readline()
+        if first[3:4] != "-":
+            return first
+        lines = [first]
+        while True:
+            line = await self._readline()
+            lines.append(line)
+            if line[:3] == first[:3] and line[3:4] == " ":
+                return "\n".join(lines)
+
+    async def _expect(self, expect: str = "2") -> str:
+        resp = await self._response()
+        if resp[:1] in ("4", "5") or not resp.startswith(tuple(expect)):
+            raise (ftplib.error_temp if resp[:1] == "4" else ftplib.error_perm)(resp)
+        return resp
+
+    async def _command(self, line: str, expect: str = "2") -> str:
+        self._writer.write(line.encode("utf-8") + b"\r\n")
+        await self._writer.drain()
+        return await self._expect(expect)
+
+    @asynccontextmanager
+    async def _session(self):
+        """
+        串行执行控制连接上的操作
+
+        服务器的错误回复已被完整读取，连接状态不变；其他异常 (超时、数据连接失败、
+        本地写入出错等) 可能在控制连接上留下未读的回复，之后的命令会读错回复，
+        因此丢弃控制连接并重新连接
+        """
+        async with self._lock:
+            try:
+                yield
+            except ftplib.Error:
+                raise
+            except asyncio.CancelledError:
+                await self._close()
+                raise
+            except Exception as e:
+                if self._writer is not None:
+                    print(f"FTP 传输中断 ({e})，重新连接")
+                    await self._close()
+                    self.metrics.reconnects += 1
+                    await self._login()
+                raise
+
+    def _check(self) -> bool:
+        if self._writer is None:
+            print("未连接到 FTP")
+            return False
+        return True
+
+    # ========================================
+    # 数据连接
+    # ========================================
+
+    async def _open_data(self, command: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """PASV 后发送传输命令并建立 TLS 数据连接"""
+        resp = await self._command("PASV", "2")
+        match = _PASV_RE.search(resp)
+        if not match:
+            raise ftplib.error_proto(resp)
+        port = int(match.group(5)) * 256 + int(match.group(6))
+
+        # 先发命令再握手: 部分服务器收到命令后才接受数据连接的 TLS
+        self._writer.write(command.encode("utf-8") + b"\r\n")
+        await self._writer.drain()
+
+        reply = asyncio.ensure_future(self._expect("1"))
+        connect = asyncio.ensure_future(asyncio.wait_for(
+            asyncio.open_connection(self.ip, port, ssl=self._context, server_hostname=""),
+            self.timeout
+        ))
+        await asyncio.wait({reply, connect}, return_when=asyncio.FIRST_COMPLETED)
+        if reply.done() and reply.exception() is not None:
+            connect.cancel()
+            raise reply.exception()
+
+        try:
+            reader, writer = await connect
+        except BaseException:
+            # 150 回复的读取被取消，控制连接由 _session 重新建立
+            reply.cancel()
+            raise
+        try:
+            await reply
+        except BaseException:
+            writer.close()
+            raise
+
+        self.metrics.data_connections += 1
+        ssl_object = writer.get_extra_info("ssl_object")
+        if ssl_object is not None and ssl_object.session_reused:
+            self.metrics.tls_resumed += 1
+        return reader, writer
+
+    async def _send_blocks(self, command: str, blocks, progress: _Progress):
+        """发送数据块 (同步或异步迭代器)"""
+        async with self._session():
+            _, writer = await self._open_data(command)
+            try:
+                if hasattr(blocks, "__aiter__"):
+                    async for block in blocks:
+                        writer.write(block)
+                        await writer.drain()
+                        progress.update(len(block))
+                else:
+                    for block in blocks:
+                        writer.write(block)
+                        await writer.drain()
+                        progress.update(len(block))
+            finally:
+                writer.close()
+                try:
+                    await asyncio.wait_for(writer.wait_closed(), self.timeout)
+                except Exception:
+                    pass
+            await self._expect("2")
+        progress.finish()
+
+    async def _recv_blocks(
+        self,
+        command: str,
+        progress: _Progress,
+        on_block: Callable[[bytes], Union[Optional[bool], Awaitable[Optional[bool]]]]
+    ) -> bool:
+        """接收数据块；on_block 可以是协程函数，返回 False 时中止传输并返回 False"""
+        async with self._session():
+            reader, writer = await self._open_data(command)
+            aborted = False
+            try:
+                while True:
+                    block = await asyncio.wait_for(reader.read(self.block_size), self.timeout)
+                    if not block:
+                        break
+                    progress.update(len(block))
+                    result = on_block(block)
+                    if inspect.isawaitable(result):
+                        result = await result
+                    if result is False:
+                        aborted = True
+                        break
+            finally:
+                writer.close()
+            if aborted:
+                # 数据连接已关闭，读掉服务器的 426/226 回复
+                await self._response()
+                return False
+            await self._expect("2")
+        progress.finish()
+        return True
+
+    # ========================================
+    # 操作
+    # ========================================
+
+    async def list_files(self, path: str = "/") -> list:
+        """列出目录内容 (原始 LIST 行)"""
+        if not self._check():
+            return []
+
+        try:
+            data = bytearray()
+            await self._recv_blocks(f"LIST {path}", _Progress(None), data.extend)
+            return data.decode("utf-8", "replace").splitlines()
+        except Exception as e:
+            print(f"列出文件失败: {e}")
+            return []
+
+    async def list_entries(self, path: str = "/") -> List[RemoteEntry]:
+        """结构化列出目录 (优先 MLSD，不支持时解析 LIST)"""
+        if not self._check():
+            return []
+
+        path = posixpath.normpath(path)
+        data = bytearray()
+        try:
+            try:
+                await self._recv_blocks(f"MLSD {path}", _Progress(None), data.extend)
+            except ftplib.error_perm as e:
+                if not str(e).startswith(("500", "502")):
+                    raise
+                lines = await self.list_files(path)
+                return [e for e in (_parse_list_line(line, path) for line in lines) if e]
+        except Exception as e:
+            print(f"列出文件失败: {e}")
+            return []
+
+        entries = []
+        for line in data.decode("utf-8", "replace").splitlines():
+            facts_part, _, name = line.partition(" ")
+            facts = {}
+            for fact in facts_part.rstrip(";").split(";"):
+                key, _, value = fact.partition("=")
+                facts[key.lower()] = value
+            kind = facts.get("type", "file").lower()
+            if not name or kind in ("cdir", "pdir"):
+                continue
+            entries.append(RemoteEntry(
+                name=name,
+                path=posixpath.join(path, name),
+                type="dir" if kind == "dir" else "link" if kind.startswith("os.unix=slink") else "file",
+                size=int(facts["size"]) if facts.get("size", "").isdigit() else -1,
+                mtime=_parse_mlsd_time(facts["modify"]) if "modify" in facts else None
+            ))
+        return entries
+
+    async def upload_file(
+        self,
+        local_path: str,
+        remote_path: Optional[str] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> bool:
+        """
+        上传文件到打印机
+
+        Args:
+            local_path: 本地文件路径
+            remote_path: 远程路径（默认为 /cache/）
+            progress_callback: 进度回调函数 (已上传字节, 总字节)
+        """
+        if not self._check():
+            return False
+
+        if not os.path.exists(local_path):
+            print(f"文件不存在: {local_path}")
+            return False
+
+        if remote_path is None:
+            remote_path = f"/cache/{os.path.basename(local_path)}"
+
+        progress = _Progress(progress_callback, os.path.getsize(local_path), interval=self.progress_interval)
+
+        # 文件读写放到线程池中，不阻塞事件循环上其他打印机的操作
+        async def blocks(f):
+            while True:
+                block = await asyncio.to_thread(f.read, self.block_size)
+                if not block:
+                    return
+                yield block
+
+        try:
+            f = await asyncio.to_thread(open, local_path, "rb")
+            try:
+                await self._send_blocks(f"STOR {remote_path}", blocks(f), progress)
+            finally:
+                await asyncio.to_thread(f.close)
+            print(f"上传成功: {local_path} -> {remote_path}")
+            return True
+
+        except Exception as e:
+            print(f"上传失败: {e}")
+            return False
+
+    async def upload_stream(
+        self,
+        source: Union[bytes, bytearray, memoryview, Iterable[bytes], AsyncIterable[bytes]],
+        remote_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> bool:
+        """
+        从内存数据或 (异步) 数据块迭代器上传
+
+        Args:
+            source: bytes 类对象，或产出 bytes 的同步/异步迭代器
+            remote_path: 远程路径
+            progress_callback: 进度回调函数 (已上传字节)
+        """
+        if not self._check():
+            return False
+
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            view = memoryview(source).cast("B")
+            source = (view[pos:pos + self.block_size] for pos in range(0, len(view), self.block_size))
+
+        progress = _Progress(progress_callback, interval=self.progress_interval)
+        try:
+            await self._send_blocks(f"STOR {remote_path}", source, progress)
+            print(f"上传成功: {progress.done} 字节 -> {remote_path}")
+            return True
+
+        except Exception as e:
+            print(f"上传失败: {e}")
+            return False
+
+    async def download_file(
+        self,
+        remote_path: str,
+        local_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> bool:
+        """
+        从打印机下载文件
+
+        Args:
+            remote_path: 远程文件路径
+            local_path: 本地保存路径
+            progress_callback: 进度回调函数 (已下载字节)
+        """
+        if not self._check():
+            return False
+
+        progress = _Progress(progress_callback, interval=self.progress_interval)
+        try:
+            f = await asyncio.to_thread(open, local_path, "wb")
+            try:
+                await self._recv_blocks(
+                    f"RETR {remote_path}", progress, lambda block: asyncio.to_thread(f.write, block)
+                )
+            finally:
+                await asyncio.to_thread(f.close)
+            print(f"下载成功: {remote_path} -> {local_path}")
+            return True
+
+        except Exception as e:
+            print(f"下载失败: {e}")
+            return False
+
+    async def read_bytes(self, remote_path: str, max_size: int = 16 * 1024 * 1024) -> Optional[bytes]:
+        """把小文件下载到内存，超过 max_size 时返回 None"""
+        if not self._check():
+            return None
+
+        size = await self.get_size(remote_path)
+        if size > max_size:
+            print(f"文件过大: {remote_path} ({size} > {max_size} 字节)")
+            return None
+
+        data = bytearray()
+
+        def on_block(block: bytes) -> bool:
+            data.extend(block)
+            # SIZE 不可用或文件在下载中变大时也不超过上限
+            return len(data) <= max_size
+
+        try:
+            if not await self._recv_blocks(f"RETR {remote_path}", _Progress(None), on_block):
+                print(f"文件过大: {remote_path} (> {max_size} 字节)")
+                return None
+            return bytes(data)
+        except Exception as e:
+            print(f"下载失败: {e}")
+            return None
+
+    async def delete_file(self, remote_path: str) -> bool:
+        """删除远程文件"""
+        if not self._check():
+            return False
+
+        try:
+            async with self._session():
+                await self._command(f"DELE {remote_path}")
+            print(f"删除成功: {remote_path}")
+            return True
+        except Exception as e:
+            print(f"删除失败: {e}")
+            return False
+
+    async def mkdir(self, path: str) -> bool:
+        """创建目录"""
+        if not self._check():
+            return False
+
+        try:
+            async with self._session():
+                await self._command(f"MKD {path}")
+            return True
+        except Exception as e:
+            print(f"创建目录失败: {e}")
+            return False
+
+    async def get_size(self, remote_path: str) -> int:
+        """获取文件大小"""
+        if self._writer is None:
+            return -1
+
+        try:
+            async with self._session():
+                resp = await self._command(f"SIZE {remote_path}", "2")
+            return int(resp[3:].strip())
+        except Exception:
+            return -1
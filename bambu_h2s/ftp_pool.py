@@ -0,0 +1,242 @@
+"""
+Bambu Lab FTP 连接池
+多个 FTPS 会话并发上传/下载，汇总进度、逐文件结果和吞吐统计
+池大小有上限，避免压垮打印机的 FTP 服务
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .ftp import BambuFTP
+
+# 打印机 FTP 服务能承受的并发会话上限
+MAX_POOL_SIZE = 4
+
+
+@dataclass
+class TransferResult:
+    """单个文件的传输结果"""
+    local_path: str
+    remote_path: str
+    ok: bool = False
+    bytes: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class TransferReport:
+    """一批传输的汇总"""
+    results: List[TransferResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(r.ok for r in self.results)
+
+    @property
+    def failed(self) -> List[TransferResult]:
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def bytes(self) -> int:
+        return sum(r.bytes for r in self.results if r.ok)
+
+    @property
+    def throughput(self) -> float:
+        """总吞吐 (字节/秒)"""
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class FTPPool:
+    """FTPS 会话池
+
+    Args:
+        size: 会话数，不超过 MAX_POOL_SIZE；会话在首次使用时建立
+    """
+
+    def __init__(
+        self,
+        ip: str,
+        access_code: str,
+        size: int = 2,
+        port: int = 990,
+        username: str = "bblp"
+    ):
+        self.ip = ip
+        self.access_code = access_code
+        self.port = port
+        self.username = username
+        self.size = max(1, min(size, MAX_POOL_SIZE))
+
+        self._idle: "queue.LifoQueue[BambuFTP]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._sessions: List[BambuFTP] = []
+        self._broken: set = set()
+
+    def _new_session(self) -> Optional[BambuFTP]:
+        ftp = BambuFTP(self.ip, self.access_code, port=self.port, username=self.username)
+        if not ftp.connect():
+            return None
+        with self._lock:
+            self._sessions.append(ftp)
+        return ftp
+
+    def _discard(self, ftp: BambuFTP):
+        ftp.disconnect()
+        with self._lock:
+            self._broken.discard(ftp)
+            if ftp in self._sessions:
+                self._sessions.remove(ftp)
+
+    def invalidate(self, ftp: BambuFTP):
+        """标记会话已损坏，归还时关闭而不是放回池中"""
+        with self._lock:
+            self._broken.add(ftp)
+
+    @contextmanager
+    def session(self) -> Iterator[Optional[BambuFTP]]:
+        """借出一个会话；连接失败时为 None。传输出错后应调用 invalidate()"""
+        self._slots.acquire()
+        ftp = None
+        try:
+            try:
+                ftp = self._idle.get_nowait()
+            except queue.Empty:
+                ftp = self._new_session()
+            yield ftp
+        finally:
+            if ftp is not None:
+                if ftp in self._broken:
+                    self._discard(ftp)
+                else:
+                    self._idle.put(ftp)
+            self._slots.release()
+
+    def close(self):
+        """关闭所有会话"""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for ftp in sessions:
+            ftp.disconnect()
+        while not self._idle.empty():
+            self._idle.get_nowait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # ========================================
+    # 批量传输
+    # ========================================
+
+    def _run(self, jobs: List[Tuple[str, str, int]], transfer, progress_callback) -> TransferReport:
+        total = sum(size for _, _, size in jobs)
+        done = [0]
+        lock = threading.Lock()
+
+        def report(delta: int):
+            with lock:
+                done[0] += delta
+                current = done[0]
+            if progress_callback:
+                progress_callback(current, total)
+
+        def run_one(job: Tuple[str, str, int]) -> TransferResult:
+            local_path, remote_path, _ = job
+            result = TransferResult(local_path, remote_path)
+            start = time.monotonic()
+            with self.session() as ftp:
+                if ftp is None:
+                    result.error = "FTP 连接失败"
+                    return result
+                moved = [0]
+
+                def on_progress(current: int, *_):
+                    report(current - moved[0])
+                    moved[0] = current
+
+                result.ok = transfer(ftp, local_path, remote_path, on_progress)
+                result.bytes = moved[0]
+                if not result.ok:
+                    result.error = "传输失败"
+                    self.invalidate(ftp)
+            result.elapsed = time.monotonic() - start
+            return result
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            results = list(executor.map(run_one, jobs))
+        return TransferReport(results, time.monotonic() - start)
+
+    def upload_many(
+        self,
+        items: Iterable[Union[str, Tuple[str, str]]],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        resumable: bool = False,
+        retries: int = 3
+    ) -> TransferReport:
+        """
+        并发上传多个文件
+
+        Args:
+            items: 本地路径 (上传到 /cache/<文件名>) 或 (本地路径, 远程路径)
+            progress_callback: 汇总进度回调 (已传输字节, 总字节)
+            resumable: 使用断点续传上传 (见 BambuFTP.upload_resumable)，
+                       续传跳过的字节也计入进度
+            retries: 断点续传的最大重试次数
+        """
+        jobs = []
+        for item in items:
+            local_path, remote_path = (item, None) if isinstance(item, str) else item
+            if remote_path is None:
+                remote_path = f"/cache/{os.path.basename(local_path)}"
+            size = os.path.getsize(local_path) if os.path.exists(local_path) else 0
+            jobs.append((local_path, remote_path, size))
+
+        def transfer(ftp, local_path, remote_path, on_progress):
+            if resumable:
+                return ftp.upload_resumable(local_path, remote_path, on_progress, retries)
+            return ftp.upload_file(local_path, remote_path, on_progress)
+
+        return self._run(jobs, transfer, progress_callback)
+
+    def download_many(
+        self,
+        items: Iterable[Tuple[str, str]],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        resumable: bool = False,
+        retries: int = 3
+    ) -> TransferReport:
+        """
+        并发下载多个文件
+
+        Args:
+            items: (远程路径, 本地路径)
+            progress_callback: 汇总进度回调 (已传输字节, 总字节；总字节取自 SIZE，未知时为 0)
+            resumable: 使用断点续传下载 (见 BambuFTP.download_resumable)
+            retries: 断点续传的最大重试次数
+        """
+        pairs = list(items)
+        sizes = {}
+        with self.session() as ftp:
+            if ftp is not None:
+                for remote_path, _ in pairs:
+                    sizes[remote_path] = max(ftp.get_size(remote_path), 0)
+        jobs = [(local_path, remote_path, sizes.get(remote_path, 0)) for remote_path, local_path in pairs]
+
+        def transfer(ftp, local_path, remote_path, on_progress):
+            if resumable:
+                return ftp.download_resumable(remote_path, local_path, on_progress, retries)
+            return ftp.download_file(remote_path, local_path, on_progress)
+
+        return self._run(jobs, transfer, progress_callback)
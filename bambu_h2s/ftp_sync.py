@@ -0,0 +1,212 @@
+"""
+本地目录与打印机存储的增量同步
+由本地文件状态和 (缓存的) 远程列表计算差异计划: 新增、变更、删除，
+只传输变化的文件；上传走连接池并发、断点续传，支持只看计划不执行
+"""
+
+import os
+import posixpath
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from .ftp import CHECKPOINT_SUFFIX, RemoteEntry, _load_checkpoint
+from .ftp_pool import FTPPool, TransferReport
+
+if TYPE_CHECKING:
+    from .ftp import BambuFTP
+
+
+@dataclass
+class SyncAction:
+    """同步计划中的一步"""
+    kind: str                       # "mkdir" / "upload" / "delete"
+    remote_path: str
+    local_path: Optional[str] = None
+    size: int = 0
+    reason: str = ""                # "new" / "changed" / "deleted"
+    resume_from: int = 0            # 断点续传时远程已有的字节数
+
+    @property
+    def transfer_bytes(self) -> int:
+        return self.size - self.resume_from if self.kind == "upload" else 0
+
+
+@dataclass
+class SyncPlan:
+    """同步计划"""
+    local_dir: str
+    remote_dir: str
+    actions: List[SyncAction] = field(default_factory=list)
+    unchanged: int = 0
+    unchanged_bytes: int = 0
+
+    def of_kind(self, kind: str) -> List[SyncAction]:
+        return [a for a in self.actions if a.kind == kind]
+
+    @property
+    def transfer_bytes(self) -> int:
+        """需要传输的字节数 (已扣除可续传部分)"""
+        return sum(a.transfer_bytes for a in self.actions)
+
+    def summary(self) -> str:
+        return (
+            f"新建目录 {len(self.of_kind('mkdir'))}, 上传 {len(self.of_kind('upload'))}, "
+            f"删除 {len(self.of_kind('delete'))}, 未变 {self.unchanged}; "
+            f"需传输 {self.transfer_bytes} 字节, 免传 {self.unchanged_bytes} 字节"
+        )
+
+
+@dataclass
+class SyncReport:
+    """同步结果"""
+    plan: SyncPlan
+    dry_run: bool = False
+    transfers: Optional[TransferReport] = None
+    bytes_sent: int = 0
+    failed: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    @property
+    def throughput(self) -> float:
+        """实际发送字节/秒"""
+        return self.bytes_sent / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def _resume_offset(local_path: str, remote_path: str, remote_size: int, size: int) -> int:
+    """检查点与本地文件一致时，远程的部分文件可以续传"""
+    identity = {
+        "remote_path": remote_path,
+        "size": size,
+        "mtime": os.path.getmtime(local_path)
+    }
+    if 0 < remote_size < size and _load_checkpoint(local_path + CHECKPOINT_SUFFIX) == identity:
+        return remote_size
+    return 0
+
+
+def plan_sync(
+    ftp: "BambuFTP",
+    local_dir: str,
+    remote_dir: str,
+    delete: bool = True,
+    mtime_tolerance: float = 2.0,
+    refresh: bool = False
+) -> SyncPlan:
+    """
+    计算同步计划
+
+    大小不同，或本地修改时间晚于远程 (超过 mtime_tolerance 秒) 的文件视为变更；
+    delete 为 True 时删除本地已不存在的远程文件 (不删除目录)
+
+    Args:
+        ftp: 已连接的 BambuFTP
+        local_dir: 本地目录
+        remote_dir: 远程目录
+        delete: 是否删除多余的远程文件
+        mtime_tolerance: 修改时间比较的容差 (秒)；LIST 只精确到分钟时至少取 60
+        refresh: 忽略目录列表缓存
+    """
+    if not os.path.isdir(local_dir):
+        raise ValueError(f"本地目录不存在: {local_dir}")
+
+    remote_dir = posixpath.normpath(remote_dir)
+    plan = SyncPlan(local_dir, remote_dir)
+
+    remote_files: Dict[str, RemoteEntry] = {}
+    remote_dirs = set()
+    for directory, dirs, files in ftp.walk(remote_dir, refresh):
+        # 空列表无法区分空目录和不存在的目录，按不存在处理 (建目录失败不影响执行)
+        if directory != remote_dir or dirs or files:
+            remote_dirs.add(directory)
+        remote_dirs.update(d.path for d in dirs)
+        remote_files.update((f.path, f) for f in files)
+
+    tolerance = mtime_tolerance if ftp.supports_mlsd else max(mtime_tolerance, 60.0)
+    seen = set()
+
+    for directory, dirs, files in os.walk(local_dir):
+        dirs.sort()
+        rel = os.path.relpath(directory, local_dir)
+        target_dir = remote_dir if rel == "." else posixpath.join(remote_dir, *rel.split(os.sep))
+        if target_dir not in remote_dirs:
+            plan.actions.append(SyncAction("mkdir", target_dir, directory, reason="new"))
+
+        for name in sorted(files):
+            if name.endswith(CHECKPOINT_SUFFIX):
+                continue
+            local_path = os.path.join(directory, name)
+            remote_path = posixpath.join(target_dir, name)
+            seen.add(remote_path)
+            st = os.stat(local_path)
+
+            entry = remote_files.get(remote_path)
+            if entry is None:
+                plan.actions.append(SyncAction("upload", remote_path, local_path, st.st_size, "new"))
+                continue
+
+            newer = entry.mtime is not None and st.st_mtime > entry.mtime + tolerance
+            if entry.size == st.st_size and not newer:
+                plan.unchanged += 1
+                plan.unchanged_bytes += st.st_size
+                continue
+
+            plan.actions.append(SyncAction(
+                "upload", remote_path, local_path, st.st_size, "changed",
+                _resume_offset(local_path, remote_path, entry.size, st.st_size)
+            ))
+
+    if delete:
+        for remote_path in sorted(set(remote_files) - seen):
+            plan.actions.append(SyncAction("delete", remote_path, size=remote_files[remote_path].size, reason="deleted"))
+
+    return plan
+
+
+def run_sync(
+    ftp: "BambuFTP",
+    plan: SyncPlan,
+    pool_size: int = 2,
+    retries: int = 3,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> SyncReport:
+    """
+    执行同步计划: 先建目录，再用连接池并发续传上传，最后删除
+
+    中断后重新 sync 即可继续：已完成的文件不再变化，未完成的按检查点续传
+    """
+    report = SyncReport(plan)
+    start = time.monotonic()
+
+    # 目录可能已经存在，建目录失败不算失败；真正缺失时其中的上传会失败
+    for action in plan.of_kind("mkdir"):
+        ftp.mkdir(action.remote_path)
+
+    uploads = plan.of_kind("upload")
+    if uploads:
+        with FTPPool(ftp.ip, ftp.access_code, pool_size, ftp.port, ftp.username) as pool:
+            report.transfers = pool.upload_many(
+                [(a.local_path, a.remote_path) for a in uploads],
+                progress_callback,
+                resumable=True,
+                retries=retries
+            )
+        for action, result in zip(uploads, report.transfers.results):
+            if result.ok:
+                report.bytes_sent += max(0, result.bytes - action.resume_from)
+            else:
+                report.failed.append(action.remote_path)
+        # 上传由池中的其他会话完成，本会话的列表缓存需要失效
+        for action in uploads:
+            ftp.invalidate(action.remote_path)
+
+    for action in plan.of_kind("delete"):
+        if not ftp.delete_file(action.remote_path):
+            report.failed.append(action.remote_path)
+
+    report.elapsed = time.monotonic() - start
+    return report
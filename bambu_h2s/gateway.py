@@ -0,0 +1,316 @@
+"""
+Bambu Lab 状态网关
+通过 HTTP (ETag 缓存) 和 WebSocket (增量推送) 向多个看板共享一个 MQTT 会话的状态
+"""
+
+import base64
+import hashlib
+import json
+import select
+import socket
+import struct
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple
+
+if TYPE_CHECKING:
+    from .client import BambuClient
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# 浏览器发来的帧: 控制帧按 RFC 6455 最多 125 字节；网关只推送，数据帧也只接受很小的
+_MAX_CONTROL_FRAME = 125
+_MAX_CLIENT_FRAME = 4096
+# 读取一帧剩余部分的超时 (秒)，避免发送半帧的客户端一直占用处理线程
+_WS_READ_TIMEOUT = 5.0
+
+
+def _ws_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    """编码服务端 WebSocket 帧 (不加掩码)"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+class StatusGateway:
+    """打印机状态网关
+
+    GET /state  返回完整状态 JSON，带 ETag (状态版本号)，支持 If-None-Match
+    GET /ws     WebSocket，先推送完整快照，之后推送合并后的增量
+    """
+
+    def __init__(
+        self,
+        client: "BambuClient",
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        history: int = 256,
+        keepalive: float = 20.0
+    ):
+        self.client = client
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+
+        self._cond = threading.Condition()
+        self._state: Dict[str, Any] = dict(client.state)
+        self._version = 0
+        # 增量历史: [版本, 增量, 已编码帧]
+        self._history: deque = deque(maxlen=history)
+        # 按版本缓存的快照编码
+        self._snapshot_version = -1
+        self._snapshot_body = b""
+        self._snapshot_frame = b""
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.viewers = 0
+
+    # ========================================
+    # 状态输入
+    # ========================================
+
+    def _on_state(self, diff: Dict[str, Any]):
+        """客户端状态监听器 (在 MQTT 线程中调用)"""
+        diff = dict(diff)
+        with self._cond:
+            self._state.update(diff)
+            self._version += 1
+            self._history.append([self._version, diff, None])
+            self._cond.notify_all()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def snapshot(self) -> Tuple[int, bytes]:
+        """获取当前版本及其 JSON 编码，同一版本只编码一次"""
+        with self._cond:
+            return self._version, self._encode_snapshot()[0]
+
+    def _encode_snapshot(self) -> Tuple[bytes, bytes]:
+        """编码快照 (需持有锁)"""
+        if self._snapshot_version != self._version:
+            self._snapshot_body = json.dumps(self._state).encode()
+            message = json.dumps({"version": self._version, "state": self._state})
+            self._snapshot_frame = _ws_frame(message.encode())
+            self._snapshot_version = self._version
+        return self._snapshot_body, self._snapshot_frame
+
+    def _frames_since(self, version: int) -> Tuple[int, List[bytes]]:
+        """获取某版本之后的增量帧；落后太多时返回完整快照帧 (需持有锁)"""
+        if version == self._version:
+            return version, []
+        if not self._history or self._history[0][0] > version + 1:
+            return self._version, [self._encode_snapshot()[1]]
+
+        frames = []
+        for entry in self._history:
+            if entry[0] <= version:
+                continue
+            if entry[2] is None:
+                message = json.dumps({"version": entry[0], "diff": entry[1]})
+                entry[2] = _ws_frame(message.encode())
+            frames.append(entry[2])
+        return self._version, frames
+
+    # ========================================
+    # 服务器
+    # ========================================
+
+    def start(self) -> bool:
+        """启动网关 (后台线程)"""
+        gateway = self
+
+        class Handler(_GatewayHandler):
+            pass
+
+        Handler.gateway = gateway
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            print(f"网关启动失败: {e}")
+            return False
+
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self.client.add_state_listener(self._on_state)
+
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"状态网关已启动: http://{self.host}:{self.port}/state")
+        return True
+
+    def stop(self):
+        """停止网关"""
+        self.client.remove_state_listener(self._on_state)
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._cond:
+            self._cond.notify_all()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class _GatewayHandler(BaseHTTPRequestHandler):
+    """网关请求处理"""
+
+    protocol_version = "HTTP/1.1"
+    gateway: StatusGateway
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/state":
+            self._serve_state()
+        elif path == "/ws" and self.headers.get("Upgrade", "").lower() == "websocket":
+            self._serve_websocket()
+        else:
+            self.send_error(404)
+
+    def _serve_state(self):
+        version, body = self.gateway.snapshot()
+        etag = f'"{version}"'
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve_websocket(self):
+        key = self.headers.get("Sec-WebSocket-Key")
+        if not key:
+            self.send_error(400)
+            return
+
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+
+        gateway = self.gateway
+        sock = self.connection
+        # 之后直接读套接字 (select 只能看到套接字)；浏览器紧跟握手发来、已进入 rfile 缓冲区的数据先取出
+        self._ws_buffer = bytearray(self._take_buffered(sock))
+        sock.settimeout(_WS_READ_TIMEOUT)
+        with gateway._cond:
+            gateway.viewers += 1
+            version = gateway._version
+            frames = [gateway._encode_snapshot()[1]]
+
+        try:
+            while gateway._server is not None:
+                for frame in frames:
+                    sock.sendall(frame)
+                if not self._drain_incoming(sock):
+                    break
+
+                with gateway._cond:
+                    if gateway._version == version:
+                        gateway._cond.wait(gateway.keepalive)
+                    if gateway._version == version:
+                        frames = [_ws_frame(b"", 0x9)]
+                    else:
+                        version, frames = gateway._frames_since(version)
+        except (OSError, socket.timeout):
+            pass
+        finally:
+            with gateway._cond:
+                gateway.viewers -= 1
+
+    def _take_buffered(self, sock: socket.socket) -> bytes:
+        """取出 rfile 中已缓冲、尚未处理的数据 (不阻塞)"""
+        timeout = sock.gettimeout()
+        sock.setblocking(False)
+        try:
+            return self.rfile.read1(65536) or b""
+        except OSError:
+            return b""
+        finally:
+            sock.settimeout(timeout)
+
+    def _ws_read(self, sock: socket.socket, n: int) -> bytes:
+        """先从缓冲区、再从套接字读取 n 字节；连接关闭时返回不足 n 字节"""
+        buffer = self._ws_buffer
+        while len(buffer) < n:
+            data = sock.recv(65536)
+            if not data:
+                break
+            buffer += data
+        data = bytes(buffer[:n])
+        del buffer[:n]
+        return data
+
+    def _drain_incoming(self, sock: socket.socket) -> bool:
+        """
+        读取浏览器发来的帧: 回应 ping、处理关闭，其余忽略；返回 False 表示连接已关闭
+
+        帧长度来自客户端，超过上限时发送关闭帧并断开，不按声明的长度分配缓冲区
+        """
+        while self._ws_buffer or select.select([sock], [], [], 0)[0]:
+            header = self._ws_read(sock, 2)
+            if len(header) < 2:
+                return False
+            opcode = header[0] & 0x0F
+            length = header[1] & 0x7F
+            if length >= 126:
+                size = 2 if length == 126 else 8
+                extended = self._ws_read(sock, size)
+                if len(extended) < size:
+                    return False
+                length = struct.unpack("!H" if size == 2 else "!Q", extended)[0]
+
+            if opcode & 0x8 and length > _MAX_CONTROL_FRAME:
+                # 1002: 协议错误
+                sock.sendall(_ws_frame(struct.pack("!H", 1002), 0x8))
+                return False
+            if length > _MAX_CLIENT_FRAME:
+                # 1009: 消息过大
+                sock.sendall(_ws_frame(struct.pack("!H", 1009), 0x8))
+                return False
+
+            mask = self._ws_read(sock, 4) if header[1] & 0x80 else b""
+            if len(mask) < (4 if header[1] & 0x80 else 0):
+                return False
+            payload = self._ws_read(sock, length)
+            if len(payload) < length:
+                return False
+            if opcode == 0x8:
+                sock.sendall(_ws_frame(b"", 0x8))
+                return False
+            if opcode == 0x9:
+                # ping: 以相同内容回复 pong
+                if mask:
+                    payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+                sock.sendall(_ws_frame(payload, 0xA))
+        return True
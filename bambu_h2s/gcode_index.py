@@ -0,0 +1,433 @@
+"""
+G-code 层索引 (内存映射)
+对大文件 mmap 后分块扫描一次: NumPy 向量化统计换行，正则在映射上直接查找
+换层标记、对象标签和 M73 进度，得到每层字节偏移、每个对象的行范围、
+耗材用量和层数；索引保存在文件旁 (<文件>.idx.npz)，之后的查询都是二分查找，
+可以把打印机上报的 mc_percent / layer_num 廉价地映射回文件位置
+
+依赖 numpy
+"""
+
+import json
+import math
+import mmap
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+INDEX_SUFFIX = ".idx.npz"
+INDEX_VERSION = 1
+
+# 每隔多少行记录一次行首偏移 (行号 <-> 偏移的换算最多再扫描这么多行)
+LINE_STRIDE = 1024
+# 每次扫描的块大小 (在行边界处截断)
+SCAN_CHUNK = 32 * 1024 * 1024
+
+# 一次扫描的全部事件 (行首匹配)
+_EVENT_BODY = (
+    rb"(?:"
+    rb"(?P<layer>; ?CHANGE_LAYER|;LAYER_CHANGE)"
+    rb"|; ?Z_HEIGHT: ?(?P<z>[-\d.]+)|;Z: ?(?P<z2>[-\d.]+)"
+    rb"|; start printing object, unique label id: ?(?P<start_id>\d+)"
+    rb"|; stop printing object, unique label id: ?(?P<stop_id>\d+)"
+    rb"|; printing object (?P<start_name>[^\r\n]+)"
+    rb"|; stop printing object (?P<stop_name>[^\r\n]+)"
+    rb"|EXCLUDE_OBJECT_START NAME=(?P<start_klipper>\S+)"
+    rb"|EXCLUDE_OBJECT_END(?: NAME=(?P<stop_klipper>\S+))?"
+    rb"|M73 P(?P<percent>\d+)"
+    rb"|M8(?P<e_mode>[23])\b"
+    rb")"
+)
+# 以换行开头的字面前缀让正则引擎快速跳过非行首位置，比 ^ + MULTILINE 快数倍
+_EVENT_RE = re.compile(rb"\n" + _EVENT_BODY)
+_FIRST_EVENT_RE = re.compile(_EVENT_BODY)
+# 挤出量 (相对挤出下逐行累加)
+_EXTRUDE_RE = re.compile(rb"^G[0-3] [^E;\n]*E(-?[\d.]+)", re.M)
+# 文件头中的总耗材长度
+_HEADER_FILAMENT_RE = re.compile(rb"; total filament length \[mm\] ?: ?([\d.]+(?:, ?[\d.]+)*)")
+
+
+@dataclass
+class ObjectSpan:
+    """对象在文件中的一段 (通常每层一段)"""
+    label: str
+    start: int          # 字节偏移
+    end: int
+    start_line: int     # 行号 (从 0 开始)
+    end_line: int
+    layer: int
+
+
+@dataclass
+class GcodeIndex:
+    """G-code 文件的层索引"""
+    path: str
+    size: int
+    mtime_ns: int
+    lines: int
+    layer_offsets: np.ndarray           # 每层起始字节偏移 (uint64)
+    layer_lines: np.ndarray             # 每层起始行号 (uint64)
+    layer_z: np.ndarray                 # 每层高度 (float64，未知为 nan)
+    layer_filament: np.ndarray          # 每层开始前累计耗材 mm，末尾为总量 (长度 = 层数 + 1)
+    line_offsets: np.ndarray            # 第 k * LINE_STRIDE 行的行首偏移 (uint64)
+    percent_offsets: np.ndarray         # M73 P0..P100 首次出现的偏移，缺失为 -1 (int64)
+    object_labels: List[str] = field(default_factory=list)
+    object_starts: np.ndarray = field(default_factory=lambda: np.zeros(0, np.uint64))
+    object_ends: np.ndarray = field(default_factory=lambda: np.zeros(0, np.uint64))
+    object_lines: np.ndarray = field(default_factory=lambda: np.zeros((0, 2), np.uint64))
+    object_ids: np.ndarray = field(default_factory=lambda: np.zeros(0, np.uint32))
+    header_filament: Optional[float] = None
+    relative_e: bool = True
+
+    # ========================================
+    # 汇总
+    # ========================================
+
+    @property
+    def layer_count(self) -> int:
+        return int(self.layer_offsets.size)
+
+    @property
+    def filament_mm(self) -> float:
+        """总耗材长度 (mm)；绝对挤出时取文件头中的值"""
+        if not self.relative_e and self.header_filament is not None:
+            return self.header_filament
+        return float(self.layer_filament[-1])
+
+    @property
+    def objects(self) -> List[str]:
+        return list(self.object_labels)
+
+    # ========================================
+    # 层
+    # ========================================
+
+    def layer_at(self, offset: int) -> int:
+        """偏移所在的层 (从 0 开始)，首层之前为 -1"""
+        return int(np.searchsorted(self.layer_offsets, offset, side="right")) - 1
+
+    def layer_range(self, layer: int) -> Tuple[int, int]:
+        """某层的字节范围 [start, end)"""
+        if not 0 <= layer < self.layer_count:
+            raise IndexError(f"层号超出范围: {layer} (共 {self.layer_count} 层)")
+        end = int(self.layer_offsets[layer + 1]) if layer + 1 < self.layer_count else self.size
+        return int(self.layer_offsets[layer]), end
+
+    def offset_for_layer_num(self, layer_num: int) -> int:
+        """打印机上报的 layer_num (从 1 开始) 对应的字节偏移"""
+        layer = min(max(layer_num, 1), self.layer_count) - 1
+        return self.layer_range(layer)[0] if self.layer_count else 0
+
+    def filament_until(self, layer: int) -> float:
+        """打印到某层开始前用掉的耗材 (mm)"""
+        layer = min(max(layer, 0), self.layer_count)
+        return float(self.layer_filament[layer])
+
+    # ========================================
+    # 进度
+    # ========================================
+
+    def offset_for_percent(self, percent: float) -> int:
+        """mc_percent 对应的字节偏移；文件没有 M73 进度时按字节比例估算"""
+        percent = min(max(percent, 0.0), 100.0)
+        known = np.flatnonzero(self.percent_offsets >= 0)
+        if known.size == 0:
+            return int(self.size * percent / 100.0)
+        # 取不超过 percent 的最近一个 M73
+        i = int(np.searchsorted(known, int(percent), side="right")) - 1
+        return int(self.percent_offsets[known[max(i, 0)]])
+
+    def layer_for_percent(self, percent: float) -> int:
+        return self.layer_at(self.offset_for_percent(percent))
+
+    # ========================================
+    # 行
+    # ========================================
+
+    def _mapped(self):
+        return MappedFile(self.path)
+
+    def line_at(self, offset: int) -> int:
+        """偏移所在的行号 (从 0 开始)"""
+        k = int(np.searchsorted(self.line_offsets, offset, side="right")) - 1
+        start = int(self.line_offsets[k])
+        with self._mapped() as mm:
+            return k * LINE_STRIDE + mm[start:offset].count(b"\n")
+
+    def offset_of_line(self, line: int) -> int:
+        """行号对应的行首偏移"""
+        if not 0 <= line < max(self.lines, 1):
+            raise IndexError(f"行号超出范围: {line} (共 {self.lines} 行)")
+        k, rest = divmod(line, LINE_STRIDE)
+        offset = int(self.line_offsets[k])
+        with self._mapped() as mm:
+            for _ in range(rest):
+                offset = mm.find(b"\n", offset) + 1
+        return offset
+
+    def read_layer(self, layer: int) -> bytes:
+        """读取一层的 G-code"""
+        start, end = self.layer_range(layer)
+        with self._mapped() as mm:
+            return mm[start:end]
+
+    # ========================================
+    # 对象
+    # ========================================
+
+    def object_spans(self, label: Optional[str] = None) -> List[ObjectSpan]:
+        """对象的各段 (行范围)，label 为 None 时返回全部"""
+        spans = []
+        for i in range(self.object_ids.size):
+            name = self.object_labels[int(self.object_ids[i])]
+            if label is not None and name != label:
+                continue
+            start = int(self.object_starts[i])
+            spans.append(ObjectSpan(
+                name, start, int(self.object_ends[i]),
+                int(self.object_lines[i, 0]), int(self.object_lines[i, 1]),
+                self.layer_at(start)
+            ))
+        return spans
+
+    def object_at(self, offset: int) -> Optional[str]:
+        """偏移处正在打印的对象"""
+        i = int(np.searchsorted(self.object_starts, offset, side="right")) - 1
+        if i < 0 or offset >= int(self.object_ends[i]):
+            return None
+        return self.object_labels[int(self.object_ids[i])]
+
+    # ========================================
+    # 持久化
+    # ========================================
+
+    def save(self, index_path: Optional[str] = None) -> bool:
+        """保存到文件旁 (先写临时文件再替换)"""
+        index_path = index_path or self.path + INDEX_SUFFIX
+        meta = {
+            "version": INDEX_VERSION,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "lines": self.lines,
+            "labels": self.object_labels,
+            "header_filament": self.header_filament,
+            "relative_e": self.relative_e,
+        }
+        tmp = index_path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(
+                    f,
+                    meta=np.frombuffer(json.dumps(meta).encode(), np.uint8),
+                    layer_offsets=self.layer_offsets,
+                    layer_lines=self.layer_lines,
+                    layer_z=self.layer_z,
+                    layer_filament=self.layer_filament,
+                    line_offsets=self.line_offsets,
+                    percent_offsets=self.percent_offsets,
+                    object_starts=self.object_starts,
+                    object_ends=self.object_ends,
+                    object_lines=self.object_lines,
+                    object_ids=self.object_ids,
+                )
+            os.replace(tmp, index_path)
+            return True
+        except OSError as e:
+            print(f"保存索引失败: {e}")
+            return False
+
+    @classmethod
+    def load(cls, path: str, index_path: Optional[str] = None) -> Optional["GcodeIndex"]:
+        """读取索引；不存在、版本不符或源文件已变化时返回 None"""
+        index_path = index_path or path + INDEX_SUFFIX
+        try:
+            st = os.stat(path)
+            with np.load(index_path) as data:
+                meta = json.loads(data["meta"].tobytes())
+                if (meta.get("version") != INDEX_VERSION or meta["size"] != st.st_size
+                        or meta["mtime_ns"] != st.st_mtime_ns):
+                    return None
+                arrays = {name: data[name] for name in data.files if name != "meta"}
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return cls(
+            path=path,
+            size=meta["size"],
+            mtime_ns=meta["mtime_ns"],
+            lines=meta["lines"],
+            object_labels=meta["labels"],
+            header_filament=meta["header_filament"],
+            relative_e=meta["relative_e"],
+            **arrays
+        )
+
+
+class MappedFile:
+    """只读 mmap (空文件映射为空字节串)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._mm = None
+
+    def __enter__(self):
+        self._file = open(self.path, "rb")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            return b""
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+
+def _chunk_end(mm, start: int, size: int) -> int:
+    """块结束位置 (对齐到下一行行首)"""
+    end = start + SCAN_CHUNK
+    if end >= size:
+        return size
+    newline = mm.find(b"\n", end)
+    return size if newline < 0 else newline + 1
+
+
+def _events(mm, start: int, end: int) -> Iterator[Tuple[int, "re.Match"]]:
+    """块内的事件 (行首偏移, 匹配)"""
+    if start == 0:
+        first = _FIRST_EVENT_RE.match(mm, 0, end)
+        if first:
+            yield 0, first
+    for match in _EVENT_RE.finditer(mm, max(start - 1, 0), end):
+        yield match.start() + 1, match
+
+
+def build_index(path: str) -> GcodeIndex:
+    """扫描文件建立索引 (不保存)"""
+    st = os.stat(path)
+    size = st.st_size
+
+    layer_offsets: List[int] = []
+    layer_lines: List[int] = []
+    layer_z: List[float] = []
+    line_offsets: List[np.ndarray] = [np.zeros(1, np.uint64)]
+    percent_offsets = np.full(101, -1, np.int64)
+    labels: Dict[str, int] = {}
+    spans: List[list] = []          # [对象序号, 起始偏移, 结束偏移, 起始行, 结束行]
+    open_spans: Dict[str, list] = {}
+    relative_e = True
+    header_filament = None
+    lines = 0
+
+    with MappedFile(path) as mm:
+        header = _HEADER_FILAMENT_RE.search(mm, 0, min(size, 64 * 1024))
+        if header:
+            header_filament = sum(float(v) for v in header.group(1).split(b","))
+
+        start = 0
+        while start < size:
+            end = _chunk_end(mm, start, size)
+
+            # 向量化统计换行位置 (映射的零拷贝视图)
+            view = np.frombuffer(mm, np.uint8, count=end - start, offset=start)
+            newlines = np.flatnonzero(view == 10)
+            del view
+            line_numbers = lines + np.arange(1, newlines.size + 1, dtype=np.uint64)
+            marks = newlines[line_numbers % LINE_STRIDE == 0]
+            line_offsets.append((marks + start + 1).astype(np.uint64))
+
+            for offset, match in _events(mm, start, end):
+                kind = match.lastgroup
+                line = lines + int(np.searchsorted(newlines, offset - start))
+
+                if kind == "layer":
+                    layer_offsets.append(offset)
+                    layer_lines.append(line)
+                    layer_z.append(float("nan"))
+                elif kind in ("z", "z2"):
+                    if layer_z and np.isnan(layer_z[-1]):
+                        layer_z[-1] = float(match.group(kind))
+                elif kind in ("start_id", "start_name", "start_klipper"):
+                    label = match.group(kind).decode("utf-8", "replace").strip()
+                    index = labels.setdefault(label, len(labels))
+                    span = [index, offset, size, line, lines]
+                    open_spans[label] = span
+                    spans.append(span)
+                elif kind in ("stop_id", "stop_name", "stop_klipper") or kind is None:
+                    # kind 为 None: 不带 NAME 的 EXCLUDE_OBJECT_END
+                    value = match.group(kind) if kind else None
+                    label = value.decode("utf-8", "replace").strip() if value else None
+                    if label is None and open_spans:
+                        label = next(reversed(open_spans))
+                    span = open_spans.pop(label, None)
+                    if span is not None:
+                        span[2] = match.end()
+                        span[4] = line
+                elif kind == "percent":
+                    percent = int(match.group(kind))
+                    if percent <= 100 and percent_offsets[percent] < 0:
+                        percent_offsets[percent] = offset
+                elif kind == "e_mode":
+                    relative_e = match.group(kind) == b"3"
+
+            lines += int(newlines.size)
+            start = end
+
+        if size and not mm[size - 1:size] == b"\n":
+            lines += 1
+
+        # 每层耗材: 相对挤出下累加各段 E
+        bounds = [0] + layer_offsets + [size]
+        filament = [0.0]
+        for lo, hi in zip(bounds, bounds[1:]):
+            filament.append(filament[-1] + math.fsum(map(float, _EXTRUDE_RE.findall(mm, lo, hi))))
+
+    # 丢弃首层之前的累计点，layer_filament[i] 为第 i 层开始前的用量
+    layer_filament = np.array(filament[1:], np.float64)
+    for span in open_spans.values():
+        span[4] = lines
+
+    spans.sort(key=lambda s: s[1])
+    return GcodeIndex(
+        path=path,
+        size=size,
+        mtime_ns=st.st_mtime_ns,
+        lines=lines,
+        layer_offsets=np.array(layer_offsets, np.uint64),
+        layer_lines=np.array(layer_lines, np.uint64),
+        layer_z=np.array(layer_z, np.float64),
+        layer_filament=layer_filament,
+        line_offsets=np.concatenate(line_offsets),
+        percent_offsets=percent_offsets,
+        object_labels=sorted(labels, key=labels.get),
+        object_starts=np.array([s[1] for s in spans], np.uint64),
+        object_ends=np.array([s[2] for s in spans], np.uint64),
+        object_lines=np.array([[s[3], s[4]] for s in spans], np.uint64).reshape(-1, 2),
+        object_ids=np.array([s[0] for s in spans], np.uint32),
+        header_filament=header_filament,
+        relative_e=relative_e,
+    )
+
+
+def analyze(path: str, rebuild: bool = False, save: bool = True) -> GcodeIndex:
+    """
+    获取 G-code 文件的层索引: 文件旁的索引仍有效时直接读取，否则扫描一次并保存
+
+    Args:
+        path: G-code 文件路径
+        rebuild: 忽略已保存的索引
+        save: 扫描后保存索引 (目录不可写时只打印警告)
+    """
+    if not rebuild:
+        index = GcodeIndex.load(path)
+        if index is not None:
+            return index
+
+    index = build_index(path)
+    if save:
+        index.save()
+    return index
@@ -0,0 +1,187 @@
+"""
+延时摄影与录像批量收取
+通过目录列表发现打印机上新的视频文件，用连接池并发断点续传下载，
+校验大小后可删除远程文件；可对多台打印机定时运行，避免存储写满
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional
+
+from .ftp import BambuFTP, RemoteEntry
+from .ftp_pool import FTPPool
+
+# camera_timelapse / camera_record 写入的目录
+MEDIA_DIRS = ("/timelapse", "/ipcam")
+MEDIA_EXTENSIONS = (".mp4", ".avi", ".mov")
+
+
+@dataclass
+class HarvestReport:
+    """一次收取的结果"""
+    printer: str
+    found: List[RemoteEntry] = field(default_factory=list)
+    downloaded: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unverified: List[str] = field(default_factory=list)    # 远程大小未知，已下载但未校验 (不删除)
+    failed: List[str] = field(default_factory=list)
+    bytes: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.failed
+
+
+class MediaHarvester:
+    """单台打印机的视频收取器
+
+    Args:
+        dest_dir: 本地保存目录，文件保存为 <dest_dir>/<name>/<远程目录>/<文件名>
+        name: 打印机名称，默认为 IP
+        dirs: 要扫描的远程目录
+        pool_size: 并发下载会话数
+        delete_after: 下载并校验大小后删除远程文件
+        min_age: 只收取修改时间早于这么多秒的文件 (避免正在写入的录像)
+    """
+
+    def __init__(
+        self,
+        ip: str,
+        access_code: str,
+        dest_dir: str,
+        name: Optional[str] = None,
+        dirs: Iterable[str] = MEDIA_DIRS,
+        pool_size: int = 2,
+        delete_after: bool = False,
+        min_age: float = 120.0,
+        port: int = 990
+    ):
+        self.ip = ip
+        self.access_code = access_code
+        self.port = port
+        self.name = name or ip
+        self.dest_dir = dest_dir
+        self.dirs = tuple(dirs)
+        self.pool_size = pool_size
+        self.delete_after = delete_after
+        self.min_age = min_age
+
+    def local_path(self, entry: RemoteEntry) -> str:
+        return os.path.join(self.dest_dir, self.name, *entry.path.strip("/").split("/"))
+
+    def discover(self, ftp: BambuFTP) -> List[RemoteEntry]:
+        """列出尚未收取的视频文件"""
+        cutoff = time.time() - self.min_age
+        found = []
+        for directory in self.dirs:
+            for _, _, files in ftp.walk(directory, refresh=True):
+                for entry in files:
+                    if not entry.name.lower().endswith(MEDIA_EXTENSIONS):
+                        continue
+                    if entry.mtime is not None and entry.mtime > cutoff:
+                        continue
+                    local = self.local_path(entry)
+                    if os.path.exists(local) and entry.size in (-1, os.path.getsize(local)):
+                        # 已收取 (上次下载后没有删除远程文件)；远程大小未知时以本地文件存在为准，
+                        # 下载先写入 .part，完成后才改名，存在的本地文件都是完整的
+                        continue
+                    found.append(entry)
+        return found
+
+    def harvest(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> HarvestReport:
+        """
+        收取一次: 发现、并发下载、校验大小、按需删除
+
+        Args:
+            progress_callback: 汇总下载进度回调 (已下载字节, 总字节)
+        """
+        report = HarvestReport(self.name)
+        start = time.monotonic()
+
+        ftp = BambuFTP(self.ip, self.access_code, port=self.port)
+        if not ftp.connect():
+            report.error = "FTP 连接失败"
+            return report
+
+        try:
+            report.found = self.discover(ftp)
+            if not report.found:
+                return report
+
+            for entry in report.found:
+                os.makedirs(os.path.dirname(self.local_path(entry)), exist_ok=True)
+
+            with FTPPool(self.ip, self.access_code, self.pool_size, self.port) as pool:
+                transfers = pool.download_many(
+                    [(e.path, self.local_path(e)) for e in report.found],
+                    progress_callback,
+                    resumable=True
+                )
+
+            for entry, result in zip(report.found, transfers.results):
+                local = self.local_path(entry)
+                if not result.ok or not os.path.exists(local):
+                    print(f"收取失败: {entry.path}")
+                    report.failed.append(entry.path)
+                    continue
+
+                size = os.path.getsize(local)
+                expected = entry.size if entry.size >= 0 else ftp.get_size(entry.path)
+                if expected >= 0 and size != expected:
+                    print(f"收取失败: {entry.path} (大小校验不通过)")
+                    report.failed.append(entry.path)
+                    continue
+
+                report.downloaded.append(local)
+                report.bytes += size
+                if expected < 0:
+                    # 无法取得远程大小: 保留远程文件，下次再校验
+                    print(f"未校验: {entry.path} (远程大小未知)")
+                    report.unverified.append(entry.path)
+                elif self.delete_after and ftp.delete_file(entry.path):
+                    report.deleted.append(entry.path)
+
+        finally:
+            ftp.disconnect()
+            report.elapsed = time.monotonic() - start
+
+        print(
+            f"[{self.name}] 收取 {len(report.downloaded)}/{len(report.found)} 个文件, "
+            f"{report.bytes} 字节, 删除 {len(report.deleted)} 个"
+        )
+        return report
+
+
+def harvest_fleet(harvesters: Iterable[MediaHarvester], max_parallel: int = 2) -> List[HarvestReport]:
+    """对多台打印机各收取一次，最多 max_parallel 台同时进行"""
+    harvesters = list(harvesters)
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+        return list(executor.map(lambda h: h.harvest(), harvesters))
+
+
+def run_periodic(
+    harvesters: Iterable[MediaHarvester],
+    interval: float = 600.0,
+    max_parallel: int = 2,
+    stop_event: Optional[threading.Event] = None,
+    on_reports: Optional[Callable[[List[HarvestReport]], None]] = None
+):
+    """
+    定时对整个打印机群收取，直到 stop_event 被设置
+
+    Args:
+        interval: 两轮之间的间隔 (秒，从上一轮结束算起)
+        on_reports: 每轮结束后的回调
+    """
+    harvesters = list(harvesters)
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        reports = harvest_fleet(harvesters, max_parallel)
+        if on_reports:
+            on_reports(reports)
+        stop_event.wait(interval)
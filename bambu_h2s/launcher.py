@@ -0,0 +1,277 @@
+"""
+上传与预热并行的任务启动
+从文件头部读取首层目标温度，上传的同时把热床和喷嘴加热到位，
+两者都完成后立即开始打印，并报告相对 "先上传、再加热" 节省的时间
+"""
+
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional
+
+from .commands import BambuCommands
+from .threemf import ThreeMFReader
+
+if TYPE_CHECKING:
+    from .client import BambuClient
+    from .ftp import BambuFTP
+
+# 首层开始的标记 (之后的温度命令不再是预热目标)
+_LAYER_MARKERS = (b"CHANGE_LAYER", b"LAYER_CHANGE", b"layer num/total_layer_count: 1/")
+_TEMP_RE = re.compile(rb"^\s*M(104|109|140|190)\b([^;]*)")
+_WORD_RE = re.compile(rb"([STH])\s*(-?\d+(?:\.\d*)?)")
+# 挤出机序号范围 (set_nozzle_temp 的 extruder_index)
+_EXTRUDERS = range(2)
+
+# 打印机正在执行任务，不能启动新任务
+_BUSY_STATES = ("PREPARE", "SLICING", "RUNNING", "PAUSE")
+
+
+@dataclass
+class JobTemperatures:
+    """任务首层目标温度 (读不到时为 None)"""
+    bed: Optional[int] = None
+    nozzles: Dict[int, int] = field(default_factory=dict)   # 挤出机序号 -> 温度
+
+    @property
+    def empty(self) -> bool:
+        return self.bed is None and not self.nozzles
+
+
+def _scan_temperatures(f: Iterable[bytes], max_bytes: int) -> JobTemperatures:
+    """
+    扫描首层之前的 M104/M109/M140/M190，取每个加热器最后设定的非零温度
+
+    挤出机序号只取自温度命令的 T/H 参数 (默认 0)；Bambu G-code 中单独的 T<n>
+    是 AMS 槽位而不是挤出机，不能用来推断。超出挤出机范围的设定忽略
+    """
+    temps = JobTemperatures()
+    read = 0
+    for line in f:
+        read += len(line)
+        if read > max_bytes or any(marker in line for marker in _LAYER_MARKERS):
+            break
+        match = _TEMP_RE.match(line)
+        if not match:
+            continue
+        words = {k.decode(): float(v) for k, v in _WORD_RE.findall(match.group(2))}
+        value = int(words.get("S", 0))
+        if value <= 0:
+            continue
+        if match.group(1) in (b"140", b"190"):
+            temps.bed = value
+        else:
+            extruder = int(words.get("T", words.get("H", 0)))
+            if extruder in _EXTRUDERS:
+                temps.nozzles[extruder] = value
+    return temps
+
+
+def read_temperatures(path: str, plate: int = 1, max_bytes: int = 8 * 1024 * 1024) -> JobTemperatures:
+    """
+    读取 G-code 或 3MF (Metadata/plate_N.gcode) 的首层目标温度
+
+    只读取文件开头到首层开始 (最多 max_bytes)，3MF 从压缩包中流式读取
+    """
+    if zipfile.is_zipfile(path):
+        with ThreeMFReader(path) as project, project.open(project.plate(plate).gcode) as f:
+            return _scan_temperatures(f, max_bytes)
+
+    with open(path, "rb") as f:
+        return _scan_temperatures(f, max_bytes)
+
+
+@dataclass
+class LaunchReport:
+    """一次启动的结果"""
+    local_path: str
+    remote_path: Optional[str] = None
+    temperatures: JobTemperatures = field(default_factory=JobTemperatures)
+    upload_time: float = 0.0
+    preheat_time: float = 0.0       # 发出加热命令到温度到位
+    preheat_reached: bool = False
+    elapsed: float = 0.0            # 开始到发出打印命令
+    started: bool = False
+    error: Optional[str] = None
+
+    @property
+    def serial_time(self) -> float:
+        """先上传、再加热所需的时间"""
+        return self.upload_time + self.preheat_time
+
+    @property
+    def time_saved(self) -> float:
+        return max(0.0, self.serial_time - self.elapsed)
+
+
+class JobLauncher:
+    """上传与预热并行的任务启动器
+
+    Args:
+        client: 已连接的 BambuClient
+        ftp: 已连接的 BambuFTP
+        tolerance: 当前温度距目标多少度以内算到位
+        preheat_timeout: 等待加热到位的最长秒数，超时后仍然开始打印 (由打印机自己加热)
+    """
+
+    def __init__(
+        self,
+        client: "BambuClient",
+        ftp: "BambuFTP",
+        tolerance: float = 3.0,
+        preheat_timeout: float = 900.0
+    ):
+        self.client = client
+        self.ftp = ftp
+        self.commands = BambuCommands(client)
+        self.tolerance = tolerance
+        self.preheat_timeout = preheat_timeout
+        self._cond = threading.Condition()
+
+    # ========================================
+    # 预热
+    # ========================================
+
+    def _on_state(self, diff: Dict[str, Any]):
+        with self._cond:
+            self._cond.notify_all()
+
+    def _reached(self, temps: JobTemperatures) -> bool:
+        state = self.client.state
+        if temps.bed is not None and float(state.get("bed_temper", 0)) < temps.bed - self.tolerance:
+            return False
+        # 状态中只有主挤出机的温度
+        nozzle = temps.nozzles.get(0)
+        if nozzle is not None and float(state.get("nozzle_temper", 0)) < nozzle - self.tolerance:
+            return False
+        return True
+
+    def preheat(
+        self,
+        temps: JobTemperatures,
+        timeout: Optional[float] = None,
+        abort: Optional[Callable[[], bool]] = None
+    ) -> bool:
+        """发出加热命令并等待到位，返回是否在超时前到位；abort() 为真时提前返回 False"""
+        if temps.bed is not None:
+            self.commands.set_bed_temp(temps.bed)
+        for index, temp in sorted(temps.nozzles.items()):
+            self.commands.set_nozzle_temp(temp, extruder_index=index)
+
+        deadline = time.monotonic() + (self.preheat_timeout if timeout is None else timeout)
+        self.client.add_state_listener(self._on_state)
+        try:
+            with self._cond:
+                while not self._reached(temps):
+                    if abort is not None and abort():
+                        return False
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(min(remaining, 1.0))
+            return True
+        finally:
+            self.client.remove_state_listener(self._on_state)
+
+    # ========================================
+    # 启动
+    # ========================================
+
+    def cool_down(self, temps: JobTemperatures):
+        """关闭预热过的加热器"""
+        if temps.bed is not None:
+            self.commands.set_bed_temp(0)
+        for index in sorted(temps.nozzles):
+            self.commands.set_nozzle_temp(0, extruder_index=index)
+
+    def _start(self, remote_path: str, plate: int, start_options: Dict[str, Any]):
+        if remote_path.lower().endswith(".3mf"):
+            self.commands.project_file(remote_path, plate=plate, **start_options)
+        else:
+            self.commands.gcode_file(remote_path)
+
+    def launch(
+        self,
+        local_path: str,
+        remote_path: Optional[str] = None,
+        plate: int = 1,
+        preheat: bool = True,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        **start_options: Any
+    ) -> LaunchReport:
+        """
+        上传并开始打印，上传期间预热
+
+        Args:
+            local_path: 本地 G-code 或 3MF 文件
+            remote_path: 远程路径 (默认为 /cache/<文件名>)
+            plate: 3MF 的盘号
+            preheat: 为 False 时不预热，只上传后启动
+            progress_callback: 上传进度回调 (已上传字节, 总字节)
+            start_options: 传给 project_file 的其他参数 (use_ams、ams_mapping、timelapse 等)
+        """
+        report = LaunchReport(local_path)
+        if not os.path.exists(local_path):
+            report.error = f"文件不存在: {local_path}"
+            print(report.error)
+            return report
+
+        if self.client.state.get("gcode_state") in _BUSY_STATES:
+            report.error = f"打印机正忙: {self.client.state['gcode_state']}"
+            print(report.error)
+            return report
+
+        remote_path = remote_path or f"/cache/{os.path.basename(local_path)}"
+        if preheat:
+            report.temperatures = read_temperatures(local_path, plate)
+
+        start = time.monotonic()
+        failed = threading.Event()
+
+        def upload() -> bool:
+            ok = self.ftp.upload_file(local_path, remote_path, progress_callback)
+            report.upload_time = time.monotonic() - start
+            if not ok:
+                # 唤醒预热等待，不再等温度
+                failed.set()
+                with self._cond:
+                    self._cond.notify_all()
+            return ok
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            uploading = executor.submit(upload)
+            try:
+                if preheat and not report.temperatures.empty:
+                    report.preheat_reached = self.preheat(report.temperatures, abort=failed.is_set)
+                    report.preheat_time = time.monotonic() - start
+            except BaseException:
+                # 预热出错时不留下后台上传: 等上传线程结束、关闭加热器后再抛出
+                uploading.cancel()
+                wait([uploading])
+                try:
+                    self.cool_down(report.temperatures)
+                except Exception:
+                    pass
+                raise
+            uploaded = uploading.result()
+
+        if not uploaded:
+            report.error = "上传失败"
+            if preheat:
+                self.cool_down(report.temperatures)
+            return report
+
+        report.remote_path = remote_path
+        self._start(remote_path, plate, start_options)
+        report.elapsed = time.monotonic() - start
+        report.started = True
+
+        print(
+            f"已开始打印: {remote_path} (上传 {report.upload_time:.1f}s, 预热 {report.preheat_time:.1f}s, "
+            f"用时 {report.elapsed:.1f}s, 节省 {report.time_saved:.1f}s)"
+        )
+        return report
@@ -0,0 +1,269 @@
+"""
+G-code 运动时间估算
+解析 G0/G1/G2/G3 运动，按加速度受限的梯形速度曲线在 NumPy 数组上批量计算每段耗时
+单行和上百万段的文件走同一条向量化路径，可用于精确等待和任务 ETA
+
+依赖 numpy
+"""
+
+import math
+from array import array
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+# 轴顺序
+_AXES = "XYZE"
+
+
+@dataclass
+class MotionEstimate:
+    """运动时间估算结果"""
+    durations: np.ndarray                 # 每段运动秒数
+    dwell: float = 0.0                    # G4 暂停总秒数
+    position: tuple = (0.0, 0.0, 0.0, 0.0)   # 结束位置 (X, Y, Z, E)
+    feedrate: float = 0.0                 # 结束时的进给速度 (mm/s)
+
+    @property
+    def total(self) -> float:
+        """总秒数 (运动 + 暂停)"""
+        return float(self.durations.sum()) + self.dwell
+
+    @property
+    def moves(self) -> int:
+        return int(self.durations.size)
+
+
+@dataclass
+class _ParseState:
+    position: list = field(default_factory=lambda: [0.0, 0.0, 0.0, 0.0])
+    feedrate: float = 50.0
+    absolute: bool = True
+    absolute_e: bool = True
+    dwell: float = 0.0
+
+
+class MotionEstimator:
+    """运动时间估算器
+
+    Args:
+        max_accel: 最大加速度 (mm/s²)
+        max_velocity: 最大速度 (mm/s)，超过的 F 值被截断
+        junction_deviation: 拐角偏差 (mm)，决定拐角处可保持的速度
+        default_feedrate: 未指定 F 时的进给速度 (mm/s)
+        arc_segment: 圆弧离散化的弦长 (mm)
+    """
+
+    def __init__(
+        self,
+        max_accel: float = 10000.0,
+        max_velocity: float = 500.0,
+        junction_deviation: float = 0.05,
+        default_feedrate: float = 50.0,
+        arc_segment: float = 1.0
+    ):
+        if max_accel <= 0 or max_velocity <= 0:
+            raise ValueError("max_accel 和 max_velocity 必须 > 0")
+        self.max_accel = max_accel
+        self.max_velocity = max_velocity
+        self.junction_deviation = junction_deviation
+        self.default_feedrate = default_feedrate
+        self.arc_segment = arc_segment
+
+    # ========================================
+    # 解析
+    # ========================================
+
+    def _parse(self, lines: Iterable[str], state: _ParseState, points: array, feeds: array):
+        """把运动展开为目标点序列 (points 每 4 个数一组) 和对应进给速度"""
+        pos = state.position
+        for raw in lines:
+            line = raw.split(";", 1)[0].strip().upper()
+            if not line:
+                continue
+
+            words = line.split()
+            code = words[0]
+            params = {}
+            for word in words[1:]:
+                try:
+                    params[word[0]] = float(word[1:])
+                except (ValueError, IndexError):
+                    pass
+
+            if code in ("G0", "G1", "G00", "G01", "G2", "G3", "G02", "G03"):
+                if "F" in params:
+                    state.feedrate = params["F"] / 60.0
+                target = list(pos)
+                for i, axis in enumerate(_AXES):
+                    if axis in params:
+                        absolute = state.absolute_e if axis == "E" else state.absolute
+                        target[i] = params[axis] if absolute else pos[i] + params[axis]
+
+                if code in ("G0", "G1", "G00", "G01"):
+                    points.extend(target)
+                    feeds.append(state.feedrate)
+                else:
+                    self._expand_arc(code in ("G2", "G02"), pos, target, params, state.feedrate, points, feeds)
+                pos[:] = target
+
+            elif code == "G90":
+                state.absolute = state.absolute_e = True
+            elif code == "G91":
+                state.absolute = state.absolute_e = False
+            elif code == "M82":
+                state.absolute_e = True
+            elif code == "M83":
+                state.absolute_e = False
+            elif code == "G92":
+                for i, axis in enumerate(_AXES):
+                    if axis in params:
+                        pos[i] = params[axis]
+                self._rebase(pos, points, feeds)
+            elif code == "G28":
+                # 回原点耗时取决于机器，不计入；被回零的轴位置归零 (轴参数可不带数值，如 G28 X)
+                axes = {word[0] for word in words[1:]}
+                homed = [i for i, axis in enumerate("XYZ") if axis in axes] or [0, 1, 2]
+                for i in homed:
+                    pos[i] = 0.0
+                self._rebase(pos, points, feeds)
+            elif code == "G4":
+                state.dwell += params.get("P", 0.0) / 1000.0 + params.get("S", 0.0)
+
+    @staticmethod
+    def _rebase(pos, points, feeds):
+        """位置被重设 (不是运动)：以新位置开始新的运动链，这一段不计时"""
+        points.extend(pos)
+        feeds.append(math.nan)
+
+    def _expand_arc(self, clockwise, start, target, params, feedrate, points, feeds):
+        """把 G2/G3 圆弧 (I/J 圆心格式) 离散为短直线"""
+        cx = start[0] + params.get("I", 0.0)
+        cy = start[1] + params.get("J", 0.0)
+        radius = math.hypot(start[0] - cx, start[1] - cy)
+        a0 = math.atan2(start[1] - cy, start[0] - cx)
+        a1 = math.atan2(target[1] - cy, target[0] - cx)
+        sweep = a1 - a0
+        if clockwise and sweep >= 0:
+            sweep -= 2 * math.pi
+        elif not clockwise and sweep <= 0:
+            sweep += 2 * math.pi
+
+        segments = max(1, int(abs(sweep) * radius / self.arc_segment))
+        for k in range(1, segments + 1):
+            t = k / segments
+            angle = a0 + sweep * t
+            points.extend((
+                cx + radius * math.cos(angle),
+                cy + radius * math.sin(angle),
+                start[2] + (target[2] - start[2]) * t,
+                start[3] + (target[3] - start[3]) * t
+            ))
+            feeds.append(feedrate)
+        # 终点以指令为准，避免浮点误差累积
+        points[-4:] = array("d", target)
+
+    # ========================================
+    # 计算
+    # ========================================
+
+    def durations(self, points: np.ndarray, feeds: np.ndarray) -> np.ndarray:
+        """
+        计算每段运动耗时
+
+        Args:
+            points: (N+1, 4) 位置序列，第 0 行为起点
+            feeds: (N,) 每段的目标速度 (mm/s)；NaN 表示位置重设 (G92/G28)，
+                该段不计时，前后的运动从静止开始、到静止结束
+        """
+        delta = np.diff(points, axis=0)
+        dist = np.sqrt(np.einsum("ij,ij->i", delta[:, :3], delta[:, :3]))
+        # 仅挤出机运动按 E 计算距离
+        e_only = dist == 0
+        dist = np.where(e_only, np.abs(delta[:, 3]), dist)
+
+        times = np.zeros(dist.size)
+        rebase = np.isnan(feeds)
+        moving = (dist > 0) & ~rebase
+        if not moving.any():
+            return times
+
+        d = dist[moving]
+        a = self.max_accel
+        v = np.minimum(np.maximum(feeds[moving], 1e-3), self.max_velocity)
+
+        # 拐角速度：由相邻两段方向夹角按拐角偏差模型计算
+        unit = delta[moving, :3] / d[:, None]
+        cos_theta = np.clip(-np.einsum("ij,ij->i", unit[:-1], unit[1:]), -1.0, 1.0)
+        sin_half = np.sqrt(np.maximum((1.0 - cos_theta) / 2.0, 0.0))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            radius = self.junction_deviation * sin_half / (1.0 - sin_half)
+        junction = np.sqrt(np.maximum(a * radius, 0.0))
+        junction = np.where(sin_half >= 1.0 - 1e-9, np.inf, junction)
+        # 不超过前后两段的速度，且在两段内都能加减速到达
+        junction = np.minimum.reduce([
+            junction,
+            v[:-1],
+            v[1:],
+            np.sqrt(a * np.minimum(d[:-1], d[1:]))
+        ])
+        # 两段之间有位置重设时不连续
+        resets = np.cumsum(rebase)[moving]
+        junction = np.where(resets[1:] != resets[:-1], 0.0, junction)
+
+        entry = np.concatenate(([0.0], junction))
+        leave = np.concatenate((junction, [0.0]))
+
+        # 梯形速度曲线；距离不足以达到巡航速度时为三角形
+        accel_dist = (v ** 2 - entry ** 2) / (2 * a)
+        decel_dist = (v ** 2 - leave ** 2) / (2 * a)
+        cruise = d - accel_dist - decel_dist
+        peak = np.sqrt(np.maximum((2 * a * d + entry ** 2 + leave ** 2) / 2, 0.0))
+        peak = np.where(cruise >= 0, v, np.minimum(peak, v))
+        cruise_time = np.where(cruise >= 0, cruise / v, 0.0)
+
+        times[moving] = (peak - entry) / a + (peak - leave) / a + cruise_time
+        return times
+
+    def estimate_lines(
+        self,
+        lines: Iterable[str],
+        position: Optional[Sequence[float]] = None,
+        feedrate: Optional[float] = None
+    ) -> MotionEstimate:
+        """
+        估算一组 G-code 行的运动时间
+
+        Args:
+            lines: G-code 行
+            position: 起点 (X, Y, Z[, E])，默认为原点
+            feedrate: 起始进给速度 (mm/s)
+        """
+        state = _ParseState(feedrate=feedrate or self.default_feedrate)
+        if position is not None:
+            state.position[:len(position)] = [float(p) for p in position]
+
+        points = array("d", state.position)
+        feeds = array("d")
+        self._parse(lines, state, points, feeds)
+
+        durations = self.durations(
+            np.frombuffer(points, dtype=np.float64).reshape(-1, 4),
+            np.frombuffer(feeds, dtype=np.float64)
+        )
+        return MotionEstimate(durations, state.dwell, tuple(state.position), state.feedrate)
+
+    def estimate_line(
+        self,
+        gcode: str,
+        position: Optional[Sequence[float]] = None,
+        feedrate: Optional[float] = None
+    ) -> float:
+        """估算单行 (或换行分隔的多行) G-code 的秒数，从静止开始、到静止结束"""
+        return self.estimate_lines(gcode.splitlines(), position, feedrate).total
+
+    def estimate_file(self, path: Union[str, bytes]) -> MotionEstimate:
+        """估算 G-code 文件的运动时间 (逐行读取)"""
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return self.estimate_lines(f)
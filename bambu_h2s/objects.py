@@ -0,0 +1,237 @@
+"""
+skip_objects 的对象 ID 索引
+从切片文件中提取打印机使用的对象 ID、名称和包围盒:
+3MF 经 ThreeMFReader 流式读取 Metadata/slice_info.config 和 plate_N.json (不解压整个文件)，
+G-code 由层索引的对象标签 (unique label id) 和各段运动坐标得到；
+结果按文件内容哈希缓存，打印中可按名称或位置立即找到要跳过的对象
+"""
+
+import json
+import math
+import os
+import re
+import zipfile
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+from .threemf import ThreeMFReader
+from .upload_cache import UploadCache, file_digest
+
+if TYPE_CHECKING:
+    from .commands import BambuCommands
+
+# 默认缓存目录
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bambu_h2s", "objects")
+INDEX_VERSION = 1
+
+_X_RE = re.compile(rb"\nG[0-3] [^X;\n]*X(-?[\d.]+)")
+_Y_RE = re.compile(rb"\nG[0-3] [^Y;\n]*Y(-?[\d.]+)")
+
+BBox = Tuple[float, float, float, float]
+
+
+@dataclass
+class PrintObject:
+    """可跳过的打印对象"""
+    id: int
+    name: str
+    bbox: Optional[BBox] = None     # (x0, y0, x1, y1)，热床坐标 mm
+
+    @property
+    def center(self) -> Optional[Tuple[float, float]]:
+        if self.bbox is None:
+            return None
+        x0, y0, x1, y1 = self.bbox
+        return (x0 + x1) / 2, (y0 + y1) / 2
+
+    def contains(self, x: float, y: float, margin: float = 0.0) -> bool:
+        if self.bbox is None:
+            return False
+        x0, y0, x1, y1 = self.bbox
+        return x0 - margin <= x <= x1 + margin and y0 - margin <= y <= y1 + margin
+
+
+@dataclass
+class ObjectIndex:
+    """一个切片文件 (某一盘) 的对象索引"""
+    digest: str
+    plate: int
+    objects: List[PrintObject] = field(default_factory=list)
+
+    def get(self, object_id: int) -> Optional[PrintObject]:
+        for obj in self.objects:
+            if obj.id == object_id:
+                return obj
+        return None
+
+    def find(self, name: str) -> List[PrintObject]:
+        """按名称查找 (不区分大小写；没有完全相同的名称时按包含匹配)"""
+        key = name.lower()
+        exact = [o for o in self.objects if o.name.lower() == key]
+        return exact or [o for o in self.objects if key in o.name.lower()]
+
+    def at(self, x: float, y: float, margin: float = 2.0) -> List[PrintObject]:
+        """包围盒 (放宽 margin mm) 包含该点的对象，离中心近的在前"""
+        hits = [o for o in self.objects if o.contains(x, y, margin)]
+        return sorted(hits, key=lambda o: math.dist(o.center, (x, y)))
+
+    def nearest(self, x: float, y: float) -> Optional[PrintObject]:
+        """中心离该点最近的对象"""
+        placed = [o for o in self.objects if o.bbox is not None]
+        return min(placed, key=lambda o: math.dist(o.center, (x, y)), default=None)
+
+    def resolve(
+        self,
+        names: Iterable[str] = (),
+        points: Iterable[Tuple[float, float]] = (),
+        ids: Iterable[int] = ()
+    ) -> List[int]:
+        """把名称、位置和 ID 解析为去重后的对象 ID 列表；找不到时抛出 ValueError"""
+        result = []
+        for object_id in ids:
+            if self.get(object_id) is None:
+                raise ValueError(f"未知对象 ID: {object_id}")
+            result.append(object_id)
+        for name in names:
+            found = self.find(name)
+            if not found:
+                raise ValueError(f"没有名为 {name!r} 的对象")
+            if len(found) > 1:
+                raise ValueError(f"名称 {name!r} 匹配多个对象: {[o.name for o in found]}")
+            result.append(found[0].id)
+        for x, y in points:
+            found = self.at(x, y)
+            if not found:
+                raise ValueError(f"位置 ({x}, {y}) 没有对象")
+            result.append(found[0].id)
+        return list(dict.fromkeys(result))
+
+    def skip(
+        self,
+        commands: "BambuCommands",
+        names: Iterable[str] = (),
+        points: Iterable[Tuple[float, float]] = (),
+        ids: Iterable[int] = ()
+    ) -> List[int]:
+        """解析后发送 skip_objects，返回跳过的对象 ID"""
+        obj_list = self.resolve(names, points, ids)
+        if obj_list:
+            commands.skip_objects(obj_list)
+        return obj_list
+
+    # ========================================
+    # 序列化
+    # ========================================
+
+    def to_dict(self) -> dict:
+        return {"version": INDEX_VERSION, **asdict(self)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ObjectIndex":
+        objects = [
+            PrintObject(o["id"], o["name"], tuple(o["bbox"]) if o["bbox"] is not None else None)
+            for o in data["objects"]
+        ]
+        return cls(data["digest"], data["plate"], objects)
+
+
+# ========================================
+# 提取
+# ========================================
+
+def _objects_from_3mf(path: str, plate: int) -> List[PrintObject]:
+    """从 slice_info.config 和 plate_N.json 读取 (逐个成员流式读取)"""
+    with ThreeMFReader(path) as project:
+        if project.slice_info is None:
+            raise ValueError(f"3MF 未切片 (缺少 Metadata/slice_info.config): {path}")
+
+        element = project.plate_info(plate)
+        objects = []
+        for obj in [] if element is None else element.iter("object"):
+            # 旧版切片软件没有 identify_id，退回 id；两者都没有 (或不是数字) 时无法用于 skip_objects
+            try:
+                object_id = int(obj.get("identify_id", obj.get("id")))
+            except (TypeError, ValueError):
+                continue
+            objects.append(PrintObject(object_id, obj.get("name", "")))
+
+        boxes = {b["id"]: b for b in project.plate_layout(plate).get("bbox_objects", [])}
+        for obj in objects:
+            box = boxes.get(obj.id)
+            if box is not None:
+                obj.bbox = tuple(float(v) for v in box["bbox"])
+                obj.name = obj.name or box.get("name", "")
+    return objects
+
+
+def _objects_from_gcode(path: str) -> List[PrintObject]:
+    """由层索引的数字对象标签和各段 X/Y 坐标得到"""
+    from .gcode_index import MappedFile, analyze
+
+    index = analyze(path)
+    bounds = {}
+    with MappedFile(path) as mm:
+        for span in index.object_spans():
+            if not span.label.isdigit():
+                # 只有 Bambu 的 unique label id 能用于 skip_objects
+                continue
+            xs = _X_RE.findall(mm, span.start, span.end)
+            ys = _Y_RE.findall(mm, span.start, span.end)
+            box = bounds.setdefault(int(span.label), [math.inf, math.inf, -math.inf, -math.inf])
+            if xs:
+                values = list(map(float, xs))
+                box[0], box[2] = min(box[0], min(values)), max(box[2], max(values))
+            if ys:
+                values = list(map(float, ys))
+                box[1], box[3] = min(box[1], min(values)), max(box[3], max(values))
+
+    return [
+        PrintObject(object_id, f"object {object_id}", tuple(box) if math.isfinite(box[0] + box[1]) else None)
+        for object_id, box in sorted(bounds.items())
+    ]
+
+
+def index_objects(
+    path: str,
+    plate: int = 1,
+    cache: Optional[UploadCache] = None,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    refresh: bool = False
+) -> ObjectIndex:
+    """
+    获取切片文件的对象索引 (按内容哈希缓存)
+
+    Args:
+        path: 本地 .3mf 或 .gcode 文件 (与上传到打印机的是同一份)
+        plate: 3MF 的盘号
+        cache: 提供文件哈希 (按路径、大小、修改时间缓存)；不提供时直接计算哈希
+        cache_dir: 对象索引缓存目录
+        refresh: 忽略缓存重新提取
+    """
+    digest = cache.digest(path) if cache is not None else file_digest(path)
+    cache_path = os.path.join(cache_dir, f"{digest}-{plate}.json")
+
+    if not refresh:
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                return ObjectIndex.from_dict(data)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    if zipfile.is_zipfile(path):
+        objects = _objects_from_3mf(path, plate)
+    else:
+        objects = _objects_from_gcode(path)
+    index = ObjectIndex(digest, plate, objects)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = cache_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp, cache_path)
+    except OSError as e:
+        print(f"保存对象索引失败: {e}")
+    return index
@@ -0,0 +1,351 @@
+"""
+G-code 上传前预处理 (压缩)
+流式去掉注释 (保留打印机需要的元数据)、去掉冗余的模态字、按精度舍入坐标、
+合并共线移动，直接接入 FTP 上传，无需临时文件
+"""
+
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from .ftp import BambuFTP
+
+# 保留的注释 (打印机和后续分析依赖的元数据)
+DEFAULT_KEEP_COMMENTS = (
+    "HEADER_BLOCK",
+    "EXECUTABLE_BLOCK",
+    "CHANGE_LAYER",
+    "LAYER_CHANGE",
+    "Z_HEIGHT",
+    "LAYER_HEIGHT",
+    "layer num",
+    "start printing object",
+    "stop printing object",
+)
+
+
+@dataclass
+class MinifyStats:
+    """压缩统计"""
+    lines_in: int = 0
+    lines_out: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    merged_moves: int = 0
+    elapsed: float = 0.0
+    upload_time: float = 0.0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_in - self.bytes_out
+
+    @property
+    def ratio(self) -> float:
+        return self.bytes_out / self.bytes_in if self.bytes_in else 1.0
+
+    def time_saved(self, throughput: Optional[float] = None) -> float:
+        """按链路吞吐 (字节/秒) 估算节省的上传秒数，默认用实际上传吞吐"""
+        if throughput is None:
+            if not self.upload_time or not self.bytes_out:
+                return 0.0
+            throughput = self.bytes_out / self.upload_time
+        return self.bytes_saved / throughput
+
+
+class GcodeMinifier:
+    """G-code 流式压缩器
+
+    Args:
+        precision: X/Y/Z 保留小数位
+        e_precision: E 保留小数位
+        feed_precision: F 保留小数位
+        strip_comments: 去掉注释 (keep_comments 中的除外)
+        keep_comments: 保留包含这些关键字的注释行
+        drop_redundant: 去掉与当前值相同的 F 和绝对坐标
+        merge_collinear: 合并同向共线、挤出比例相同的连续 G1
+        tolerance: 共线判定的最大偏离 (mm)
+    """
+
+    def __init__(
+        self,
+        precision: int = 3,
+        e_precision: int = 5,
+        feed_precision: int = 0,
+        strip_comments: bool = True,
+        keep_comments: Iterable[str] = DEFAULT_KEEP_COMMENTS,
+        drop_redundant: bool = True,
+        merge_collinear: bool = True,
+        tolerance: float = 0.001
+    ):
+        self.precision = precision
+        self.e_precision = e_precision
+        self.feed_precision = feed_precision
+        self.strip_comments = strip_comments
+        self.keep_comments = tuple(keep_comments)
+        self.drop_redundant = drop_redundant
+        self.merge_collinear = merge_collinear
+        self.tolerance = tolerance
+        self.stats = MinifyStats()
+
+    # ========================================
+    # 格式化
+    # ========================================
+
+    def _fmt(self, letter: str, value: float) -> str:
+        digits = self.e_precision if letter == "E" else self.feed_precision if letter == "F" else self.precision
+        text = f"{value:.{digits}f}"
+        if "." in text:
+            text = text.rstrip("0").rstrip(".")
+        if text in ("-0", ""):
+            text = "0"
+        return text
+
+    def _round(self, letter: str, value: float) -> float:
+        return float(self._fmt(letter, value))
+
+    # ========================================
+    # 处理
+    # ========================================
+
+    def process(self, lines: Iterable[str]) -> Iterator[str]:
+        """逐行处理 G-code，产出压缩后的行 (不含换行符)"""
+        stats = self.stats
+        pos: Dict[str, Optional[float]] = {"X": None, "Y": None, "Z": None}
+        feed: Optional[float] = None
+        absolute = True
+        absolute_e = True
+        in_header = False
+        # 待合并的移动: [起点 (x, y), 终点 (x, y), E 增量, 是否有 E, F 字]
+        pending: Optional[list] = None
+
+        def flush() -> Iterator[str]:
+            nonlocal pending
+            if pending is not None:
+                start, end, e_value, has_e, f_word = pending
+                words = ["G1"]
+                for i, axis in enumerate("XY"):
+                    if end[i] != start[i]:
+                        words.append(axis + self._fmt(axis, end[i]))
+                if has_e:
+                    words.append("E" + self._fmt("E", e_value))
+                if f_word is not None:
+                    words.append("F" + self._fmt("F", f_word))
+                pending = None
+                yield " ".join(words)
+
+        for raw in lines:
+            stats.lines_in += 1
+            stats.bytes_in += len(raw) if raw.isascii() else len(raw.encode("utf-8"))
+            if not raw.endswith("\n"):
+                stats.bytes_in += 1
+
+            line = raw.rstrip("\r\n")
+            code_part, sep, comment = line.partition(";")
+            code_part = code_part.strip()
+            keep_comment = sep and (
+                not self.strip_comments or in_header
+                or any(key in comment for key in self.keep_comments)
+            )
+
+            # 纯注释行
+            if not code_part:
+                if "HEADER_BLOCK_START" in comment:
+                    in_header = keep_comment = True
+                elif "HEADER_BLOCK_END" in comment:
+                    in_header = False
+                if keep_comment:
+                    yield from flush()
+                    yield line.strip()
+                continue
+
+            words = code_part.split()
+            code = words[0].upper()
+            trailing = " ;" + comment if keep_comment else ""
+
+            params = self._parse_move(words) if code in ("G0", "G1") and not trailing else None
+            if params is not None:
+                # 去掉冗余的 F 和不变的绝对坐标
+                f_word = params.get("F")
+                if self.drop_redundant and f_word is not None and f_word == feed:
+                    f_word = None
+                if f_word is not None:
+                    feed = f_word
+
+                target = dict(pos)
+                moved = []
+                for axis in "XYZ":
+                    if axis not in params:
+                        continue
+                    if absolute:
+                        target[axis] = params[axis]
+                    elif pos[axis] is not None:
+                        target[axis] = self._round(axis, pos[axis] + params[axis])
+                    if not (self.drop_redundant and absolute and params[axis] == pos[axis]):
+                        moved.append(axis)
+                has_e = "E" in params
+                e_value = params.get("E", 0.0)
+
+                mergeable = (
+                    self.merge_collinear and code == "G1" and absolute
+                    and moved and "Z" not in moved
+                    and (not has_e or not absolute_e)
+                    and pos["X"] is not None and pos["Y"] is not None
+                )
+                if mergeable:
+                    start = (pos["X"], pos["Y"])
+                    end = (target["X"], target["Y"])
+                    if pending is not None and self._can_merge(pending, start, end, e_value, has_e, f_word):
+                        pending[1] = end
+                        pending[2] = self._round("E", pending[2] + e_value)
+                        stats.merged_moves += 1
+                    else:
+                        yield from flush()
+                        pending = [start, end, e_value, has_e, f_word]
+                    pos = target
+                    continue
+
+                yield from flush()
+                pos = target
+                out = [code] + [axis + self._fmt(axis, params[axis]) for axis in moved]
+                if has_e:
+                    out.append("E" + self._fmt("E", e_value))
+                if f_word is not None:
+                    out.append("F" + self._fmt("F", f_word))
+                if len(out) > 1:
+                    yield " ".join(out)
+                continue
+
+            yield from flush()
+
+            # 模态状态
+            if code == "G90":
+                absolute = absolute_e = True
+            elif code == "G91":
+                absolute = absolute_e = False
+            elif code == "M82":
+                absolute_e = True
+            elif code == "M83":
+                absolute_e = False
+            elif code in ("G0", "G1", "G2", "G3", "G28", "G92"):
+                # 未解析的运动之后位置不再确定，不做冗余判断
+                pos = {"X": None, "Y": None, "Z": None}
+                if code != "G92":
+                    feed = None
+
+            yield " ".join(words) + trailing
+
+        yield from flush()
+
+    def _parse_move(self, words: List[str]) -> Optional[Dict[str, float]]:
+        """解析 G0/G1 参数并舍入；含其他字时返回 None"""
+        params: Dict[str, float] = {}
+        for word in words[1:]:
+            letter = word[0].upper()
+            if letter not in "XYZEF":
+                return None
+            try:
+                params[letter] = self._round(letter, float(word[1:]))
+            except ValueError:
+                return None
+        return params
+
+    def _can_merge(self, pending: list, start, end, e_value: float, has_e: bool, f_word) -> bool:
+        """判断新移动能否并入待合并移动"""
+        if f_word is not None or has_e != pending[3] or pending[1] != start:
+            return False
+
+        (sx, sy), (px, py) = pending[0], pending[1]
+        ax, ay = px - sx, py - sy
+        bx, by = end[0] - px, end[1] - py
+        len_a = math.hypot(ax, ay)
+        len_b = math.hypot(bx, by)
+        if len_a == 0 or len_b == 0 or ax * bx + ay * by <= 0:
+            return False
+
+        # 中间点到合并后直线的距离
+        cx, cy = end[0] - sx, end[1] - sy
+        if abs(cx * ay - cy * ax) / math.hypot(cx, cy) > self.tolerance:
+            return False
+
+        # 挤出量与长度成比例
+        if has_e:
+            rate_a = pending[2] / len_a
+            rate_b = e_value / len_b
+            if abs(rate_a - rate_b) > 1e-3 * max(abs(rate_a), abs(rate_b), 1e-9):
+                return False
+        return True
+
+    def iter_bytes(self, source: Union[str, Iterable[str]], chunk_size: int = 65536) -> Iterator[bytes]:
+        """
+        流式压缩，产出编码后的数据块
+
+        Args:
+            source: G-code 文件路径或行迭代器
+            chunk_size: 每块大约字节数
+        """
+        self.stats = MinifyStats()
+        start = time.monotonic()
+
+        if isinstance(source, str):
+            f = open(source, "r", encoding="utf-8", errors="replace", newline="")
+            lines: Iterable[str] = f
+        else:
+            f = None
+            lines = source
+
+        try:
+            buffer: List[str] = []
+            size = 0
+            for line in self.process(lines):
+                buffer.append(line)
+                size += len(line) + 1
+                if size >= chunk_size:
+                    data = ("\n".join(buffer) + "\n").encode("utf-8")
+                    self.stats.lines_out += len(buffer)
+                    self.stats.bytes_out += len(data)
+                    buffer, size = [], 0
+                    yield data
+            if buffer:
+                data = ("\n".join(buffer) + "\n").encode("utf-8")
+                self.stats.lines_out += len(buffer)
+                self.stats.bytes_out += len(data)
+                yield data
+        finally:
+            if f is not None:
+                f.close()
+            self.stats.elapsed = time.monotonic() - start
+
+    def minify_file(self, src: str, dst: str) -> MinifyStats:
+        """压缩到本地文件"""
+        with open(dst, "wb") as f:
+            for chunk in self.iter_bytes(src):
+                f.write(chunk)
+        return self.stats
+
+    def upload(
+        self,
+        ftp: "BambuFTP",
+        local_path: str,
+        remote_path: Optional[str] = None
+    ) -> Tuple[bool, MinifyStats]:
+        """
+        压缩并直接上传到打印机 (不生成临时文件)
+
+        返回 (是否成功, 统计)；stats.time_saved() 为按实际吞吐估算的节省秒数
+        """
+        if remote_path is None:
+            remote_path = f"/cache/{os.path.basename(local_path)}"
+
+        start = time.monotonic()
+        ok = ftp.upload_stream(self.iter_bytes(local_path), remote_path)
+        self.stats.upload_time = time.monotonic() - start
+
+        if ok:
+            print(
+                f"压缩上传: {self.stats.bytes_in} -> {self.stats.bytes_out} 字节 "
+                f"(节省 {self.stats.bytes_saved} 字节, 约 {self.stats.time_saved():.1f}s)"
+            )
+        return ok, self.stats
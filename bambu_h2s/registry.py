@@ -0,0 +1,810 @@
+"""
+Bambu Lab 命令注册表
+以声明方式描述所有 MQTT 命令：命名空间、命令名、参数类型、范围和默认值
+BambuCommands 的方法和 send() 通用分发都由此生成，参数在序列化之前校验
+"""
+
+import math
+import posixpath
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .templates import CommandTemplate, Slot
+
+NAMESPACES = ("print", "system", "camera", "xcam", "upgrade", "info", "pushing")
+
+_REQUIRED = object()
+
+
+class Param:
+    """命令参数定义"""
+
+    def __init__(
+        self,
+        name: str,
+        type: type,
+        default: Any = _REQUIRED,
+        min: Optional[float] = None,
+        max: Optional[float] = None,
+        choices: Optional[Sequence[Any]] = None,
+        item_type: Optional[type] = None,
+        convert: Optional[Callable[[Any], Any]] = None
+    ):
+        self.name = name
+        self.type = type
+        self.default = default
+        self.min = min
+        self.max = max
+        self.choices = tuple(choices) if choices is not None else None
+        self.item_type = item_type
+        self.convert = convert
+
+    @property
+    def required(self) -> bool:
+        return self.default is _REQUIRED
+
+    def _type_ok(self, value: Any, expected: type) -> bool:
+        # bool 是 int 的子类，需要单独区分
+        if expected is bool:
+            return type(value) is bool
+        if expected is int:
+            return isinstance(value, int) and type(value) is not bool
+        if expected is float:
+            return isinstance(value, (int, float)) and type(value) is not bool
+        return isinstance(value, expected)
+
+    def validate(self, command: str, value: Any) -> Any:
+        """校验参数值，返回 (可能经过转换的) 值"""
+        if self.convert is not None and isinstance(value, str):
+            value = self.convert(value)
+
+        if not self._type_ok(value, self.type):
+            raise TypeError(
+                f"{command}: 参数 {self.name} 应为 {self.type.__name__}，"
+                f"实际为 {type(value).__name__}"
+            )
+
+        if self.item_type is not None:
+            for item in value:
+                if not self._type_ok(item, self.item_type):
+                    raise TypeError(
+                        f"{command}: 参数 {self.name} 的元素应为 {self.item_type.__name__}，"
+                        f"实际为 {type(item).__name__}"
+                    )
+
+        if self.type is float and not math.isfinite(value):
+            raise ValueError(f"{command}: 参数 {self.name} 不是有限数值: {value}")
+
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f"{command}: 参数 {self.name} 必须是 {list(self.choices)} 之一: {value!r}")
+
+        if self.min is not None and value < self.min:
+            raise ValueError(f"{command}: 参数 {self.name} 小于最小值 {self.min}: {value}")
+        if self.max is not None and value > self.max:
+            raise ValueError(f"{command}: 参数 {self.name} 大于最大值 {self.max}: {value}")
+
+        return value
+
+
+class Arg:
+    """线上字段取自参数 (可选转换)"""
+
+    def __init__(self, name: str, transform: Optional[Callable[[Any], Any]] = None, kind: Any = None):
+        self.name = name
+        self.transform = transform
+        self.kind = kind
+
+
+class Computed:
+    """线上字段由多个参数计算得到"""
+
+    def __init__(self, func: Callable[[Dict[str, Any]], Any], kind: Any = "json"):
+        self.func = func
+        self.kind = kind
+
+
+class CommandSpec:
+    """单个命令的声明"""
+
+    def __init__(
+        self,
+        name: str,
+        namespace: str,
+        command: str,
+        params: List[Param],
+        fields: Dict[str, Any],
+        doc: str
+    ):
+        if namespace not in NAMESPACES:
+            raise ValueError(f"未知命名空间: {namespace}")
+
+        self.name = name
+        self.namespace = namespace
+        self.command = command
+        self.params = params
+        self.fields = fields
+        self.doc = doc
+
+        self._params = {p.name: p for p in params}
+        self._defaults = {p.name: p.default for p in params if not p.required}
+        self._required = [p.name for p in params if p.required]
+
+        # 线上字段 -> 取值函数；常量直接写入模板
+        self._getters: List[tuple] = []
+        template_fields: Dict[str, Any] = {}
+        for key, value in fields.items():
+            if isinstance(value, Arg):
+                param = self._params[value.name]
+                kind = value.kind
+                if kind is None:
+                    kind = param.type if value.transform is None and param.type in (str, int, float, bool) else "json"
+                self._getters.append((key, self._arg_getter(value)))
+                template_fields[key] = Slot(kind)
+            elif isinstance(value, Computed):
+                self._getters.append((key, value.func))
+                template_fields[key] = Slot(value.kind)
+            else:
+                template_fields[key] = value
+        self.template = CommandTemplate(namespace, command, template_fields)
+
+    @staticmethod
+    def _arg_getter(arg: Arg) -> Callable[[Dict[str, Any]], Any]:
+        name = arg.name
+        transform = arg.transform
+        if transform is None:
+            return lambda values: values[name]
+        return lambda values: transform(values[name])
+
+    def validate(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """补全默认值并校验，返回完整参数字典"""
+        values = dict(self._defaults)
+        values.update(params)
+
+        if len(values) != len(self.params):
+            unknown = [k for k in params if k not in self._params]
+            if unknown:
+                raise TypeError(f"{self.name}: 未知参数 {', '.join(unknown)}")
+        for name in self._required:
+            if name not in values:
+                raise TypeError(f"{self.name}: 缺少参数 {name}")
+
+        for name, value in values.items():
+            values[name] = self._params[name].validate(self.name, value)
+        return values
+
+    def render(self, params: Dict[str, Any], sequence_id: str) -> bytes:
+        """校验参数并编码为 MQTT 负载"""
+        values = self.validate(params)
+        wire = {key: getter(values) for key, getter in self._getters}
+        return self.template.render(wire, sequence_id)
+
+
+COMMANDS: Dict[str, CommandSpec] = {}
+
+
+def _register(
+    name: str,
+    namespace: str,
+    command: str,
+    doc: str,
+    params: Optional[List[Param]] = None,
+    fields: Optional[Dict[str, Any]] = None
+):
+    COMMANDS[name] = CommandSpec(name, namespace, command, params or [], fields or {}, doc)
+
+
+def get_spec(name: str) -> CommandSpec:
+    """按名称获取命令声明"""
+    try:
+        return COMMANDS[name]
+    except KeyError:
+        raise ValueError(f"未知命令: {name}") from None
+
+
+# 常用参数范围
+_NOZZLE_TEMP = dict(min=0, max=350)
+_BED_TEMP = dict(min=0, max=120)
+_NOZZLE_DIAMETERS = ("0.2", "0.4", "0.6", "0.8")
+
+
+def _enable_word(enable: bool) -> str:
+    return "enable" if enable else "disable"
+
+
+def _flowrate_filaments(values: Dict[str, Any]) -> list:
+    return [{
+        "tray_id": values["tray_id"],
+        "bed_temp": values["bed_temp"],
+        "filament_id": values["filament_id"],
+        "setting_id": values["setting_id"],
+        "nozzle_temp": values["nozzle_temp"],
+        "def_flow_ratio": "1.0",
+        "max_volumetric_speed": str(values["max_volumetric_speed"]),
+        "extruder_id": 0,
+        "ams_id": 0,
+        "slot_id": 0
+    }]
+
+
+# ========================================
+# 一、打印控制命令 (8个)
+# ========================================
+
+_register("stop", "print", "stop", "停止打印", fields={"param": ""})
+_register("pause", "print", "pause", "暂停打印", fields={"param": ""})
+_register("resume", "print", "resume", "恢复打印", fields={"param": ""})
+
+_register(
+    "skip_objects", "print", "skip_objects", "跳过指定打印对象",
+    [Param("obj_list", list, item_type=int)],
+    {"obj_list": Arg("obj_list")}
+)
+
+_register(
+    "clean_print_error", "print", "clean_print_error", "清除打印错误",
+    [Param("subtask_id", str, ""), Param("print_error", int, 0)],
+    {"subtask_id": Arg("subtask_id"), "print_error": Arg("print_error")}
+)
+
+_register(
+    "gcode_line", "print", "gcode_line", "发送 G-code 命令",
+    [Param("gcode", str)],
+    {"param": Arg("gcode")}
+)
+
+_register(
+    "gcode_file", "print", "gcode_file", "执行 G-code 文件",
+    [Param("file_path", str)],
+    {"param": Arg("file_path")}
+)
+
+_register(
+    "project_file", "print", "project_file",
+    """
+        打印已上传的 3MF 项目
+        file_path: 打印机上的路径，如 /cache/model.3mf
+        plate: 盘号 (对应 Metadata/plate_N.gcode)
+        """,
+    [
+        Param("file_path", str),
+        Param("plate", int, 1, min=1),
+        Param("subtask_name", str, ""),
+        Param("use_ams", bool, False),
+        Param("ams_mapping", list, [], item_type=int),
+        Param("timelapse", bool, False),
+        Param("bed_levelling", bool, True),
+        Param("flow_cali", bool, False),
+        Param("vibration_cali", bool, False),
+        Param("layer_inspect", bool, False),
+        Param("bed_type", str, "auto")
+    ],
+    {
+        "param": Computed(lambda v: f"Metadata/plate_{v['plate']}.gcode", str),
+        "url": Arg("file_path", lambda path: f"ftp://{path}", str),
+        "project_id": "0",
+        "profile_id": "0",
+        "task_id": "0",
+        "subtask_id": "0",
+        "subtask_name": Computed(
+            lambda v: v["subtask_name"] or posixpath.basename(v["file_path"]).split(".")[0], str
+        ),
+        "md5": "",
+        "use_ams": Arg("use_ams"),
+        "ams_mapping": Arg("ams_mapping"),
+        "timelapse": Arg("timelapse"),
+        "bed_levelling": Arg("bed_levelling"),
+        "flow_cali": Arg("flow_cali"),
+        "vibration_cali": Arg("vibration_cali"),
+        "layer_inspect": Arg("layer_inspect"),
+        "bed_type": Arg("bed_type")
+    }
+)
+
+# ========================================
+# 二、温度控制命令 (4个)
+# ========================================
+
+_register(
+    "set_bed_temp", "print", "set_bed_temp", "设置热床温度",
+    [Param("temp", int, **_BED_TEMP)],
+    {"temp": Arg("temp")}
+)
+
+_register(
+    "set_nozzle_temp", "print", "set_nozzle_temp", "设置喷嘴温度",
+    [Param("temp", int, **_NOZZLE_TEMP), Param("extruder_index", int, 0, min=0, max=1)],
+    {"extruder_index": Arg("extruder_index"), "target_temp": Arg("temp")}
+)
+
+_register(
+    "set_chamber_temp", "print", "set_ctt", "设置腔室温度",
+    [Param("temp", int, min=0, max=65)],
+    {"ctt_val": Arg("temp")}
+)
+
+_register("refresh_nozzle", "print", "refresh_nozzle", "刷新喷嘴状态")
+
+# ========================================
+# 三、风扇控制命令 (2个)
+# ========================================
+
+_register(
+    "set_fan", "print", "set_fan",
+    """
+        设置风扇速度
+        fan_index: 0=部件冷却风扇, 1=辅助风扇, 2=腔室风扇
+        speed: 0-100
+        """,
+    [Param("fan_index", int, choices=(0, 1, 2)), Param("speed", int, min=0, max=100)],
+    {"fan_index": Arg("fan_index"), "speed": Arg("speed")}
+)
+
+_register(
+    "set_airduct", "print", "set_airduct", "设置风道模式",
+    [Param("mode_id", int, min=0), Param("submode", int, 0, min=0)],
+    {"modeId": Arg("mode_id"), "submode": Arg("submode")}
+)
+
+# ========================================
+# 四、AMS 自动换料系统命令 (6个)
+# ========================================
+
+_register(
+    "ams_change_filament", "print", "ams_change_filament", "更换 AMS 耗材",
+    [
+        Param("ams_id", int, min=0, max=255),
+        Param("slot_id", int, min=0, max=255),
+        Param("target", int, 0, min=0, max=255),
+        Param("curr_temp", int, 220, **_NOZZLE_TEMP),
+        Param("tar_temp", int, 220, **_NOZZLE_TEMP)
+    ],
+    {
+        "curr_temp": Arg("curr_temp"),
+        "tar_temp": Arg("tar_temp"),
+        "ams_id": Arg("ams_id"),
+        "target": Arg("target"),
+        "slot_id": Arg("slot_id")
+    }
+)
+
+_register(
+    "ams_user_setting", "print", "ams_user_setting", "AMS 用户设置",
+    [
+        Param("ams_id", int, -1, min=-1, max=255),
+        Param("startup_read", bool, True),
+        Param("tray_read", bool, True),
+        Param("calibrate_remain", bool, True)
+    ],
+    {
+        "ams_id": Arg("ams_id"),
+        "startup_read_option": Arg("startup_read"),
+        "tray_read_option": Arg("tray_read"),
+        "calibrate_remain_flag": Arg("calibrate_remain")
+    }
+)
+
+_register(
+    "ams_filament_setting", "print", "ams_filament_setting", "AMS 耗材参数设置",
+    [
+        Param("ams_id", int, min=0, max=255),
+        Param("slot_id", int, min=0, max=255),
+        Param("tray_id", int, min=0, max=255),
+        Param("tray_type", str, "PLA"),
+        Param("tray_color", str, "FFFFFFFF"),
+        Param("nozzle_temp_min", int, 190, **_NOZZLE_TEMP),
+        Param("nozzle_temp_max", int, 230, **_NOZZLE_TEMP),
+        Param("setting_id", str, "")
+    ],
+    {
+        "ams_id": Arg("ams_id"),
+        "slot_id": Arg("slot_id"),
+        "tray_id": Arg("tray_id"),
+        "tray_info_idx": 0,
+        "setting_id": Arg("setting_id"),
+        "tray_color": Arg("tray_color"),
+        "nozzle_temp_min": Arg("nozzle_temp_min"),
+        "nozzle_temp_max": Arg("nozzle_temp_max"),
+        "tray_type": Arg("tray_type")
+    }
+)
+
+_register(
+    "ams_get_rfid", "print", "ams_get_rfid", "读取 AMS RFID 信息",
+    [Param("ams_id", int, min=0, max=255), Param("slot_id", int, min=0, max=255)],
+    {"ams_id": Arg("ams_id"), "slot_id": Arg("slot_id")}
+)
+
+_register(
+    "ams_control", "print", "ams_control",
+    """
+        AMS 控制
+        action: resume/reset/pause/done/abort
+        """,
+    [Param("action", str, choices=("resume", "reset", "pause", "done", "abort"))],
+    {"param": Arg("action")}
+)
+
+_register("ams_stop_dry", "print", "auto_stop_ams_dry", "停止 AMS 干燥")
+
+# ========================================
+# 五、打印选项命令 (4个)
+# ========================================
+
+_register(
+    "set_print_speed", "print", "print_speed",
+    """
+        设置打印速度
+        level: 1=静音, 2=标准, 3=运动, 4=疯狂
+        """,
+    [Param("level", int, choices=(1, 2, 3, 4))],
+    {"param": Arg("level", str, str)}
+)
+
+_register(
+    "set_print_option", "print", "print_option", "设置打印选项",
+    [
+        Param("auto_recovery", bool, True),
+        Param("nozzle_blob_detect", bool, True),
+        Param("sound_enable", bool, True),
+        Param("filament_tangle_detect", bool, True),
+        Param("auto_switch_filament", bool, True),
+        Param("air_print_detect", bool, True)
+    ],
+    {
+        "option": 1,
+        "auto_recovery": Arg("auto_recovery"),
+        "nozzle_blob_detect": Arg("nozzle_blob_detect"),
+        "sound_enable": Arg("sound_enable"),
+        "filament_tangle_detect": Arg("filament_tangle_detect"),
+        "auto_switch_filament": Arg("auto_switch_filament"),
+        "air_print_detect": Arg("air_print_detect")
+    }
+)
+
+_register(
+    "set_extrusion_length", "print", "set_extrusion_length", "控制挤出长度",
+    [Param("length", float), Param("extruder_index", int, 0, min=0, max=1)],
+    {"extruder_index": Arg("extruder_index"), "length": Arg("length")}
+)
+
+_register(
+    "set_anti_heating_mode", "print", "set_against_continued_heating_mode", "设置防止持续加热模式",
+    [Param("enable", bool)],
+    {"enable": Arg("enable")}
+)
+
+# ========================================
+# 六、校准命令 (9个)
+# ========================================
+
+_register(
+    "calibration", "print", "calibration",
+    """
+        综合校准
+        option 位掩码:
+          1 = 振动校准
+          2 = 床平整
+          4 = X-cam
+          8 = 电机噪音
+          16 = 喷嘴
+          32 = 床
+          64 = 夹紧位置
+        """,
+    [Param("option", int, 127, min=0, max=127)],
+    {"option": Arg("option")}
+)
+
+_register(
+    "extrusion_cali", "print", "extrusion_cali", "挤出量校准",
+    [
+        Param("tray_id", int, min=0, max=255),
+        Param("nozzle_temp", int, 220, **_NOZZLE_TEMP),
+        Param("bed_temp", int, 60, **_BED_TEMP),
+        Param("max_volumetric_speed", float, 10.0, min=0)
+    ],
+    {
+        "tray_id": Arg("tray_id"),
+        "nozzle_temp": Arg("nozzle_temp"),
+        "bed_temp": Arg("bed_temp"),
+        "max_volumetric_speed": Arg("max_volumetric_speed")
+    }
+)
+
+_register(
+    "extrusion_cali_set", "print", "extrusion_cali_set", "保存挤出量校准参数",
+    [
+        Param("tray_id", int, min=0, max=255),
+        Param("k_value", float, min=0),
+        Param("n_coef", float, 1.4),
+        Param("nozzle_temp", int, 220, **_NOZZLE_TEMP),
+        Param("bed_temp", int, 60, **_BED_TEMP),
+        Param("max_volumetric_speed", float, 10.0, min=0)
+    ],
+    {
+        "tray_id": Arg("tray_id"),
+        "k_value": Arg("k_value"),
+        "n_coef": Arg("n_coef"),
+        "bed_temp": Arg("bed_temp"),
+        "nozzle_temp": Arg("nozzle_temp"),
+        "max_volumetric_speed": Arg("max_volumetric_speed")
+    }
+)
+
+_register(
+    "extrusion_cali_get", "print", "extrusion_cali_get", "获取挤出量校准数据",
+    [Param("filament_id", str), Param("nozzle_diameter", str, "0.4", choices=_NOZZLE_DIAMETERS)],
+    {"filament_id": Arg("filament_id"), "nozzle_diameter": Arg("nozzle_diameter")}
+)
+
+_register(
+    "extrusion_cali_del", "print", "extrusion_cali_del", "删除挤出量校准数据",
+    [
+        Param("extruder_id", int, min=0, max=1),
+        Param("nozzle_id", str),
+        Param("filament_id", str),
+        Param("cali_idx", int),
+        Param("nozzle_diameter", str, "0.4", choices=_NOZZLE_DIAMETERS)
+    ],
+    {
+        "extruder_id": Arg("extruder_id"),
+        "nozzle_id": Arg("nozzle_id"),
+        "filament_id": Arg("filament_id"),
+        "cali_idx": Arg("cali_idx"),
+        "nozzle_diameter": Arg("nozzle_diameter")
+    }
+)
+
+_register(
+    "extrusion_cali_sel", "print", "extrusion_cali_sel", "选择挤出量校准配置",
+    [
+        Param("tray_id", int, min=0, max=255),
+        Param("ams_id", int, min=0, max=255),
+        Param("slot_id", int, min=0, max=255),
+        Param("cali_idx", int),
+        Param("filament_id", str),
+        Param("nozzle_diameter", str, "0.4", choices=_NOZZLE_DIAMETERS)
+    ],
+    {
+        "tray_id": Arg("tray_id"),
+        "ams_id": Arg("ams_id"),
+        "slot_id": Arg("slot_id"),
+        "cali_idx": Arg("cali_idx"),
+        "filament_id": Arg("filament_id"),
+        "nozzle_diameter": Arg("nozzle_diameter")
+    }
+)
+
+_register(
+    "extrusion_cali_get_result", "print", "extrusion_cali_get_result", "获取挤出量校准结果",
+    [Param("nozzle_diameter", str, "0.4", choices=_NOZZLE_DIAMETERS)],
+    {"nozzle_diameter": Arg("nozzle_diameter")}
+)
+
+_register(
+    "flowrate_cali", "print", "flowrate_cali", "流量比校准",
+    [
+        Param("tray_id", int, min=0, max=255),
+        Param("filament_id", str),
+        Param("setting_id", str),
+        Param("nozzle_temp", int, 220, **_NOZZLE_TEMP),
+        Param("bed_temp", int, 60, **_BED_TEMP),
+        Param("max_volumetric_speed", float, 10.0, min=0),
+        Param("nozzle_diameter", str, "0.4", choices=_NOZZLE_DIAMETERS)
+    ],
+    {
+        "tray_id": Arg("tray_id"),
+        "nozzle_diameter": Arg("nozzle_diameter"),
+        "filaments": Computed(_flowrate_filaments)
+    }
+)
+
+_register(
+    "flowrate_get_result", "print", "flowrate_get_result", "获取流量比校准结果",
+    [Param("nozzle_diameter", str, "0.4", choices=_NOZZLE_DIAMETERS)],
+    {"nozzle_diameter": Arg("nozzle_diameter")}
+)
+
+# ========================================
+# 七、摄像头控制命令 (3个)
+# ========================================
+
+_register(
+    "camera_record", "camera", "ipcam_record_set", "启用/禁用摄像头录制",
+    [Param("enable", bool)],
+    {"control": Arg("enable", _enable_word, str)}
+)
+
+_register(
+    "camera_timelapse", "camera", "ipcam_timelapse", "启用/禁用延时摄影",
+    [Param("enable", bool)],
+    {"control": Arg("enable", _enable_word, str)}
+)
+
+_register(
+    "camera_resolution", "camera", "ipcam_resolution_set", "设置摄像头分辨率",
+    [Param("resolution", str, "1080p", choices=("720p", "1080p"))],
+    {"resolution": Arg("resolution")}
+)
+
+# ========================================
+# 八、X-Cam AI 检测命令 (1个)
+# ========================================
+
+_register(
+    "xcam_control", "xcam", "xcam_control_set",
+    """
+        X-Cam 控制
+        module: printing_monitor / first_layer_inspector / buildplate_marker_detector
+        sensitivity: low / medium / high
+        """,
+    [
+        Param("module", str, choices=("printing_monitor", "first_layer_inspector", "buildplate_marker_detector")),
+        Param("enable", bool),
+        Param("print_halt", bool, False),
+        Param("sensitivity", str, "medium", choices=("low", "medium", "high"))
+    ],
+    {
+        "module_name": Arg("module"),
+        "control": Arg("enable"),
+        "enable": Arg("enable"),
+        "print_halt": Arg("print_halt"),
+        "halt_print_sensitivity": Arg("sensitivity")
+    }
+)
+
+# ========================================
+# 九、轴控制命令 (3个)
+# ========================================
+
+_register("back_to_center", "print", "back_to_center", "回到中心位置")
+
+_register(
+    "move_axis", "print", "xyz_ctrl",
+    """
+        移动轴
+        axis: X/Y/Z/E
+        direction: 1=正向, -1=反向
+        mode: 0=小步, 1=大步
+        """,
+    [
+        Param("axis", str, choices=("X", "Y", "Z", "E"), convert=str.upper),
+        Param("direction", int, choices=(1, -1)),
+        Param("mode", int, 0, choices=(0, 1))
+    ],
+    {"axis": Arg("axis"), "dir": Arg("direction"), "mode": Arg("mode")}
+)
+
+_register(
+    "select_extruder", "print", "select_extruder", "选择挤出机",
+    [Param("index", int, min=0, max=1)],
+    {"extruder_index": Arg("index")}
+)
+
+# ========================================
+# 十、灯光控制命令 (1个)
+# ========================================
+
+_register(
+    "light", "system", "ledctrl",
+    """
+        灯光控制
+        mode: on/off/flashing
+        node: chamber_light / chamber_light2
+        """,
+    [
+        Param("mode", str, choices=("on", "off", "flashing")),
+        Param("node", str, "chamber_light", choices=("chamber_light", "chamber_light2")),
+        Param("on_time", int, 500, min=0),
+        Param("off_time", int, 500, min=0),
+        Param("loops", int, 1, min=0),
+        Param("interval", int, 1000, min=0)
+    ],
+    {
+        "led_node": Arg("node"),
+        "led_mode": Arg("mode"),
+        "led_on_time": Arg("on_time"),
+        "led_off_time": Arg("off_time"),
+        "loop_times": Arg("loops"),
+        "interval_time": Arg("interval")
+    }
+)
+
+# ========================================
+# 十一、喷嘴架控制命令 (3个)
+# ========================================
+
+_register(
+    "nozzle_holder_ctrl", "print", "nozzle_holder_ctrl",
+    """
+        喷嘴架控制
+        action: 0=回家, 1=A顶部, 2=B顶部
+        """,
+    [Param("action", int, choices=(0, 1, 2))],
+    {"action": Arg("action")}
+)
+
+_register(
+    "nozzle_info_confirm", "print", "nozzle_info_confirm", "确认喷嘴信息",
+    [Param("nozzle_id", int, min=0)],
+    {"id": Arg("nozzle_id")}
+)
+
+_register(
+    "nozzle_refresh", "print", "holder_nozzle_refresh", "刷新喷嘴架信息",
+    [Param("nozzle_id", int, min=0)],
+    {"id": Arg("nozzle_id")}
+)
+
+# ========================================
+# 十二、系统命令 (5个)
+# ========================================
+
+_register("get_version", "info", "get_version", "获取固件版本")
+_register("get_access_code", "system", "get_access_code", "获取访问码")
+_register("push_all", "pushing", "pushall", "请求所有状态", fields={"version": 1, "push_target": 1})
+
+_register(
+    "set_door_detection", "system", "set_door_stat",
+    """
+        设置门状态检测
+        config: 0=禁用, 1=警告, 2=暂停打印
+        """,
+    [Param("config", int, choices=(0, 1, 2))],
+    {"config": Arg("config")}
+)
+
+_register(
+    "set_print_cache", "system", "print_cache_set", "设置打印缓存",
+    [Param("enable", bool)],
+    {"config": Arg("enable")}
+)
+
+# ========================================
+# 十三、固件升级命令 (3个)
+# ========================================
+
+_register(
+    "upgrade_confirm", "upgrade", "upgrade_confirm", "确认固件升级",
+    [Param("src_id", int, 1)],
+    {"src_id": Arg("src_id")}
+)
+
+_register(
+    "upgrade_start", "upgrade", "start", "启动固件升级",
+    [Param("url", str), Param("module", str), Param("version", str), Param("src_id", int, 1)],
+    {
+        "url": Arg("url"),
+        "module": Arg("module"),
+        "version": Arg("version"),
+        "src_id": Arg("src_id")
+    }
+)
+
+_register(
+    "consistency_confirm", "upgrade", "consistency_confirm", "确认一致性检查",
+    [Param("src_id", int, 1)],
+    {"src_id": Arg("src_id")}
+)
+
+# ========================================
+# 十四、错误处理命令 (3个)
+# ========================================
+
+_register("buzzer_off", "print", "buzzer_ctrl", "关闭蜂鸣器", fields={"mode": 0})
+
+_register(
+    "ignore_error", "print", "ignore", "忽略错误",
+    [Param("error", str), Param("job_id", str, "")],
+    {"err": Arg("error"), "param": "reserve", "job_id": Arg("job_id")}
+)
+
+_register(
+    "close_dialog", "system", "uiop", "关闭 UI 对话框",
+    [Param("name", str, "print_error"), Param("error", str, "00000000")],
+    {
+        "name": Arg("name"),
+        "action": "close",
+        "source": 1,
+        "type": "dialog",
+        "err": Arg("error")
+    }
+)
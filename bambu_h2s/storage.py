@@ -0,0 +1,231 @@
+"""
+打印机存储配额管理
+由目录列表统计占用，上传前超过高水位时按 LRU 淘汰我们上传过的旧任务文件；
+正在打印的文件 (来自 MQTT 状态的 gcode_file / subtask_name) 永不删除
+
+淘汰索引即上传缓存 (UploadCache) 中该打印机的记录，其他来源 (切片软件、
+SD 卡拷贝) 的文件只计入占用，不会被删除
+"""
+
+import os
+import posixpath
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Set
+
+from .ftp import RemoteEntry
+from .upload_cache import UploadCache
+
+if TYPE_CHECKING:
+    from .client import BambuClient
+    from .ftp import BambuFTP
+
+# 打印机正在使用任务文件的状态
+ACTIVE_STATES = ("PREPARE", "SLICING", "RUNNING", "PAUSE")
+_JOB_SUFFIXES = (".gcode.3mf", ".3mf", ".gcode")
+
+
+def _job_stem(name: str) -> str:
+    """去掉任务文件扩展名，用于和 subtask_name 比较"""
+    name = posixpath.basename(name).lower()
+    for suffix in _JOB_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+class StorageManager:
+    """打印机存储管理器
+
+    Args:
+        ftp: 已连接的 BambuFTP
+        client: 已连接的 BambuClient，用于判断正在打印的文件
+        quota_bytes: 受管目录允许使用的总字节数
+        high_water: 占用超过 quota_bytes * high_water 时开始淘汰
+        roots: 统计占用的远程目录
+        cache: 上传缓存 (淘汰索引)，默认使用默认位置
+        protect: 额外不允许删除的远程路径
+    """
+
+    def __init__(
+        self,
+        ftp: "BambuFTP",
+        client: "BambuClient",
+        quota_bytes: int,
+        high_water: float = 0.9,
+        roots: Iterable[str] = ("/cache",),
+        cache: Optional[UploadCache] = None,
+        protect: Iterable[str] = ()
+    ):
+        if quota_bytes <= 0:
+            raise ValueError(f"quota_bytes 必须为正数: {quota_bytes}")
+        if not 0 < high_water <= 1:
+            raise ValueError(f"high_water 必须在 (0, 1] 内: {high_water}")
+
+        self.ftp = ftp
+        self.client = client
+        self.quota_bytes = quota_bytes
+        self.high_water = high_water
+        self.roots = tuple(posixpath.normpath(r) for r in roots)
+        self.cache = cache or UploadCache()
+        self.protect = set(protect)
+        self.printer = UploadCache.printer_key(ftp)
+
+        self._files: Dict[str, RemoteEntry] = {}
+
+    @property
+    def limit(self) -> int:
+        """高水位字节数"""
+        return int(self.quota_bytes * self.high_water)
+
+    # ========================================
+    # 占用
+    # ========================================
+
+    def usage(self, refresh: bool = True) -> int:
+        """受管目录下文件的总字节数"""
+        self._files = {}
+        for root in self.roots:
+            for _, _, files in self.ftp.walk(root, refresh):
+                self._files.update((f.path, f) for f in files)
+        return sum(max(f.size, 0) for f in self._files.values())
+
+    # ========================================
+    # 保护
+    # ========================================
+
+    def _printing_names(self) -> Optional[Set[str]]:
+        """正在打印的任务名；状态尚未同步，或打印中但状态里没有文件信息时返回 None"""
+        state = self.client.state
+        if not state.get("gcode_state"):
+            # 还没收到打印机状态，无法判断是否在打印
+            return None
+        names = set()
+        if state.get("gcode_file"):
+            names.add(posixpath.basename(str(state["gcode_file"])).lower())
+        if state.get("subtask_name"):
+            names.add(_job_stem(str(state["subtask_name"])))
+
+        if not names and state.get("gcode_state") in ACTIVE_STATES:
+            return None
+        return names
+
+    def is_protected(self, remote_path: str, names: Optional[Set[str]] = None) -> bool:
+        """文件是否正在打印 (或在 protect 中)；无法确定正在打印的文件时一律视为受保护"""
+        if remote_path in self.protect:
+            return True
+        names = self._printing_names() if names is None else names
+        if names is None:
+            return True
+        name = posixpath.basename(remote_path).lower()
+        return name in names or _job_stem(name) in names
+
+    # ========================================
+    # 淘汰
+    # ========================================
+
+    def candidates(self, exclude: Iterable[str] = ()) -> Optional[List[RemoteEntry]]:
+        """
+        可淘汰的文件，最久未用的在前
+
+        需先调用 usage() 获取列表；状态未同步或打印中但无法确定任务文件时返回 None
+        """
+        names = self._printing_names()
+        if names is None:
+            return None
+
+        exclude = set(exclude)
+        result = []
+        for path, _, _ in self.cache.entries(self.printer):
+            entry = self._files.get(path)
+            if entry is None:
+                if any(path == r or path.startswith(r + "/") for r in self.roots):
+                    # 已被其他方式删除
+                    self.cache.forget(self.printer, path)
+                continue
+            if path not in exclude and not self.is_protected(path, names):
+                result.append(entry)
+        return result
+
+    def evict(self, bytes_needed: int, exclude: Iterable[str] = ()) -> List[str]:
+        """按最久未用顺序删除我们上传过的文件，直到腾出 bytes_needed 字节；返回已删除的远程路径"""
+        entries = self.candidates(exclude)
+        if entries is None:
+            print("无法确定正在打印的任务文件 (状态未同步或缺少文件信息)，跳过淘汰")
+            return []
+
+        evicted = []
+        freed = 0
+        for entry in entries:
+            if freed >= bytes_needed:
+                break
+            if not self.ftp.delete_file(entry.path):
+                continue
+            self.cache.forget(self.printer, entry.path)
+            del self._files[entry.path]
+            freed += max(entry.size, 0)
+            evicted.append(entry.path)
+        return evicted
+
+    def ensure_space(self, incoming_bytes: int, target: Optional[str] = None) -> bool:
+        """
+        确保再写入 incoming_bytes 字节后不超过高水位，必要时淘汰旧文件
+
+        全部可淘汰文件也腾不出足够空间时不删除任何文件
+
+        Args:
+            incoming_bytes: 将要写入的字节数
+            target: 将被覆盖的远程路径 (其现有大小不重复计算，也不会被淘汰)
+        """
+        used = self.usage()
+        if target is not None and target in self._files:
+            used -= max(self._files[target].size, 0)
+
+        over = used + incoming_bytes - self.limit
+        if over <= 0:
+            return True
+
+        exclude = () if target is None else (target,)
+        entries = self.candidates(exclude)
+        if entries is None:
+            print("无法确定正在打印的任务文件 (状态未同步或缺少文件信息)，跳过淘汰")
+            return False
+        if sum(max(e.size, 0) for e in entries) < over:
+            print(f"存储空间不足: 需要 {incoming_bytes} 字节, 高水位 {self.limit}, 已用 {used}")
+            return False
+
+        sizes = {e.path: max(e.size, 0) for e in entries}
+        evicted = self.evict(over, exclude)
+        freed = sum(sizes[path] for path in evicted)
+        print(f"已淘汰 {len(evicted)} 个文件, 释放 {freed} 字节")
+        return freed >= over
+
+    # ========================================
+    # 上传
+    # ========================================
+
+    def upload(
+        self,
+        local_path: str,
+        remote_path: Optional[str] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Optional[str]:
+        """
+        腾出空间后上传 (经上传缓存，内容已在打印机上时跳过)
+
+        Returns:
+            内容所在的远程路径，失败时为 None
+        """
+        if not os.path.exists(local_path):
+            print(f"文件不存在: {local_path}")
+            return None
+
+        target = remote_path or f"/cache/{os.path.basename(local_path)}"
+        digest = self.cache.digest(local_path)
+        for path, size, _ in self.cache.lookup(self.printer, digest):
+            if remote_path is None or path == remote_path:
+                # 可能无需传输；由缓存校验，不占新空间
+                if self.ftp.get_size(path) == size:
+                    return self.cache.upload(self.ftp, local_path, remote_path, progress_callback)
+
+        if not self.ensure_space(os.path.getsize(local_path), target):
+            return None
+        return self.cache.upload(self.ftp, local_path, target, progress_callback)
@@ -0,0 +1,201 @@
+"""
+G-code 流式发送引擎
+惰性读取 G-code 文件或迭代器，打包成 gcode_line 负载，
+根据打印机的确认回复和状态变化控制发送节奏，无需上传文件
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from .registry import get_spec
+
+if TYPE_CHECKING:
+    from .commands import BambuCommands
+
+# 出现这些状态时中止发送
+_ABORT_STATES = ("FAILED",)
+# 出现这些状态时暂停发送，直到状态恢复
+_HOLD_STATES = ("PAUSE",)
+
+
+def iter_gcode_lines(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    """逐行读取 G-code，去掉注释和空行；source 为文件路径或行迭代器"""
+    if isinstance(source, str):
+        with open(source, "r", encoding="utf-8", errors="replace") as f:
+            yield from iter_gcode_lines(f)
+        return
+
+    for line in source:
+        line = line.split(";", 1)[0].strip()
+        if line:
+            yield line
+
+
+@dataclass
+class StreamStats:
+    """流式发送统计"""
+    lines: int = 0
+    chunks: int = 0
+    acked: int = 0
+    timeouts: int = 0
+    elapsed: float = 0.0
+    stall_time: float = 0.0          # 等待确认窗口或暂停状态的总秒数
+    aborted: Optional[str] = None    # 中止原因
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class GcodeStreamer:
+    """G-code 流式发送器
+
+    每个 gcode_line 负载最多 chunk_lines 行 / max_chunk_bytes 字节；
+    未确认的负载数不超过 window。任一负载确认超时即中止：后面的负载已经发出，
+    重发会打乱执行顺序；而且打印机可能已执行、只是确认丢失
+    """
+
+    def __init__(
+        self,
+        commands: "BambuCommands",
+        chunk_lines: int = 16,
+        max_chunk_bytes: int = 1024,
+        window: int = 4,
+        ack_timeout: float = 10.0,
+        progress_callback: Optional[Callable[[StreamStats], None]] = None
+    ):
+        if chunk_lines < 1 or window < 1:
+            raise ValueError("chunk_lines 和 window 必须 >= 1")
+
+        self.commands = commands
+        self.client = commands.client
+        self.chunk_lines = chunk_lines
+        self.max_chunk_bytes = max_chunk_bytes
+        self.window = window
+        self.ack_timeout = ack_timeout
+        self.progress_callback = progress_callback
+
+        self._spec = get_spec("gcode_line")
+        self._cond = threading.Condition()
+        self._in_flight: Dict[str, float] = {}
+        self._hold = False
+        self._abort: Optional[str] = None
+        self.stats = StreamStats()
+
+    def stop(self):
+        """中止发送 (可在其他线程调用)"""
+        with self._cond:
+            self._abort = "用户中止"
+            self._cond.notify_all()
+
+    def _chunks(self, lines: Iterator[str]) -> Iterator[List[str]]:
+        chunk: List[str] = []
+        size = 0
+        for line in lines:
+            if chunk and (len(chunk) >= self.chunk_lines or size + len(line) + 1 > self.max_chunk_bytes):
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(line)
+            size += len(line) + 1
+        if chunk:
+            yield chunk
+
+    # ========================================
+    # 打印机反馈
+    # ========================================
+
+    def _on_reply(self, sequence_id: str):
+        def callback(section: Dict[str, Any]):
+            with self._cond:
+                if self._in_flight.pop(sequence_id, None) is None:
+                    return
+                self.stats.acked += 1
+                if str(section.get("result", "success")).lower() in ("fail", "failed"):
+                    self._abort = f"打印机拒绝 G-code: {section.get('reason', section.get('result'))}"
+                self._cond.notify_all()
+        return callback
+
+    def _on_state(self, diff: Dict[str, Any]):
+        state = diff.get("gcode_state")
+        error = diff.get("print_error")
+        with self._cond:
+            if state in _ABORT_STATES:
+                self._abort = f"打印机状态 {state}"
+            elif error:
+                self._abort = f"打印错误 {error}"
+            elif state is not None:
+                self._hold = state in _HOLD_STATES
+            self._cond.notify_all()
+
+    def _wait_window(self, limit: int, hold: bool = True):
+        """等待未确认负载数 < limit (需持有锁)，累计等待时间"""
+        start = time.monotonic()
+        while self._abort is None and ((hold and self._hold) or len(self._in_flight) >= limit):
+            now = time.monotonic()
+            expired = [s for s, deadline in self._in_flight.items() if now >= deadline]
+            if expired:
+                self.stats.timeouts += len(expired)
+                self._abort = f"G-code 确认超时 ({len(expired)} 个负载未确认)"
+                break
+
+            timeout = None
+            if self._in_flight:
+                timeout = max(min(self._in_flight.values()) - now, 0.0)
+            self._cond.wait(timeout if timeout is not None else 0.5)
+        self.stats.stall_time += time.monotonic() - start
+
+    # ========================================
+    # 发送
+    # ========================================
+
+    def stream(self, source: Union[str, Iterable[str]]) -> StreamStats:
+        """
+        流式发送 G-code
+
+        Args:
+            source: G-code 文件路径，或逐行产出 G-code 的迭代器 (惰性读取)
+
+        返回发送统计；stats.aborted 非空表示中途停止
+        """
+        self.stats = StreamStats()
+        self._abort = None
+        self.client.add_state_listener(self._on_state)
+        start = time.monotonic()
+
+        try:
+            for chunk in self._chunks(iter_gcode_lines(source)):
+                with self._cond:
+                    self._wait_window(self.window)
+                    if self._abort is not None:
+                        break
+                    sequence_id = self.commands._seq()
+                    self.client.expect_reply(sequence_id, "gcode_line", self._on_reply(sequence_id))
+                    self._in_flight[sequence_id] = time.monotonic() + self.ack_timeout
+
+                payload = self._spec.render({"gcode": "\n".join(chunk) + "\n"}, sequence_id)
+                if self.client.publish(payload) is None:
+                    with self._cond:
+                        self._abort = "发送失败"
+                        self._cond.notify_all()
+                    break
+
+                self.stats.lines += len(chunk)
+                self.stats.chunks += 1
+                self.stats.elapsed = time.monotonic() - start
+                if self.progress_callback:
+                    self.progress_callback(self.stats)
+
+            with self._cond:
+                self._wait_window(1, hold=False)
+        finally:
+            self.client.remove_state_listener(self._on_state)
+            with self._cond:
+                for sequence_id in self._in_flight:
+                    self.client.cancel_reply(sequence_id)
+                self._in_flight.clear()
+
+        self.stats.aborted = self._abort
+        self.stats.elapsed = time.monotonic() - start
+        return self.stats
@@ -0,0 +1,104 @@
+"""
+预编译命令模板
+把命令 JSON 预先拆成字节片段，发送时只拼接参数和 sequence_id，
+不构建中间字典，也不调用 json.dumps
+输出与 json.dumps(command).encode() 逐字节一致
+"""
+
+import json
+import math
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def _encode_str(value: Any) -> str:
+    if type(value) is str:
+        return encode_basestring_ascii(value)
+    return json.dumps(value)
+
+
+def _encode_int(value: Any) -> str:
+    if type(value) is int:
+        return int.__repr__(value)
+    return json.dumps(value)
+
+
+def _encode_float(value: Any) -> str:
+    if type(value) is float and math.isfinite(value):
+        return float.__repr__(value)
+    if type(value) is int:
+        return int.__repr__(value)
+    return json.dumps(value)
+
+
+def _encode_bool(value: Any) -> str:
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    return json.dumps(value)
+
+
+# 参数槽类型 -> 编码函数；类型不符时回退到 json.dumps，保证输出一致
+_ENCODERS: Dict[Any, Callable[[Any], str]] = {
+    str: _encode_str,
+    int: _encode_int,
+    float: _encode_float,
+    bool: _encode_bool,
+    "json": json.dumps,
+}
+
+
+class Slot:
+    """模板中的参数槽"""
+
+    def __init__(self, kind: Any = "json"):
+        if kind not in _ENCODERS:
+            raise ValueError(f"不支持的参数槽类型: {kind!r}")
+        self.kind = kind
+
+
+class CommandTemplate:
+    """预编译的命令模板
+
+    fields 为命名空间内的字段 (不含 command / sequence_id)，
+    值为 Slot 的字段在发送时填入，其余为常量
+    """
+
+    def __init__(self, namespace: str, command: str, fields: Dict[str, Any]):
+        self.namespace = namespace
+        self.command = command
+
+        markers = {}
+        body: Dict[str, Any] = {"command": command}
+        self._slots: List[Tuple[str, Callable[[Any], str]]] = []
+        for key, value in fields.items():
+            if isinstance(value, Slot):
+                marker = f"\x00{len(self._slots)}\x00"
+                markers[key] = marker
+                self._slots.append((key, _ENCODERS[value.kind]))
+                value = marker
+            body[key] = value
+        body["sequence_id"] = f"\x00{len(self._slots)}\x00"
+
+        encoded = json.dumps({namespace: body})
+
+        # 按槽位顺序切分出常量片段
+        self._parts: List[str] = []
+        for index in range(len(self._slots) + 1):
+            marker = json.dumps(f"\x00{index}\x00")
+            head, encoded = encoded.split(marker, 1)
+            self._parts.append(head)
+        self._parts.append(encoded)
+
+    def render(self, params: Dict[str, Any], sequence_id: str) -> bytes:
+        """填入参数和序列号，返回可直接发布的负载"""
+        parts = self._parts
+        out = [parts[0]]
+        index = 0
+        for index, (key, encode) in enumerate(self._slots, 1):
+            out.append(encode(params[key]))
+            out.append(parts[index])
+        out.append(encode_basestring_ascii(sequence_id))
+        out.append(parts[index + 1])
+        return "".join(out).encode()
@@ -0,0 +1,219 @@
+"""
+3MF 流式读取
+只读取压缩包的中央目录，按需打开单个成员；盘的 G-code 边解压边上传到打印机，
+内存占用约为一个传输块，不解压整个项目、不写临时文件
+"""
+
+import hashlib
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from dataclasses import dataclass, field
+from typing import IO, TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from .ftp import BambuFTP
+
+_PLATE_RE = re.compile(r"^Metadata/plate_(\d+)\.gcode$")
+
+
+@dataclass
+class PlateEntry:
+    """3MF 中一个已切片的盘"""
+    index: int
+    gcode: str                          # 成员名，如 Metadata/plate_1.gcode
+    size: int                           # 解压后字节数
+    compressed_size: int
+    md5: Optional[str] = None           # plate_N.gcode.md5 中记录的校验值
+    layout: Optional[str] = None        # plate_N.json
+    thumbnails: List[str] = field(default_factory=list)
+
+
+class _HashingReader:
+    """读取时计算 MD5 的文件对象包装"""
+
+    def __init__(self, f: IO[bytes]):
+        self._f = f
+        self.md5 = hashlib.md5()
+
+    def read(self, n: int = -1) -> bytes:
+        data = self._f.read(n)
+        self.md5.update(data)
+        return data
+
+
+class ThreeMFReader:
+    """3MF 项目的流式读取器
+
+    打开时只读取中央目录；成员内容在 open/iter_entry/upload_plate 时才解压
+
+    Args:
+        path: 本地 .3mf 文件
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        self._infos: Dict[str, zipfile.ZipInfo] = {i.filename: i for i in self._zip.infolist()}
+        self._plates: Optional[List[PlateEntry]] = None
+        self._slice_info: Optional[ET.Element] = None
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # ========================================
+    # 成员
+    # ========================================
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._infos)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._infos
+
+    def info(self, name: str) -> zipfile.ZipInfo:
+        try:
+            return self._infos[name]
+        except KeyError:
+            raise ValueError(f"3MF 中没有 {name}: {self.path}") from None
+
+    def open(self, name: str) -> IO[bytes]:
+        """打开成员 (增量解压)"""
+        return self._zip.open(self.info(name))
+
+    def read(self, name: str) -> bytes:
+        """读取整个成员 (只用于小的元数据文件)"""
+        with self.open(name) as f:
+            return f.read()
+
+    def iter_entry(self, name: str, chunk_size: int = 256 * 1024) -> Iterator[bytes]:
+        """逐块解压成员，每次最多 chunk_size 字节"""
+        with self.open(name) as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    # ========================================
+    # 盘和元数据
+    # ========================================
+
+    @property
+    def plates(self) -> List[PlateEntry]:
+        """已切片的盘 (按盘号排序)"""
+        if self._plates is None:
+            plates = []
+            for name, info in self._infos.items():
+                match = _PLATE_RE.match(name)
+                if not match:
+                    continue
+                index = int(match.group(1))
+                plate = PlateEntry(index, name, info.file_size, info.compress_size)
+                if name + ".md5" in self._infos:
+                    plate.md5 = self.read(name + ".md5").decode("ascii", "replace").strip().lower()
+                if f"Metadata/plate_{index}.json" in self._infos:
+                    plate.layout = f"Metadata/plate_{index}.json"
+                plate.thumbnails = sorted(
+                    n for n in self._infos
+                    if n.startswith("Metadata/") and n.endswith(".png")
+                    and re.search(rf"_{index}(?:_small)?\.png$", n)
+                )
+                plates.append(plate)
+            self._plates = sorted(plates, key=lambda p: p.index)
+        return self._plates
+
+    def plate(self, index: int) -> PlateEntry:
+        for plate in self.plates:
+            if plate.index == index:
+                return plate
+        raise ValueError(f"3MF 中没有已切片的第 {index} 盘: {self.path}")
+
+    @property
+    def slice_info(self) -> Optional[ET.Element]:
+        """Metadata/slice_info.config 的根元素 (未切片时为 None)"""
+        if self._slice_info is None and "Metadata/slice_info.config" in self._infos:
+            with self.open("Metadata/slice_info.config") as f:
+                self._slice_info = ET.parse(f).getroot()
+        return self._slice_info
+
+    def plate_info(self, index: int) -> Optional[ET.Element]:
+        """slice_info.config 中某一盘的 <plate> 元素"""
+        root = self.slice_info
+        if root is None:
+            return None
+        for element in root.iter("plate"):
+            value = next((m.get("value") for m in element.iter("metadata") if m.get("key") == "index"), None)
+            if value is not None and int(value) == index:
+                return element
+        return None
+
+    def plate_metadata(self, index: int) -> Dict[str, str]:
+        """某一盘的 <metadata key=... value=...> (预计时间、耗材重量等)"""
+        element = self.plate_info(index)
+        if element is None:
+            return {}
+        return {m.get("key"): m.get("value") for m in element.findall("metadata")}
+
+    def plate_layout(self, index: int) -> dict:
+        """plate_N.json (对象包围盒等)，没有时为空字典"""
+        layout = f"Metadata/plate_{index}.json"
+        return json.loads(self.read(layout)) if layout in self._infos else {}
+
+    # ========================================
+    # 上传
+    # ========================================
+
+    def upload_plate(
+        self,
+        ftp: "BambuFTP",
+        index: int = 1,
+        remote_path: Optional[str] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        verify: bool = True
+    ) -> Optional[str]:
+        """
+        把一个盘的 G-code 边解压边上传到打印机
+
+        Args:
+            ftp: 已连接的 BambuFTP
+            index: 盘号
+            remote_path: 远程路径 (默认为 /cache/<项目名>_plate_<盘号>.gcode)
+            progress_callback: 进度回调函数 (已上传字节, 总字节)
+            verify: 3MF 带有 plate_N.gcode.md5 时校验，不一致则删除远程文件
+
+        Returns:
+            远程路径，失败时为 None
+        """
+        plate = self.plate(index)
+        if remote_path is None:
+            stem = os.path.basename(self.path)
+            for suffix in (".gcode.3mf", ".3mf"):
+                if stem.lower().endswith(suffix):
+                    stem = stem[:-len(suffix)]
+                    break
+            remote_path = f"/cache/{stem}_plate_{index}.gcode"
+
+        callback = None
+        if progress_callback is not None:
+            callback = lambda done: progress_callback(done, plate.size)
+
+        with self.open(plate.gcode) as f:
+            reader = _HashingReader(f)
+            if not ftp.upload_stream(reader, remote_path, callback):
+                return None
+
+        if verify and plate.md5 and reader.md5.hexdigest() != plate.md5:
+            print(f"校验失败: {plate.gcode} 的 MD5 与 3MF 中记录的不一致")
+            ftp.delete_file(remote_path)
+            return None
+        return remote_path
@@ -0,0 +1,226 @@
+"""
+空走轨迹与测试图案生成
+形状 (多边形、圆、螺旋、光栅、探测网格) 以 NumPy 坐标数组表示，
+在 H2S 打印空间边界处截断、合并共线段后一次生成紧凑的 G-code 批
+
+依赖 numpy
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# H2S 打印空间 (X, Y, Z)，与 demos/demo_square.py 的热床尺寸一致
+BUILD_VOLUME = (256.0, 256.0, 256.0)
+# 空走的最低安全高度
+MIN_SAFE_Z = 10.0
+
+Point = Tuple[float, float]
+
+
+# ========================================
+# 形状
+# ========================================
+
+def polygon(center: Point, radius: float, sides: int, rotation: float = 0.0) -> np.ndarray:
+    """正多边形顶点 (闭合，首尾相同)，rotation 为角度"""
+    if sides < 3:
+        raise ValueError(f"sides 必须 >= 3: {sides}")
+    angles = np.deg2rad(rotation) + np.linspace(0.0, 2 * np.pi, sides + 1)
+    points = np.column_stack((np.cos(angles), np.sin(angles))) * radius + center
+    points[-1] = points[0]
+    return points
+
+
+def rectangle(center: Point, width: float, height: float) -> np.ndarray:
+    """矩形 (闭合)，从左下角开始逆时针"""
+    half = np.array([width, height]) / 2
+    signs = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1], [-1, -1]], dtype=float)
+    return signs * half + center
+
+
+def square(center: Point, size: float) -> np.ndarray:
+    """正方形 (闭合)，从左下角开始逆时针"""
+    return rectangle(center, size, size)
+
+
+def circle(center: Point, radius: float, segments: int = 64) -> np.ndarray:
+    """圆 (以正多边形逼近，闭合)"""
+    return polygon(center, radius, segments)
+
+
+def spiral(
+    center: Point,
+    start_radius: float,
+    end_radius: float,
+    turns: float,
+    segments_per_turn: int = 64
+) -> np.ndarray:
+    """阿基米德螺旋线"""
+    count = max(2, int(np.ceil(turns * segments_per_turn)) + 1)
+    t = np.linspace(0.0, 1.0, count)
+    angles = t * turns * 2 * np.pi
+    radii = start_radius + (end_radius - start_radius) * t
+    return np.column_stack((np.cos(angles), np.sin(angles))) * radii[:, None] + center
+
+
+def raster(origin: Point, width: float, height: float, spacing: float, axis: str = "x") -> np.ndarray:
+    """蛇形光栅填充，axis 为扫描方向"""
+    if spacing <= 0:
+        raise ValueError(f"spacing 必须 > 0: {spacing}")
+    across = height if axis == "x" else width
+    offsets = np.arange(0.0, across + 1e-9, spacing)
+    # 每行两个端点，奇数行反向
+    starts = np.zeros_like(offsets)
+    ends = np.full_like(offsets, width if axis == "x" else height)
+    odd = np.arange(offsets.size) % 2 == 1
+    starts[odd], ends[odd] = ends[odd], starts[odd].copy()
+
+    along = np.column_stack((starts, ends)).ravel()
+    cross = np.repeat(offsets, 2)
+    points = np.column_stack((along, cross) if axis == "x" else (cross, along))
+    return points + origin
+
+
+def probe_grid(origin: Point, width: float, height: float, nx: int, ny: int) -> np.ndarray:
+    """床面探测网格点 (蛇形顺序，减少空走)"""
+    if nx < 1 or ny < 1:
+        raise ValueError("nx 和 ny 必须 >= 1")
+    xs = np.linspace(0.0, width, nx) if nx > 1 else np.array([width / 2])
+    ys = np.linspace(0.0, height, ny) if ny > 1 else np.array([height / 2])
+    grid_x = np.tile(xs, (ny, 1))
+    grid_x[1::2] = grid_x[1::2, ::-1]
+    grid_y = np.repeat(ys, nx).reshape(ny, nx)
+    return np.column_stack((grid_x.ravel(), grid_y.ravel())) + origin
+
+
+# ========================================
+# 处理
+# ========================================
+
+def clip_to_volume(
+    points: np.ndarray,
+    volume: Sequence[float] = BUILD_VOLUME,
+    margin: float = 5.0
+) -> List[np.ndarray]:
+    """
+    把折线裁剪到打印空间内 (留出 margin 边距)
+
+    每段在边界处截断 (Liang-Barsky)，离开打印空间的部分被去掉，
+    折线在出界处断开，返回各段仍在空间内的子路径；不会把点压到边界上改变形状
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    low = np.full(2, margin)
+    high = np.asarray(volume[:2], dtype=float) - margin
+    if len(points) < 2:
+        inside = np.all((points >= low) & (points <= high), axis=1)
+        return [points] if inside.any() else []
+
+    start = points[:-1]
+    delta = np.diff(points, axis=0)
+    moving = delta != 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_low = np.where(moving, (low - start) / delta, -np.inf)
+        t_high = np.where(moving, (high - start) / delta, np.inf)
+    # 不沿某轴移动的段，该轴坐标在范围外时整段不可见
+    outside = ~moving & ((start < low) | (start > high))
+    enter = np.maximum(np.minimum(t_low, t_high).max(axis=1), 0.0)
+    leave = np.minimum(np.maximum(t_low, t_high).min(axis=1), 1.0)
+    visible = (enter <= leave) & ~outside.any(axis=1)
+
+    index = np.nonzero(visible)[0]
+    if index.size == 0:
+        return []
+    heads = start[index] + delta[index] * enter[index, None]
+    tails = start[index] + delta[index] * leave[index, None]
+
+    # 前一段不可见、从外面进入、或前一段中途出界时开始新的子路径
+    previous_leave = np.concatenate(([1.0], leave[:-1]))[index]
+    breaks = ~np.concatenate(([False], visible[:-1]))[index] | (enter[index] > 0) | (previous_leave < 1)
+    firsts = np.nonzero(breaks)[0]
+    return [
+        np.vstack((heads[first:first + 1], piece))
+        for first, piece in zip(firsts, np.split(tails, firsts[1:]))
+    ]
+
+
+def merge_collinear(points: np.ndarray, tolerance: float = 1e-6) -> np.ndarray:
+    """去掉共线且同向的中间点以及重复点"""
+    if len(points) < 3:
+        return points
+
+    # 去掉连续重复点
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = np.any(np.abs(np.diff(points, axis=0)) > tolerance, axis=1)
+    points = points[keep]
+    if len(points) < 3:
+        return points
+
+    a = points[1:-1] - points[:-2]
+    b = points[2:] - points[1:-1]
+    cross = a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+    dot = np.einsum("ij,ij->i", a, b)
+    scale = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    interior = (np.abs(cross) <= tolerance * np.maximum(scale, 1.0)) & (dot > 0)
+
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:-1] = ~interior
+    return points[keep]
+
+
+def _fmt(value: float) -> str:
+    text = f"{value:.3f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+def to_gcode(
+    points: np.ndarray,
+    z: float = 50.0,
+    feedrate: float = 2000.0,
+    travel_feedrate: Optional[float] = None,
+    volume: Sequence[float] = BUILD_VOLUME
+) -> List[str]:
+    """
+    生成空走 G-code (不挤出)
+
+    Args:
+        points: (N, 2) XY 坐标，超出打印空间的部分被截掉，路径在出界处断开
+        z: 运动高度，不低于 MIN_SAFE_Z、不高于打印空间
+        feedrate: 轨迹进给速度 (mm/min)
+        travel_feedrate: 抬升和移动到 (各段) 起点的速度，默认与 feedrate 相同
+
+    先以 G90 切换到绝对坐标 (不挤出，不涉及 E 轴模式)，再抬升到安全高度、
+    移动到起点，之后只输出变化的坐标
+    """
+    z = min(max(z, MIN_SAFE_Z), volume[2])
+    pieces = [merge_collinear(piece) for piece in clip_to_volume(points, volume)]
+    travel = travel_feedrate or feedrate
+
+    lines = ["G90", f"G1 Z{_fmt(z)} F{_fmt(travel)}"]
+    prev = None
+    for path in pieces:
+        start = (_fmt(path[0][0]), _fmt(path[0][1]))
+        if start != prev:
+            lines.append(f"G1 X{start[0]} Y{start[1]}" + ("" if travel == feedrate else f" F{_fmt(travel)}"))
+        first = travel != feedrate
+        prev = start
+        for x, y in path[1:]:
+            cur = (_fmt(x), _fmt(y))
+            words = ["G1"]
+            if cur[0] != prev[0]:
+                words.append("X" + cur[0])
+            if cur[1] != prev[1]:
+                words.append("Y" + cur[1])
+            if len(words) == 1:
+                continue
+            if first:
+                words.append(f"F{_fmt(feedrate)}")
+                first = False
+            lines.append(" ".join(words))
+            prev = cur
+    return lines
+
+
+def to_batch(points: np.ndarray, **kwargs) -> str:
+    """生成一条 gcode_line 可直接发送的 G-code 批 (换行分隔)"""
+    return "\n".join(to_gcode(points, **kwargs)) + "\n"
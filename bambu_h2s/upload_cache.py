@@ -0,0 +1,213 @@
+"""
+内容寻址的上传缓存
+按文件内容哈希记录已上传到各打印机的位置 (远程路径、大小、修改时间)，
+上传前用 SIZE/MDTM 廉价校验，内容已在打印机上时跳过传输
+
+索引保存在 SQLite (WAL 模式)，多个进程可同时使用
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .ftp import BambuFTP
+
+# 默认索引位置
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "bambu_h2s", "uploads.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    printer TEXT NOT NULL,
+    remote_path TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime TEXT,
+    uploaded_at REAL NOT NULL,
+    PRIMARY KEY (printer, remote_path)
+);
+CREATE INDEX IF NOT EXISTS uploads_digest ON uploads (digest, printer);
+CREATE TABLE IF NOT EXISTS local_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+"""
+
+
+def file_digest(local_path: str) -> str:
+    """文件内容 SHA-256 (不缓存)"""
+    h = hashlib.sha256()
+    buffer = bytearray(1024 * 1024)
+    with open(local_path, "rb") as f, memoryview(buffer) as view:
+        while True:
+            n = f.readinto(view)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+class UploadCache:
+    """上传缓存
+
+    Args:
+        path: SQLite 索引文件路径
+        timeout: 等待其他进程释放写锁的秒数
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # 每次操作一个连接，线程和进程之间不共享
+        db = sqlite3.connect(self.path, timeout=self.timeout)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    # ========================================
+    # 哈希
+    # ========================================
+
+    def digest(self, local_path: str) -> str:
+        """文件内容 SHA-256；按 (路径, 大小, 修改时间) 缓存，文件未变时不重新计算"""
+        path = os.path.abspath(local_path)
+        st = os.stat(path)
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT digest FROM local_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, st.st_size, st.st_mtime_ns)
+            ).fetchone()
+        if row:
+            return row[0]
+
+        digest = file_digest(path)
+
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO local_hashes VALUES (?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime_ns, digest)
+            )
+        return digest
+
+    # ========================================
+    # 索引
+    # ========================================
+
+    @staticmethod
+    def printer_key(ftp: "BambuFTP") -> str:
+        return f"{ftp.ip}:{ftp.port}"
+
+    def lookup(self, printer: str, digest: str) -> List[Tuple[str, int, Optional[str]]]:
+        """已知的副本 [(远程路径, 大小, MDTM)]，最近上传的在前"""
+        with self._connect() as db:
+            return db.execute(
+                "SELECT remote_path, size, mtime FROM uploads WHERE printer = ? AND digest = ? "
+                "ORDER BY uploaded_at DESC",
+                (printer, digest)
+            ).fetchall()
+
+    def record(self, printer: str, remote_path: str, digest: str, size: int, mtime: Optional[str]):
+        """记录一次上传 (同一路径的旧记录被覆盖)"""
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO uploads VALUES (?, ?, ?, ?, ?, ?)",
+                (printer, remote_path, digest, size, mtime, time.time())
+            )
+
+    def touch(self, printer: str, remote_path: str):
+        """标记为刚使用过 (LRU 淘汰按 uploaded_at 排序)"""
+        with self._connect() as db:
+            db.execute(
+                "UPDATE uploads SET uploaded_at = ? WHERE printer = ? AND remote_path = ?",
+                (time.time(), printer, remote_path)
+            )
+
+    def entries(self, printer: str) -> List[Tuple[str, int, float]]:
+        """该打印机上记录的文件 [(远程路径, 大小, 最近使用时间)]，最久未用的在前"""
+        with self._connect() as db:
+            return db.execute(
+                "SELECT remote_path, size, uploaded_at FROM uploads WHERE printer = ? "
+                "ORDER BY uploaded_at ASC",
+                (printer,)
+            ).fetchall()
+
+    def forget(self, printer: str, remote_path: Optional[str] = None):
+        """删除记录 (remote_path 为 None 时删除该打印机的全部记录)"""
+        with self._connect() as db:
+            if remote_path is None:
+                db.execute("DELETE FROM uploads WHERE printer = ?", (printer,))
+            else:
+                db.execute(
+                    "DELETE FROM uploads WHERE printer = ? AND remote_path = ?",
+                    (printer, remote_path)
+                )
+
+    def _verify(self, ftp: "BambuFTP", remote_path: str, size: int, mtime: Optional[str]) -> bool:
+        """用 SIZE 和 MDTM 确认远程文件仍是记录时的那一份"""
+        if ftp.get_size(remote_path) != size:
+            return False
+        return mtime is None or ftp.get_mtime(remote_path) == mtime
+
+    # ========================================
+    # 上传
+    # ========================================
+
+    def upload(
+        self,
+        ftp: "BambuFTP",
+        local_path: str,
+        remote_path: Optional[str] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Optional[str]:
+        """
+        上传文件，内容已在打印机上时跳过
+
+        Args:
+            ftp: 已连接的 BambuFTP
+            local_path: 本地文件路径
+            remote_path: 目标路径；为 None 时接受打印机上任意位置的相同内容，
+                         没有时上传到 /cache/<文件名>
+            progress_callback: 进度回调函数 (已上传字节, 总字节)
+
+        Returns:
+            内容所在的远程路径，失败时为 None
+        """
+        if not os.path.exists(local_path):
+            print(f"文件不存在: {local_path}")
+            return None
+
+        printer = self.printer_key(ftp)
+        digest = self.digest(local_path)
+
+        for path, size, mtime in self.lookup(printer, digest):
+            if remote_path is not None and path != remote_path:
+                continue
+            if self._verify(ftp, path, size, mtime):
+                print(f"跳过上传: {local_path} 已在打印机 {path}")
+                self.touch(printer, path)
+                return path
+            # 远程文件已被删除或覆盖
+            self.forget(printer, path)
+
+        target = remote_path or f"/cache/{os.path.basename(local_path)}"
+        if not ftp.upload_file(local_path, target, progress_callback):
+            return None
+
+        self.record(printer, target, digest, os.path.getsize(local_path), ftp.get_mtime(target))
+        return target
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+FTPS 传输吞吐基准
+对比 ftplib 默认路径 (8 KB 块、每块一次回调) 和 BambuFTP 大块 mmap 传输，
+输出 MB/s 和每 MB 的客户端 CPU 耗时
+
+默认在本机启动一个 FTPS 替身服务器 (需要 pyftpdlib、pyopenssl 和 openssl 命令)，
+也可以用 --host 指向真实打印机
+
+用法:
+    python3 bench_ftp.py                         # 本地替身，64 MB
+    python3 bench_ftp.py --size-mb 256 -n 5
+    python3 bench_ftp.py --host 192.168.31.58 --code 5c910619 --port 990
+"""
+
+import argparse
+import ftplib
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from bambu_h2s.ftp import BambuFTP
+
+# 本地替身服务器 (子进程中运行，避免服务端 CPU 计入客户端)
+SERVER = """
+import logging
+import sys
+logging.basicConfig(level=logging.WARNING)
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.handlers import TLS_FTPHandler
+from pyftpdlib.servers import FTPServer
+port, root, cert, code = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4]
+authorizer = DummyAuthorizer()
+authorizer.add_user("bblp", code, root, perm="elradfmwMT")
+handler = TLS_FTPHandler
+handler.certfile = cert
+handler.authorizer = authorizer
+handler.tls_control_required = True
+handler.tls_data_required = True
+FTPServer(("127.0.0.1", int(port)), handler).serve_forever()
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_standin(workdir: str, code: str) -> tuple:
+    """启动本地 FTPS 替身，返回 (进程, 端口)"""
+    cert = os.path.join(workdir, "cert.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", cert, "-out", cert],
+        check=True,
+        capture_output=True
+    )
+    root = os.path.join(workdir, "root")
+    os.makedirs(os.path.join(root, "cache"))
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, "-c", SERVER, str(port), root, cert, code])
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc, port
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("FTPS 替身服务器启动失败")
+
+
+def measure(func) -> tuple:
+    """返回 (墙钟秒, 客户端 CPU 秒)"""
+    wall, cpu = time.perf_counter(), time.process_time()
+    func()
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+
+def bench_baseline(ftp: BambuFTP, path: str, remote: str):
+    """原实现: storbinary 8 KB 块，每块一次回调"""
+    done = [0]
+
+    def callback(data):
+        done[0] += len(data)
+
+    with open(path, "rb") as f:
+        ftp._ftp.storbinary(f"STOR {remote}", f, blocksize=8192, callback=callback)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FTPS 传输吞吐基准")
+    parser.add_argument("--host", help="FTPS 服务器地址 (默认启动本地替身)")
+    parser.add_argument("--port", type=int, default=990)
+    parser.add_argument("--code", default="benchcode", help="访问码")
+    parser.add_argument("--size-mb", type=int, default=64, help="测试文件大小 (MB)")
+    parser.add_argument("-n", type=int, default=3, help="每种模式重复次数")
+    parser.add_argument("--blocks", default="64,256,1024", help="大块模式的块大小列表 (KB)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        proc = None
+        host, port = args.host, args.port
+        if host is None:
+            proc, port = start_standin(workdir, args.code)
+            host = "127.0.0.1"
+
+        path = os.path.join(workdir, "payload.bin")
+        with open(path, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+        size_mb = os.path.getsize(path) / 1e6
+        remote = "/cache/bench_payload.bin"
+
+        modes = [("ftplib 8 KB", None)]
+        modes += [(f"mmap {kb} KB", kb * 1024) for kb in map(int, args.blocks.split(","))]
+
+        try:
+            print(f"{'模式':<14}{'MB/s':>10}{'CPU ms/MB':>12}")
+            for name, block in modes:
+                ftp = BambuFTP(host, args.code, port=port, block_size=block or 8192)
+                if not ftp.connect():
+                    return 1
+                walls, cpus = [], []
+                for _ in range(args.n):
+                    if block is None:
+                        wall, cpu = measure(lambda: bench_baseline(ftp, path, remote))
+                    else:
+                        wall, cpu = measure(lambda: ftp.upload_file(path, remote, lambda d, t: None))
+                    walls.append(wall)
+                    cpus.append(cpu)
+                ftp.delete_file(remote)
+                ftp.disconnect()
+
+                wall, cpu = statistics.median(walls), statistics.median(cpus)
+                print(f"{name:<14}{size_mb / wall:>10.1f}{cpu * 1000 / size_mb:>12.2f}")
+        except ftplib.all_errors as e:
+            print(f"传输失败: {e}")
+            return 1
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+包导入耗时基准
+测量 `import bambu_h2s` 和 `from bambu_h2s.ftp import BambuFTP` 的启动开销，
+并检查是否误导入重量级依赖
+
+用法:
+    python3 bench_import.py              # 默认 20 次
+    python3 bench_import.py -n 50 --budget-ms 15 --ftp-budget-ms 40
+返回码非 0 表示超出预算或出现了急切导入
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# 导入包后不应出现在 sys.modules 中的模块
+HEAVY_MODULES = ["paho.mqtt.client", "ssl", "ftplib", "http.server"]
+
+# 导入 FTP 客户端时不应加载的模块 (ftplib/ssl 是必需的，其余按需导入)
+FTP_HEAVY_MODULES = ["paho.mqtt.client", "typing", "dataclasses", "json", "mmap", "calendar"]
+
+PROBE = """
+import sys, time
+t0 = time.perf_counter()
+{statement}
+t1 = time.perf_counter()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(f"{{(t1 - t0) * 1000:.3f}} {{','.join(heavy)}}")
+"""
+
+
+def run_once(statement: str = "import bambu_h2s", heavy_modules: list = HEAVY_MODULES) -> tuple:
+    """在新解释器中执行一次导入语句，返回 (毫秒, 被导入的重量级模块)"""
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(statement=statement, heavy=heavy_modules)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout.split()
+    heavy = out[1].split(",") if len(out) > 1 else []
+    return float(out[0]), heavy
+
+
+def bench(statement: str, heavy_modules: list, n: int, budget_ms: float) -> bool:
+    """重复测量一条导入语句，打印结果，返回是否通过"""
+    times = []
+    heavy = set()
+    for _ in range(n):
+        ms, loaded = run_once(statement, heavy_modules)
+        times.append(ms)
+        heavy.update(loaded)
+
+    median = statistics.median(times)
+    print(f"{statement}: 中位数 {median:.3f} ms, 最小 {min(times):.3f} ms, 最大 {max(times):.3f} ms ({n} 次)")
+
+    ok = True
+    if heavy:
+        print(f"❌ 急切导入了重量级模块: {', '.join(sorted(heavy))}")
+        ok = False
+    if median > budget_ms:
+        print(f"❌ 超出预算 {budget_ms} ms")
+        ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bambu_h2s 导入耗时基准")
+    parser.add_argument("-n", type=int, default=20, help="重复次数")
+    parser.add_argument("--budget-ms", type=float, default=10.0, help="中位数耗时上限 (毫秒)")
+    parser.add_argument("--ftp-budget-ms", type=float, default=35.0,
+                        help="导入 BambuFTP 的中位数耗时上限 (毫秒，含 ftplib/ssl)")
+    args = parser.parse_args()
+
+    failed = not bench("import bambu_h2s", HEAVY_MODULES, args.n, args.budget_ms)
+    failed |= not bench("from bambu_h2s.ftp import BambuFTP", FTP_HEAVY_MODULES, args.n, args.ftp_budget_ms)
+    if not failed:
+        print("✅ 通过")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,10 +12,13 @@
 
 import sys
 import os
+import math
 import time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from bambu_h2s import BambuClient, BambuCommands
+from bambu_h2s import toolpath
+from bambu_h2s.motion import MotionEstimator
 
 PRINTER_IP = "192.168.31.58"
 ACCESS_CODE = "5c910619"
@@ -40,6 +43,12 @@ def confirm(msg):
     return True
 
 
+def wait_for_move(estimator, gcode, position, msg="移动中"):
+    """按运动时间估算等待，多留 1 秒余量"""
+    seconds = estimator.estimate_line(gcode, position=position)
+    wait_with_countdown(math.ceil(seconds) + 1, f"{msg} (预计 {seconds:.1f}s)")
+
+
 def wait_with_countdown(seconds, msg="等待"):
     """带倒计时的等待"""
     print(f"   {msg}...", end="", flush=True)
@@ -69,14 +78,9 @@ def draw_square_in_air():
     print("└─────────────────────────────────────────────────────────┘")
     print()
 
-    # 计算正方形四个角的坐标
-    half = SQUARE_SIZE / 2
-    corners = [
-        (CENTER_X - half, CENTER_Y - half),  # 左下 (起点)
-        (CENTER_X + half, CENTER_Y - half),  # 右下
-        (CENTER_X + half, CENTER_Y + half),  # 右上
-        (CENTER_X - half, CENTER_Y + half),  # 左上
-    ]
+    # 生成正方形轨迹: 左下 (起点) → 右下 → 右上 → 左上 → 左下
+    path = toolpath.square((CENTER_X, CENTER_Y), SQUARE_SIZE)
+    corners = [(float(x), float(y)) for x, y in path[:4]]
 
     print("📐 正方形顶点坐标:")
     print(f"   ┌─────────────────────────────┐")
@@ -196,17 +200,19 @@ def draw_square_in_air():
         print("━" * 60)
         print("步骤 4/5: 绘制正方形")
         print("━" * 60)
-        print("   将依次移动到 4 个角点，形成正方形轨迹")
+        print("   4 条边合并为一条 G-code 批一次发送")
 
         if not confirm("开始绘制正方形？"):
             client.disconnect()
             return
 
-        corner_names = ["右下", "右上", "左上", "左下(回起点)"]
-        for i, (x, y) in enumerate(corners[1:] + [corners[0]]):
-            print(f"   📍 边 {i+1}/4: 移动到{corner_names[i]} X={x}, Y={y}")
-            cmd.gcode_line(f"G1 X{x} Y{y} F{MOVE_SPEED}")
-            wait_with_countdown(2, "移动中")
+        estimator = MotionEstimator()
+        batch = toolpath.to_batch(path, z=SAFE_Z_HEIGHT, feedrate=MOVE_SPEED)
+        for line in batch.splitlines():
+            print(f"   📍 {line}")
+        cmd.gcode_line(batch)
+        wait_for_move(estimator, batch, (x0, y0, SAFE_Z_HEIGHT), "绘制中")
+        position = (x0, y0, SAFE_Z_HEIGHT)
 
         print()
         print("   ✅ 正方形绘制完成!")
@@ -220,8 +226,9 @@ def draw_square_in_air():
         print("━" * 60)
 
         print(f"   🎯 移动到中心 X={CENTER_X}, Y={CENTER_Y}...")
-        cmd.gcode_line(f"G1 X{CENTER_X} Y{CENTER_Y} F{MOVE_SPEED}")
-        wait_with_countdown(3, "移动中")
+        gcode = f"G1 X{CENTER_X} Y{CENTER_Y} F{MOVE_SPEED}"
+        cmd.gcode_line(gcode)
+        wait_for_move(estimator, gcode, position)
 
         # 完成
         print()
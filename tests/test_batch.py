@@ -0,0 +1,98 @@
+"""
+批量命令流水线测试
+假打印机: 拦截 publish，按需从 report 主题回复
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from bambu_h2s.client import BambuClient
+from bambu_h2s.commands import BambuCommands
+
+
+class _Message:
+    def __init__(self, topic: str, payload: dict):
+        self.topic = topic
+        self.payload = json.dumps(payload).encode()
+
+
+class FakePrinter:
+    """publish 后按 respond(section) 的返回值回复；返回 None 表示不回复"""
+
+    def __init__(self, respond=None, delay: float = 0.0):
+        self.client = BambuClient("127.0.0.1", "code", serial="SERIAL")
+        self.client.publish = self.publish
+        self.respond = respond or (lambda section: "success")
+        self.delay = delay
+        self.sent = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def publish(self, payload):
+        section = next(iter(json.loads(payload).values()))
+        self.sent.append(section)
+        # 订阅了 "#"，自己发出的请求也会收到，不能当作回复
+        self.client._on_message(None, None, _Message("device/SERIAL/request", json.loads(payload)))
+        result = self.respond(section)
+        if result is None:
+            return {"status": "sent"}
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        def reply():
+            time.sleep(self.delay)
+            with self._lock:
+                self.in_flight -= 1
+            body = dict(section)
+            if result != "-":
+                body["result"] = result
+            self.client._on_message(None, None, _Message("device/SERIAL/report", {"print": body}))
+
+        threading.Thread(target=reply, daemon=True).start()
+        return {"status": "sent"}
+
+
+def test_results_in_order():
+    outcomes = {"pause": "success", "resume": "FAIL", "stop": "-"}
+    printer = FakePrinter(lambda s: outcomes[s["command"]])
+    results = BambuCommands(printer.client).batch(["pause", "resume", "stop"])
+    assert [(r.name, r.status) for r in results] == [("pause", "success"), ("resume", "failed"), ("stop", "unknown")]
+    assert all(r.reply["sequence_id"] == r.sequence_id for r in results)
+
+
+def test_depth_limits_in_flight():
+    printer = FakePrinter(delay=0.02)
+    items = [("set_bed_temp", {"temp": t}) for t in range(10)]
+    results = BambuCommands(printer.client).batch(items, depth=3)
+    assert all(r.ok for r in results)
+    assert printer.max_in_flight <= 3
+
+
+def test_timeout_and_publish_error():
+    printer = FakePrinter(lambda s: None if s["command"] == "pause" else "success")
+    commands = BambuCommands(printer.client)
+    start = time.monotonic()
+    results = commands.batch(["pause", "resume"], timeout=0.2)
+    assert [r.status for r in results] == ["timeout", "success"]
+    assert time.monotonic() - start < 2
+    assert not printer.client._pending
+
+    printer.client.publish = lambda payload: None
+    assert [r.status for r in commands.batch(["stop"])] == ["error"]
+
+
+def test_invalid_params_send_nothing():
+    printer = FakePrinter()
+    with pytest.raises(ValueError):
+        BambuCommands(printer.client).batch([
+            ("set_fan", {"fan_index": 0, "speed": 50}),
+            ("set_fan", {"fan_index": 9, "speed": 1}),
+        ])
+    with pytest.raises(ValueError):
+        BambuCommands(printer.client).batch(["stop"], depth=0)
+    assert printer.sent == []
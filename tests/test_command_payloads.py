@@ -0,0 +1,194 @@
+"""
+注册表命令载荷测试
+与改为注册表生成之前手写的命令字典 (json.dumps 编码) 逐字节对照；
+下面的期望值是从手写实现冻结下来的字面量，不从注册表推导
+"""
+
+import pytest
+
+from bambu_h2s.registry import COMMANDS
+
+# (命令名, 参数, sequence_id, 期望载荷)
+# project_file 在改为注册表之后才加入，没有手写版本，期望值是它引入时写定的载荷
+PAYLOADS = [
+    ('ams_change_filament', {'ams_id': 255, 'slot_id': 255}, "1",
+     b'{"print": {"command": "ams_change_filament", "curr_temp": 220, "tar_temp": 220, "ams_id": 255, "target": 0, "slot_id": 255, "sequence_id": "1"}}'),
+    ('ams_change_filament', {'ams_id': 255, 'slot_id': 255, 'target': 255, 'curr_temp': 350, 'tar_temp': 350}, "1",
+     b'{"print": {"command": "ams_change_filament", "curr_temp": 350, "tar_temp": 350, "ams_id": 255, "target": 255, "slot_id": 255, "sequence_id": "1"}}'),
+    ('ams_control', {'action': 'abort'}, "1",
+     b'{"print": {"command": "ams_control", "param": "abort", "sequence_id": "1"}}'),
+    ('ams_filament_setting', {'ams_id': 255, 'slot_id': 255, 'tray_id': 255}, "1",
+     b'{"print": {"command": "ams_filament_setting", "ams_id": 255, "slot_id": 255, "tray_id": 255, "tray_info_idx": 0, "setting_id": "", "tray_color": "FFFFFFFF", "nozzle_temp_min": 190, "nozzle_temp_max": 230, "tray_type": "PLA", "sequence_id": "1"}}'),
+    ('ams_filament_setting', {'ams_id': 255, 'slot_id': 255, 'tray_id': 255, 'tray_type': 'tray_type-值', 'tray_color': 'tray_color-值', 'nozzle_temp_min': 350, 'nozzle_temp_max': 350, 'setting_id': 'setting_id-值'}, "1",
+     b'{"print": {"command": "ams_filament_setting", "ams_id": 255, "slot_id": 255, "tray_id": 255, "tray_info_idx": 0, "setting_id": "setting_id-\\u503c", "tray_color": "tray_color-\\u503c", "nozzle_temp_min": 350, "nozzle_temp_max": 350, "tray_type": "tray_type-\\u503c", "sequence_id": "1"}}'),
+    ('ams_get_rfid', {'ams_id': 255, 'slot_id': 255}, "1",
+     b'{"print": {"command": "ams_get_rfid", "ams_id": 255, "slot_id": 255, "sequence_id": "1"}}'),
+    ('ams_stop_dry', {}, "1",
+     b'{"print": {"command": "auto_stop_ams_dry", "sequence_id": "1"}}'),
+    ('ams_user_setting', {}, "1",
+     b'{"print": {"command": "ams_user_setting", "ams_id": -1, "startup_read_option": true, "tray_read_option": true, "calibrate_remain_flag": true, "sequence_id": "1"}}'),
+    ('ams_user_setting', {'ams_id': 255, 'startup_read': False, 'tray_read': False, 'calibrate_remain': False}, "1",
+     b'{"print": {"command": "ams_user_setting", "ams_id": 255, "startup_read_option": false, "tray_read_option": false, "calibrate_remain_flag": false, "sequence_id": "1"}}'),
+    ('back_to_center', {}, "1",
+     b'{"print": {"command": "back_to_center", "sequence_id": "1"}}'),
+    ('buzzer_off', {}, "1",
+     b'{"print": {"command": "buzzer_ctrl", "mode": 0, "sequence_id": "1"}}'),
+    ('calibration', {}, "1",
+     b'{"print": {"command": "calibration", "option": 127, "sequence_id": "1"}}'),
+    ('calibration', {'option': 127}, "1",
+     b'{"print": {"command": "calibration", "option": 127, "sequence_id": "1"}}'),
+    ('camera_record', {'enable': True}, "1",
+     b'{"camera": {"command": "ipcam_record_set", "control": "enable", "sequence_id": "1"}}'),
+    ('camera_resolution', {}, "1",
+     b'{"camera": {"command": "ipcam_resolution_set", "resolution": "1080p", "sequence_id": "1"}}'),
+    ('camera_resolution', {'resolution': '1080p'}, "1",
+     b'{"camera": {"command": "ipcam_resolution_set", "resolution": "1080p", "sequence_id": "1"}}'),
+    ('camera_timelapse', {'enable': True}, "1",
+     b'{"camera": {"command": "ipcam_timelapse", "control": "enable", "sequence_id": "1"}}'),
+    ('clean_print_error', {}, "1",
+     b'{"print": {"command": "clean_print_error", "subtask_id": "", "print_error": 0, "sequence_id": "1"}}'),
+    ('clean_print_error', {'subtask_id': 'subtask_id-值', 'print_error': 7}, "1",
+     b'{"print": {"command": "clean_print_error", "subtask_id": "subtask_id-\\u503c", "print_error": 7, "sequence_id": "1"}}'),
+    ('close_dialog', {}, "1",
+     b'{"system": {"command": "uiop", "name": "print_error", "action": "close", "source": 1, "type": "dialog", "err": "00000000", "sequence_id": "1"}}'),
+    ('close_dialog', {'name': 'name-值', 'error': '0300-8003'}, "1",
+     b'{"system": {"command": "uiop", "name": "name-\\u503c", "action": "close", "source": 1, "type": "dialog", "err": "0300-8003", "sequence_id": "1"}}'),
+    ('consistency_confirm', {}, "1",
+     b'{"upgrade": {"command": "consistency_confirm", "src_id": 1, "sequence_id": "1"}}'),
+    ('consistency_confirm', {'src_id': 7}, "1",
+     b'{"upgrade": {"command": "consistency_confirm", "src_id": 7, "sequence_id": "1"}}'),
+    ('extrusion_cali', {'tray_id': 255}, "1",
+     b'{"print": {"command": "extrusion_cali", "tray_id": 255, "nozzle_temp": 220, "bed_temp": 60, "max_volumetric_speed": 10.0, "sequence_id": "1"}}'),
+    ('extrusion_cali', {'tray_id': 255, 'nozzle_temp': 350, 'bed_temp': 120, 'max_volumetric_speed': 12.75}, "1",
+     b'{"print": {"command": "extrusion_cali", "tray_id": 255, "nozzle_temp": 350, "bed_temp": 120, "max_volumetric_speed": 12.75, "sequence_id": "1"}}'),
+    ('extrusion_cali_del', {'extruder_id': 1, 'nozzle_id': 'nozzle_id-值', 'filament_id': 'filament_id-值', 'cali_idx': 7}, "1",
+     b'{"print": {"command": "extrusion_cali_del", "extruder_id": 1, "nozzle_id": "nozzle_id-\\u503c", "filament_id": "filament_id-\\u503c", "cali_idx": 7, "nozzle_diameter": "0.4", "sequence_id": "1"}}'),
+    ('extrusion_cali_del', {'extruder_id': 1, 'nozzle_id': 'nozzle_id-值', 'filament_id': 'filament_id-值', 'cali_idx': 7, 'nozzle_diameter': '0.8'}, "1",
+     b'{"print": {"command": "extrusion_cali_del", "extruder_id": 1, "nozzle_id": "nozzle_id-\\u503c", "filament_id": "filament_id-\\u503c", "cali_idx": 7, "nozzle_diameter": "0.8", "sequence_id": "1"}}'),
+    ('extrusion_cali_get', {'filament_id': 'filament_id-值'}, "1",
+     b'{"print": {"command": "extrusion_cali_get", "filament_id": "filament_id-\\u503c", "nozzle_diameter": "0.4", "sequence_id": "1"}}'),
+    ('extrusion_cali_get', {'filament_id': 'filament_id-值', 'nozzle_diameter': '0.8'}, "1",
+     b'{"print": {"command": "extrusion_cali_get", "filament_id": "filament_id-\\u503c", "nozzle_diameter": "0.8", "sequence_id": "1"}}'),
+    ('extrusion_cali_get_result', {}, "1",
+     b'{"print": {"command": "extrusion_cali_get_result", "nozzle_diameter": "0.4", "sequence_id": "1"}}'),
+    ('extrusion_cali_get_result', {'nozzle_diameter': '0.8'}, "1",
+     b'{"print": {"command": "extrusion_cali_get_result", "nozzle_diameter": "0.8", "sequence_id": "1"}}'),
+    ('extrusion_cali_sel', {'tray_id': 255, 'ams_id': 255, 'slot_id': 255, 'cali_idx': 7, 'filament_id': 'filament_id-值'}, "1",
+     b'{"print": {"command": "extrusion_cali_sel", "tray_id": 255, "ams_id": 255, "slot_id": 255, "cali_idx": 7, "filament_id": "filament_id-\\u503c", "nozzle_diameter": "0.4", "sequence_id": "1"}}'),
+    ('extrusion_cali_sel', {'tray_id': 255, 'ams_id': 255, 'slot_id': 255, 'cali_idx': 7, 'filament_id': 'filament_id-值', 'nozzle_diameter': '0.8'}, "1",
+     b'{"print": {"command": "extrusion_cali_sel", "tray_id": 255, "ams_id": 255, "slot_id": 255, "cali_idx": 7, "filament_id": "filament_id-\\u503c", "nozzle_diameter": "0.8", "sequence_id": "1"}}'),
+    ('extrusion_cali_set', {'tray_id': 255, 'k_value': 12.75}, "1",
+     b'{"print": {"command": "extrusion_cali_set", "tray_id": 255, "k_value": 12.75, "n_coef": 1.4, "bed_temp": 60, "nozzle_temp": 220, "max_volumetric_speed": 10.0, "sequence_id": "1"}}'),
+    ('extrusion_cali_set', {'tray_id': 255, 'k_value': 12.75, 'n_coef': 12.75, 'nozzle_temp': 350, 'bed_temp': 120, 'max_volumetric_speed': 12.75}, "1",
+     b'{"print": {"command": "extrusion_cali_set", "tray_id": 255, "k_value": 12.75, "n_coef": 12.75, "bed_temp": 120, "nozzle_temp": 350, "max_volumetric_speed": 12.75, "sequence_id": "1"}}'),
+    ('flowrate_cali', {'tray_id': 255, 'filament_id': 'filament_id-值', 'setting_id': 'setting_id-值'}, "1",
+     b'{"print": {"command": "flowrate_cali", "tray_id": 255, "nozzle_diameter": "0.4", "filaments": [{"tray_id": 255, "bed_temp": 60, "filament_id": "filament_id-\\u503c", "setting_id": "setting_id-\\u503c", "nozzle_temp": 220, "def_flow_ratio": "1.0", "max_volumetric_speed": "10.0", "extruder_id": 0, "ams_id": 0, "slot_id": 0}], "sequence_id": "1"}}'),
+    ('flowrate_cali', {'tray_id': 255, 'filament_id': 'filament_id-值', 'setting_id': 'setting_id-值', 'nozzle_temp': 350, 'bed_temp': 120, 'max_volumetric_speed': 12.75, 'nozzle_diameter': '0.8'}, "1",
+     b'{"print": {"command": "flowrate_cali", "tray_id": 255, "nozzle_diameter": "0.8", "filaments": [{"tray_id": 255, "bed_temp": 120, "filament_id": "filament_id-\\u503c", "setting_id": "setting_id-\\u503c", "nozzle_temp": 350, "def_flow_ratio": "1.0", "max_volumetric_speed": "12.75", "extruder_id": 0, "ams_id": 0, "slot_id": 0}], "sequence_id": "1"}}'),
+    ('flowrate_get_result', {}, "1",
+     b'{"print": {"command": "flowrate_get_result", "nozzle_diameter": "0.4", "sequence_id": "1"}}'),
+    ('flowrate_get_result', {'nozzle_diameter': '0.8'}, "1",
+     b'{"print": {"command": "flowrate_get_result", "nozzle_diameter": "0.8", "sequence_id": "1"}}'),
+    ('gcode_file', {'file_path': '/sdcard/模型 "副本".3mf'}, "1",
+     b'{"print": {"command": "gcode_file", "param": "/sdcard/\\u6a21\\u578b \\"\\u526f\\u672c\\".3mf", "sequence_id": "1"}}'),
+    ('gcode_line', {'gcode': 'G1 X10 Y20 F3000\nM400'}, "1",
+     b'{"print": {"command": "gcode_line", "param": "G1 X10 Y20 F3000\\nM400", "sequence_id": "1"}}'),
+    ('get_access_code', {}, "1",
+     b'{"system": {"command": "get_access_code", "sequence_id": "1"}}'),
+    ('get_version', {}, "1",
+     b'{"info": {"command": "get_version", "sequence_id": "1"}}'),
+    ('ignore_error', {'error': '0300-8003'}, "1",
+     b'{"print": {"command": "ignore", "err": "0300-8003", "param": "reserve", "job_id": "", "sequence_id": "1"}}'),
+    ('ignore_error', {'error': '0300-8003', 'job_id': 'job_id-值'}, "1",
+     b'{"print": {"command": "ignore", "err": "0300-8003", "param": "reserve", "job_id": "job_id-\\u503c", "sequence_id": "1"}}'),
+    ('light', {'mode': 'flashing'}, "1",
+     b'{"system": {"command": "ledctrl", "led_node": "chamber_light", "led_mode": "flashing", "led_on_time": 500, "led_off_time": 500, "loop_times": 1, "interval_time": 1000, "sequence_id": "1"}}'),
+    ('light', {'mode': 'flashing', 'node': 'chamber_light2', 'on_time': 7, 'off_time': 7, 'loops': 7, 'interval': 7}, "1",
+     b'{"system": {"command": "ledctrl", "led_node": "chamber_light2", "led_mode": "flashing", "led_on_time": 7, "led_off_time": 7, "loop_times": 7, "interval_time": 7, "sequence_id": "1"}}'),
+    ('move_axis', {'axis': 'E', 'direction': -1}, "1",
+     b'{"print": {"command": "xyz_ctrl", "axis": "E", "dir": -1, "mode": 0, "sequence_id": "1"}}'),
+    ('move_axis', {'axis': 'E', 'direction': -1, 'mode': 1}, "1",
+     b'{"print": {"command": "xyz_ctrl", "axis": "E", "dir": -1, "mode": 1, "sequence_id": "1"}}'),
+    ('nozzle_holder_ctrl', {'action': 2}, "1",
+     b'{"print": {"command": "nozzle_holder_ctrl", "action": 2, "sequence_id": "1"}}'),
+    ('nozzle_info_confirm', {'nozzle_id': 7}, "1",
+     b'{"print": {"command": "nozzle_info_confirm", "id": 7, "sequence_id": "1"}}'),
+    ('nozzle_refresh', {'nozzle_id': 7}, "1",
+     b'{"print": {"command": "holder_nozzle_refresh", "id": 7, "sequence_id": "1"}}'),
+    ('pause', {}, "1",
+     b'{"print": {"command": "pause", "param": "", "sequence_id": "1"}}'),
+    ('project_file', {'file_path': '/sdcard/模型 "副本".3mf'}, "1",
+     b'{"print": {"command": "project_file", "param": "Metadata/plate_1.gcode", "url": "ftp:///sdcard/\\u6a21\\u578b \\"\\u526f\\u672c\\".3mf", "project_id": "0", "profile_id": "0", "task_id": "0", "subtask_id": "0", "subtask_name": "\\u6a21\\u578b \\"\\u526f\\u672c\\"", "md5": "", "use_ams": false, "ams_mapping": [], "timelapse": false, "bed_levelling": true, "flow_cali": false, "vibration_cali": false, "layer_inspect": false, "bed_type": "auto", "sequence_id": "1"}}'),
+    ('project_file', {'file_path': '/sdcard/模型 "副本".3mf', 'plate': 8, 'subtask_name': 'subtask_name-值', 'use_ams': True, 'ams_mapping': [3, 1, 2], 'timelapse': True, 'bed_levelling': False, 'flow_cali': True, 'vibration_cali': True, 'layer_inspect': True, 'bed_type': 'bed_type-值'}, "1",
+     b'{"print": {"command": "project_file", "param": "Metadata/plate_8.gcode", "url": "ftp:///sdcard/\\u6a21\\u578b \\"\\u526f\\u672c\\".3mf", "project_id": "0", "profile_id": "0", "task_id": "0", "subtask_id": "0", "subtask_name": "subtask_name-\\u503c", "md5": "", "use_ams": true, "ams_mapping": [3, 1, 2], "timelapse": true, "bed_levelling": false, "flow_cali": true, "vibration_cali": true, "layer_inspect": true, "bed_type": "bed_type-\\u503c", "sequence_id": "1"}}'),
+    ('push_all', {}, "1",
+     b'{"pushing": {"command": "pushall", "version": 1, "push_target": 1, "sequence_id": "1"}}'),
+    ('refresh_nozzle', {}, "1",
+     b'{"print": {"command": "refresh_nozzle", "sequence_id": "1"}}'),
+    ('resume', {}, "1",
+     b'{"print": {"command": "resume", "param": "", "sequence_id": "1"}}'),
+    ('select_extruder', {'index': 1}, "1",
+     b'{"print": {"command": "select_extruder", "extruder_index": 1, "sequence_id": "1"}}'),
+    ('set_airduct', {'mode_id': 7}, "1",
+     b'{"print": {"command": "set_airduct", "modeId": 7, "submode": 0, "sequence_id": "1"}}'),
+    ('set_airduct', {'mode_id': 7, 'submode': 7}, "1",
+     b'{"print": {"command": "set_airduct", "modeId": 7, "submode": 7, "sequence_id": "1"}}'),
+    ('set_anti_heating_mode', {'enable': True}, "1",
+     b'{"print": {"command": "set_against_continued_heating_mode", "enable": true, "sequence_id": "1"}}'),
+    ('set_bed_temp', {'temp': 120}, "1",
+     b'{"print": {"command": "set_bed_temp", "temp": 120, "sequence_id": "1"}}'),
+    ('set_chamber_temp', {'temp': 65}, "1",
+     b'{"print": {"command": "set_ctt", "ctt_val": 65, "sequence_id": "1"}}'),
+    ('set_door_detection', {'config': 2}, "1",
+     b'{"system": {"command": "set_door_stat", "config": 2, "sequence_id": "1"}}'),
+    ('set_extrusion_length', {'length': 12.75}, "1",
+     b'{"print": {"command": "set_extrusion_length", "extruder_index": 0, "length": 12.75, "sequence_id": "1"}}'),
+    ('set_extrusion_length', {'length': 12.75, 'extruder_index': 1}, "1",
+     b'{"print": {"command": "set_extrusion_length", "extruder_index": 1, "length": 12.75, "sequence_id": "1"}}'),
+    ('set_fan', {'fan_index': 2, 'speed': 100}, "1",
+     b'{"print": {"command": "set_fan", "fan_index": 2, "speed": 100, "sequence_id": "1"}}'),
+    ('set_nozzle_temp', {'temp': 350}, "1",
+     b'{"print": {"command": "set_nozzle_temp", "extruder_index": 0, "target_temp": 350, "sequence_id": "1"}}'),
+    ('set_nozzle_temp', {'temp': 350, 'extruder_index': 1}, "1",
+     b'{"print": {"command": "set_nozzle_temp", "extruder_index": 1, "target_temp": 350, "sequence_id": "1"}}'),
+    ('set_print_cache', {'enable': True}, "1",
+     b'{"system": {"command": "print_cache_set", "config": true, "sequence_id": "1"}}'),
+    ('set_print_option', {}, "1",
+     b'{"print": {"command": "print_option", "option": 1, "auto_recovery": true, "nozzle_blob_detect": true, "sound_enable": true, "filament_tangle_detect": true, "auto_switch_filament": true, "air_print_detect": true, "sequence_id": "1"}}'),
+    ('set_print_option', {'auto_recovery': False, 'nozzle_blob_detect': False, 'sound_enable': False, 'filament_tangle_detect': False, 'auto_switch_filament': False, 'air_print_detect': False}, "1",
+     b'{"print": {"command": "print_option", "option": 1, "auto_recovery": false, "nozzle_blob_detect": false, "sound_enable": false, "filament_tangle_detect": false, "auto_switch_filament": false, "air_print_detect": false, "sequence_id": "1"}}'),
+    ('set_print_speed', {'level': 4}, "1",
+     b'{"print": {"command": "print_speed", "param": "4", "sequence_id": "1"}}'),
+    ('skip_objects', {'obj_list': [3, 1, 2]}, "1",
+     b'{"print": {"command": "skip_objects", "obj_list": [3, 1, 2], "sequence_id": "1"}}'),
+    ('stop', {}, "1",
+     b'{"print": {"command": "stop", "param": "", "sequence_id": "1"}}'),
+    ('upgrade_confirm', {}, "1",
+     b'{"upgrade": {"command": "upgrade_confirm", "src_id": 1, "sequence_id": "1"}}'),
+    ('upgrade_confirm', {'src_id': 7}, "1",
+     b'{"upgrade": {"command": "upgrade_confirm", "src_id": 7, "sequence_id": "1"}}'),
+    ('upgrade_start', {'url': 'http://h/fw.bin', 'module': 'module-值', 'version': 'version-值'}, "1",
+     b'{"upgrade": {"command": "start", "url": "http://h/fw.bin", "module": "module-\\u503c", "version": "version-\\u503c", "src_id": 1, "sequence_id": "1"}}'),
+    ('upgrade_start', {'url': 'http://h/fw.bin', 'module': 'module-值', 'version': 'version-值', 'src_id': 7}, "1",
+     b'{"upgrade": {"command": "start", "url": "http://h/fw.bin", "module": "module-\\u503c", "version": "version-\\u503c", "src_id": 7, "sequence_id": "1"}}'),
+    ('xcam_control', {'module': 'buildplate_marker_detector', 'enable': True}, "1",
+     b'{"xcam": {"command": "xcam_control_set", "module_name": "buildplate_marker_detector", "control": true, "enable": true, "print_halt": false, "halt_print_sensitivity": "medium", "sequence_id": "1"}}'),
+    ('xcam_control', {'module': 'buildplate_marker_detector', 'enable': True, 'print_halt': True, 'sensitivity': 'high'}, "1",
+     b'{"xcam": {"command": "xcam_control_set", "module_name": "buildplate_marker_detector", "control": true, "enable": true, "print_halt": true, "halt_print_sensitivity": "high", "sequence_id": "1"}}'),
+    ('gcode_line', {'gcode': 'M117 引号 "q" \\ 控制 \n\t\x00 😀'}, '序号-"7"\n',
+     b'{"print": {"command": "gcode_line", "param": "M117 \\u5f15\\u53f7 \\"q\\" \\\\ \\u63a7\\u5236 \\n\\t\\u0000 \\ud83d\\ude00", "sequence_id": "\\u5e8f\\u53f7-\\"7\\"\\n"}}'),
+    ('gcode_file', {'file_path': '/sdcard/\x000\x00.gcode'}, '8',
+     b'{"print": {"command": "gcode_file", "param": "/sdcard/\\u00000\\u0000.gcode", "sequence_id": "8"}}'),
+]
+
+
+@pytest.mark.parametrize(
+    "name, params, sequence_id, expected", PAYLOADS,
+    ids=[f"{row[0]}-{len(row[1])}" for row in PAYLOADS]
+)
+def test_payload(name, params, sequence_id, expected):
+    assert COMMANDS[name].render(params, sequence_id) == expected
+
+
+def test_every_command_has_fixture():
+    assert {row[0] for row in PAYLOADS} == set(COMMANDS)
@@ -0,0 +1,381 @@
+"""
+BambuFTP 中不依赖打印机的部分: 检查点、数据分块、目录列表解析、重连判定
+"""
+
+import calendar
+import ftplib
+import os
+import time
+
+import pytest
+
+from bambu_h2s.ftp import (
+    BambuFTP, RemoteEntry, _connection_lost, _load_checkpoint, _parse_list_line, _parse_mlsd_time, _save_checkpoint
+)
+
+
+def _ftp(block_size: int = 4) -> BambuFTP:
+    return BambuFTP("127.0.0.1", "code", block_size=block_size)
+
+
+# ========================================
+# 断点续传检查点
+# ========================================
+
+def test_checkpoint_roundtrip(tmp_path):
+    path = str(tmp_path / "a.gcode.ftpresume")
+    identity = {"remote_path": "/cache/a.gcode", "size": 123}
+    _save_checkpoint(path, identity)
+    assert _load_checkpoint(path) == identity
+
+
+def test_checkpoint_missing_or_corrupt(tmp_path):
+    assert _load_checkpoint(str(tmp_path / "missing")) == {}
+    corrupt = tmp_path / "corrupt"
+    corrupt.write_text("{not json")
+    assert _load_checkpoint(str(corrupt)) == {}
+
+
+# ========================================
+# 数据分块
+# ========================================
+
+def test_file_blocks_mmap(tmp_path):
+    path = tmp_path / "data.bin"
+    data = os.urandom(10)
+    path.write_bytes(data)
+    with open(path, "rb") as f:
+        assert [bytes(b) for b in _ftp()._file_blocks(f)] == [data[0:4], data[4:8], data[8:10]]
+        assert [bytes(b) for b in _ftp()._file_blocks(f, offset=6)] == [data[6:10]]
+        assert list(_ftp()._file_blocks(f, offset=10)) == []
+
+
+def test_file_blocks_empty(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    with open(path, "rb") as f:
+        assert list(_ftp()._file_blocks(f)) == []
+
+
+def test_source_blocks_bytes_like():
+    data = bytes(range(10))
+    assert [bytes(b) for b in _ftp()._source_blocks(data)] == [data[0:4], data[4:8], data[8:10]]
+    view = memoryview(bytearray(data)).cast("H")
+    assert b"".join(bytes(b) for b in _ftp()._source_blocks(view)) == data
+
+
+def test_source_blocks_file_objects(tmp_path):
+    import io
+
+    data = os.urandom(10)
+    assert [bytes(b) for b in _ftp()._source_blocks(io.BytesIO(data))] == [data[0:4], data[4:8], data[8:10]]
+
+    class ReadOnly:
+        """只有 read() 的文件对象"""
+
+        def __init__(self, data):
+            self._stream = io.BytesIO(data)
+
+        def read(self, n):
+            return self._stream.read(n)
+
+    assert b"".join(bytes(b) for b in _ftp()._source_blocks(ReadOnly(data))) == data
+
+
+def test_source_blocks_iterator_coalesces():
+    chunks = [b"a", "é", b"bc", b"0123456789", b"d"]
+    blocks = [bytes(b) for b in _ftp()._source_blocks(iter(chunks))]
+    # 小块合并到至少 block_size；缓冲区为空时的大块直接发送；str 按 UTF-8 编码
+    assert blocks == [b"a\xc3\xa9bc", b"0123456789", b"d"]
+
+
+# ========================================
+# 目录列表
+# ========================================
+
+class FakeControl:
+    """代替 ftplib.FTP_TLS 的控制连接，只实现 MLSD 和 LIST"""
+
+    def __init__(self, mlsd_error: str = "", lines=()):
+        self.mlsd_error = mlsd_error
+        self.lines = list(lines)
+        self.calls = []
+
+    def mlsd(self, path, facts):
+        self.calls.append("MLSD " + path)
+        if self.mlsd_error:
+            raise ftplib.error_perm(self.mlsd_error)
+        return iter([
+            (".", {"type": "cdir"}),
+            ("..", {"type": "pdir"}),
+            ("sub", {"type": "dir", "modify": "20240102030405"}),
+            ("a.gcode", {"type": "file", "size": "42", "modify": "20240102030405.5"}),
+            ("link", {"type": "OS.unix=slink:/x"}),
+        ])
+
+    def retrlines(self, command, callback):
+        self.calls.append(command)
+        for line in self.lines:
+            callback(line)
+
+
+def _listing_ftp(control: FakeControl, list_ttl: float = 10.0) -> BambuFTP:
+    ftp = BambuFTP("127.0.0.1", "code", list_ttl=list_ttl, keepalive=0)
+    ftp._ftp = control
+    return ftp
+
+
+def test_parse_mlsd_time():
+    assert _parse_mlsd_time("20240102030405") == calendar.timegm((2024, 1, 2, 3, 4, 5))
+    assert _parse_mlsd_time("20240102030405.250") == calendar.timegm((2024, 1, 2, 3, 4, 5)) + 0.25
+    assert _parse_mlsd_time("garbage") is None
+
+
+def test_parse_list_line_file_with_year():
+    entry = _parse_list_line("-rw-r--r-- 1 root root 1234 Jan 02 2023 my file.gcode", "/cache")
+    assert entry == RemoteEntry("my file.gcode", "/cache/my file.gcode", "file", 1234,
+                                calendar.timegm((2023, 1, 2, 0, 0, 0)))
+
+
+def test_parse_list_line_recent_time_not_in_future():
+    entry = _parse_list_line("-rw-r--r-- 1 root root 5 Dec 31 23:59 a.3mf", "/")
+    assert entry.path == "/a.3mf"
+    assert entry.mtime <= time.time() + 86400
+    assert time.gmtime(entry.mtime)[1:5] == (12, 31, 23, 59)
+
+
+def test_parse_list_line_dir_link_and_skipped():
+    d = _parse_list_line("drwxr-xr-x 2 root root 4096 Mar 01 2022 timelapse", "/")
+    assert (d.type, d.is_dir, d.path) == ("dir", True, "/timelapse")
+    link = _parse_list_line("lrwxrwxrwx 1 root root 7 Mar 01 2022 sd -> /mnt/sd", "/")
+    assert (link.type, link.name) == ("link", "sd")
+    assert _parse_list_line("drwxr-xr-x 2 root root 4096 Mar 01 2022 .", "/") is None
+    assert _parse_list_line("total 12", "/") is None
+
+
+def test_list_entries_mlsd_skips_dot_entries():
+    ftp = _listing_ftp(FakeControl())
+    entries = ftp.list_entries("/cache/")
+    assert [(e.name, e.type, e.size) for e in entries] == [
+        ("sub", "dir", -1), ("a.gcode", "file", 42), ("link", "link", -1)
+    ]
+    assert entries[1].path == "/cache/a.gcode"
+    assert entries[1].mtime == calendar.timegm((2024, 1, 2, 3, 4, 5)) + 0.5
+    assert ftp.supports_mlsd
+
+
+def test_list_entries_falls_back_to_list_once():
+    control = FakeControl("500 Unknown command", ["-rw-r--r-- 1 root root 3 Jan 02 2023 b.gcode"])
+    ftp = _listing_ftp(control, list_ttl=0)
+    assert [e.name for e in ftp.list_entries("/")] == ["b.gcode"]
+    assert not ftp.supports_mlsd
+    ftp.list_entries("/")
+    assert control.calls == ["MLSD /", "LIST /", "LIST /"]
+
+
+def test_list_entries_other_mlsd_error_not_fallback():
+    ftp = _listing_ftp(FakeControl("550 No such directory"))
+    assert ftp.list_entries("/missing") == []
+    assert ftp.supports_mlsd
+
+
+def test_list_entries_cache_and_invalidate():
+    control = FakeControl()
+    ftp = _listing_ftp(control)
+    first = ftp.list_entries("/cache")
+    first.clear()
+    assert len(ftp.list_entries("/cache")) == 3
+    assert control.calls == ["MLSD /cache"]
+
+    ftp.list_entries("/cache", refresh=True)
+    ftp.invalidate("/cache/a.gcode")
+    ftp.list_entries("/cache")
+    assert control.calls == ["MLSD /cache"] * 3
+
+
+# ========================================
+# 流式下载
+# ========================================
+
+class FakeDataConn:
+    """数据连接: 每次 recv_into 最多交付 chunk 字节"""
+
+    def __init__(self, data: bytes, chunk: int = 3):
+        self.data = data
+        self.chunk = chunk
+        self.pos = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def setsockopt(self, *args):
+        pass
+
+    def recv_into(self, view):
+        n = min(len(view), self.chunk, len(self.data) - self.pos)
+        view[:n] = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+
+class FakeRetrControl:
+    """支持 SIZE 和 RETR 的控制连接，记录收到的命令和读取的回复"""
+
+    def __init__(self, data: bytes, size=None):
+        self.data = data
+        self.size_reply = len(data) if size is None else size
+        self.calls = []
+
+    def voidcmd(self, command):
+        self.calls.append(command)
+
+    def size(self, path):
+        self.calls.append("SIZE " + path)
+        if self.size_reply < 0:
+            raise ftplib.error_perm("550 SIZE not allowed")
+        return self.size_reply
+
+    def transfercmd(self, command, rest=None):
+        self.calls.append(command)
+        return FakeDataConn(self.data[rest or 0:])
+
+    def voidresp(self):
+        self.calls.append("226")
+
+    def getresp(self):
+        self.calls.append("426")
+
+
+def _retr_ftp(data: bytes, size=None) -> BambuFTP:
+    ftp = BambuFTP("127.0.0.1", "code", keepalive=0)
+    ftp._ftp = FakeRetrControl(data, size)
+    return ftp
+
+
+def test_iter_download_chunks_and_offset():
+    ftp = _retr_ftp(b"0123456789")
+    assert [bytes(c) for c in ftp.iter_download("/a", chunk_size=4)] == [b"012", b"345", b"678", b"9"]
+    assert [bytes(c) for c in ftp.iter_download("/a", offset=7)] == [b"789"]
+    assert ftp._ftp.calls[-2:] == ["RETR /a", "226"]
+
+
+def test_iter_download_blocks_other_operations_until_closed():
+    ftp = _retr_ftp(b"0123456789")
+    chunks = ftp.iter_download("/a")
+    next(chunks)
+    with pytest.raises(RuntimeError):
+        with ftp._active():
+            pass
+    chunks.close()
+    # 提前关闭时读掉中止回复，之后控制连接可以继续使用
+    assert ftp._ftp.calls[-1] == "426"
+    assert not ftp._streaming
+    assert ftp.get_size("/a") == 10
+
+
+def test_read_bytes_within_limit():
+    assert _retr_ftp(b"hello").read_bytes("/a", max_size=5) == b"hello"
+
+
+def test_read_bytes_rejected_by_size():
+    ftp = _retr_ftp(b"hello")
+    assert ftp.read_bytes("/a", max_size=4) is None
+    assert not any(c.startswith("RETR") for c in ftp._ftp.calls)
+
+
+def test_read_bytes_unknown_size_aborts_at_limit():
+    ftp = _retr_ftp(b"0123456789", size=-1)
+    assert ftp.read_bytes("/a", max_size=4) is None
+    assert ftp._ftp.calls[-1] == "426"
+    assert not ftp._streaming
+
+
+# ========================================
+# 断线重连
+# ========================================
+
+def test_connection_lost_classification():
+    assert _connection_lost(ConnectionResetError())
+    assert _connection_lost(EOFError())
+    assert _connection_lost(ftplib.error_temp("421 Service not available"))
+    assert not _connection_lost(ftplib.error_temp("450 File busy"))
+
+
+class Flaky:
+    """第一次调用抛出 error，之后返回 "ok" """
+
+    def __init__(self, error: BaseException):
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls == 1:
+            raise self.error
+        return "ok"
+
+
+def _reconnecting_ftp(monkeypatch, reconnect_ok: bool = True) -> BambuFTP:
+    ftp = BambuFTP("127.0.0.1", "code", keepalive=0)
+    ftp.reconnects = 0
+
+    def reconnect():
+        ftp.reconnects += 1
+        return reconnect_ok
+
+    monkeypatch.setattr(ftp, "_reconnect", reconnect)
+    return ftp
+
+
+def test_call_retries_idempotent_after_reconnect(monkeypatch):
+    ftp = _reconnecting_ftp(monkeypatch)
+    op = Flaky(ConnectionResetError("reset"))
+    assert ftp._call(op) == "ok"
+    assert (op.calls, ftp.reconnects) == (2, 1)
+
+
+def test_call_reconnects_but_does_not_retry_non_idempotent(monkeypatch):
+    ftp = _reconnecting_ftp(monkeypatch)
+    op = Flaky(ftplib.error_temp("421 Timeout"))
+    with pytest.raises(ftplib.error_temp):
+        ftp._call(op, idempotent=False)
+    assert (op.calls, ftp.reconnects) == (1, 1)
+
+
+def test_call_raises_when_reconnect_fails(monkeypatch):
+    ftp = _reconnecting_ftp(monkeypatch, reconnect_ok=False)
+    op = Flaky(TimeoutError())
+    with pytest.raises(TimeoutError):
+        ftp._call(op)
+    assert (op.calls, ftp.reconnects) == (1, 1)
+
+
+@pytest.mark.parametrize("error", [
+    FileNotFoundError("local.gcode"),
+    ftplib.error_temp("450 File busy"),
+    ftplib.error_perm("550 No such file"),
+])
+def test_call_does_not_reconnect_for_other_errors(monkeypatch, error):
+    ftp = _reconnecting_ftp(monkeypatch)
+    with pytest.raises(type(error)):
+        ftp._call(Flaky(error))
+    assert ftp.reconnects == 0
+
+
+def test_call_without_auto_reconnect(monkeypatch):
+    ftp = _reconnecting_ftp(monkeypatch)
+    ftp.auto_reconnect = False
+    with pytest.raises(ConnectionResetError):
+        ftp._call(Flaky(ConnectionResetError()))
+    assert ftp.reconnects == 0
+
+
+def test_metrics_ratios():
+    metrics = BambuFTP("127.0.0.1", "code").metrics
+    assert (metrics.avg_connect_time, metrics.reuse_ratio) == (0.0, 0.0)
+    metrics.connects, metrics.connect_time = 2, 0.5
+    metrics.data_connections, metrics.tls_resumed = 4, 3
+    assert (metrics.avg_connect_time, metrics.reuse_ratio) == (0.25, 0.75)
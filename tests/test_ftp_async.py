@@ -0,0 +1,137 @@
+"""
+AsyncBambuFTP 测试
+控制连接和数据连接用喂好数据的 StreamReader 代替，检查回复读取与控制连接同步
+"""
+
+import asyncio
+
+import pytest
+
+from bambu_h2s.ftp import _Progress
+from bambu_h2s.ftp_async import AsyncBambuFTP
+
+
+class FakeWriter:
+    def __init__(self):
+        self.lines = []
+        self.closed = False
+
+    def write(self, data: bytes):
+        self.lines.append(bytes(data).decode().rstrip("\r\n"))
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+
+def _reader(data: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+def _client(replies: bytes, data: bytes = b"", block_size: int = 4) -> AsyncBambuFTP:
+    """replies 为控制连接上依次收到的回复；数据连接传输 data"""
+    ftp = AsyncBambuFTP("127.0.0.1", "code", block_size=block_size, timeout=1.0)
+    ftp._lock = asyncio.Lock()
+    ftp._reader, ftp._writer = _reader(replies), FakeWriter()
+
+    async def open_data(command):
+        ftp._writer.write(command.encode())
+        return _reader(data), FakeWriter()
+
+    ftp._open_data = open_data
+    return ftp
+
+
+def test_read_bytes():
+    async def main():
+        ftp = _client(b"213 10\r\n226 Transfer complete\r\n", b"0123456789")
+        assert await ftp.read_bytes("/a", max_size=10) == b"0123456789"
+        assert ftp._writer.lines == ["SIZE /a", "RETR /a"]
+
+    asyncio.run(main())
+
+
+def test_read_bytes_rejected_by_size():
+    async def main():
+        ftp = _client(b"213 10\r\n", b"0123456789")
+        assert await ftp.read_bytes("/a", max_size=4) is None
+        assert ftp._writer.lines == ["SIZE /a"]
+
+    asyncio.run(main())
+
+
+def test_read_bytes_max_size_abort_keeps_control_in_sync():
+    async def main():
+        ftp = _client(
+            b"550 SIZE not allowed\r\n426 Transfer aborted\r\n250 Deleted\r\n",
+            b"0123456789"
+        )
+        assert await ftp.read_bytes("/a", max_size=4) is None
+        # 中止回复已被读掉，下一个命令读到的是自己的回复
+        assert await ftp.delete_file("/a")
+        assert ftp._writer.lines == ["SIZE /a", "RETR /a", "DELE /a"]
+        assert ftp.metrics.reconnects == 0
+
+    asyncio.run(main())
+
+
+def test_list_entries_mlsd():
+    async def main():
+        listing = (
+            b"type=cdir;modify=20240101000000; .\r\n"
+            b"type=dir;modify=20240101000000; sub\r\n"
+            b"type=file;size=42;modify=20240102030405; a b.gcode\r\n"
+        )
+        ftp = _client(b"226 Transfer complete\r\n", listing, block_size=64)
+        entries = await ftp.list_entries("/cache")
+        assert [(e.name, e.path, e.type, e.size) for e in entries] == [
+            ("sub", "/cache/sub", "dir", -1),
+            ("a b.gcode", "/cache/a b.gcode", "file", 42),
+        ]
+
+    asyncio.run(main())
+
+
+def test_session_reconnects_after_local_failure():
+    async def main():
+        ftp = _client(b"", b"0123456789")
+        old_writer = ftp._writer
+        logins = []
+
+        async def login():
+            logins.append(True)
+            ftp._reader, ftp._writer = _reader(b"250 Deleted\r\n"), FakeWriter()
+            return True
+
+        ftp._login = login
+
+        def on_block(block):
+            raise OSError("disk full")
+
+        with pytest.raises(OSError):
+            await ftp._recv_blocks("RETR /a", _Progress(None), on_block)
+
+        # 控制连接上可能残留未读的回复: 丢弃并重新登录
+        assert old_writer.closed and logins == [True]
+        assert ftp.metrics.reconnects == 1
+        assert await ftp.delete_file("/a")
+
+    asyncio.run(main())
+
+
+def test_session_keeps_connection_on_server_error():
+    async def main():
+        ftp = _client(b"550 No such file\r\n250 Created\r\n")
+        assert not await ftp.delete_file("/missing")
+        assert await ftp.mkdir("/new")
+        assert ftp.metrics.reconnects == 0
+
+    asyncio.run(main())
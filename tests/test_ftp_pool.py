@@ -0,0 +1,81 @@
+"""
+FTP 会话池测试
+用假的会话代替 BambuFTP，检查会话复用、损坏会话的丢弃和汇总进度
+"""
+
+import os
+
+from bambu_h2s.ftp_pool import FTPPool
+
+
+class FakeSession:
+    def __init__(self):
+        self.uploads = []
+        self.closed = False
+
+    def upload_file(self, local_path, remote_path, progress_callback=None):
+        self.uploads.append(remote_path)
+        if "fail" in remote_path:
+            return False
+        progress_callback(os.path.getsize(local_path), os.path.getsize(local_path))
+        return True
+
+    def disconnect(self):
+        self.closed = True
+
+
+def _pool(size: int = 2) -> FTPPool:
+    pool = FTPPool("127.0.0.1", "code", size)
+    pool.created = []
+
+    def new_session():
+        session = FakeSession()
+        pool.created.append(session)
+        with pool._lock:
+            pool._sessions.append(session)
+        return session
+
+    pool._new_session = new_session
+    return pool
+
+
+def _files(tmp_path, names):
+    paths = []
+    for i, name in enumerate(names):
+        path = tmp_path / name
+        path.write_bytes(b"x" * (i + 1))
+        paths.append(str(path))
+    return paths
+
+
+def test_upload_many_reuses_sessions(tmp_path):
+    pool = _pool(2)
+    progress = []
+    with pool:
+        report = pool.upload_many(_files(tmp_path, ["a", "b", "c", "d"]), lambda d, t: progress.append((d, t)))
+    assert report.ok and report.bytes == 10
+    assert [r.remote_path for r in report.results] == ["/cache/a", "/cache/b", "/cache/c", "/cache/d"]
+    assert 1 <= len(pool.created) <= 2
+    assert sum(len(s.uploads) for s in pool.created) == 4
+    assert progress[-1] == (10, 10)
+    assert all(s.closed for s in pool.created)
+
+
+def test_failed_session_discarded(tmp_path):
+    pool = _pool(1)
+    a, b = _files(tmp_path, ["a", "b"])
+    report = pool.upload_many([(a, "/cache/fail"), (b, "/cache/b")])
+    assert [r.ok for r in report.results] == [False, True]
+    assert report.failed[0].error == "传输失败"
+    first, second = pool.created
+    assert first.closed and first.uploads == ["/cache/fail"]
+    assert second.uploads == ["/cache/b"] and not second.closed
+    pool.close()
+
+
+def test_connection_failure_reported(tmp_path):
+    pool = FTPPool("127.0.0.1", "code", 1)
+    pool._new_session = lambda: None
+    report = pool.upload_many(_files(tmp_path, ["a"]))
+    assert not report.ok
+    assert report.results[0].error == "FTP 连接失败"
@@ -0,0 +1,82 @@
+"""
+增量同步计划测试
+plan_sync 只依赖目录列表和 supports_mlsd，用假的 FTP 对象代替打印机
+"""
+
+import os
+import time
+
+from bambu_h2s.ftp import BambuFTP, RemoteEntry
+from bambu_h2s.ftp_sync import plan_sync
+
+MTIME = time.time() - 3600
+
+
+class FakeFTP:
+    def __init__(self, entries, supports_mlsd: bool = True):
+        self.entries = entries
+        self.supports_mlsd = supports_mlsd
+
+    def walk(self, top: str, refresh: bool = False):
+        dirs = [e for e in self.entries if e.is_dir]
+        files = [e for e in self.entries if not e.is_dir]
+        yield top, dirs, files
+        for d in dirs:
+            yield d.path, [], []
+
+
+def _local(tmp_path, name: str, data: bytes, mtime: float = MTIME) -> str:
+    path = tmp_path / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def _remote(name: str, size: int, mtime: float = MTIME) -> RemoteEntry:
+    return RemoteEntry(name, f"/sync/{name}", "file", size, mtime)
+
+
+def test_plan_new_changed_unchanged_deleted(tmp_path):
+    _local(tmp_path, "same.gcode", b"abc")
+    _local(tmp_path, "resized.gcode", b"abcdef")
+    _local(tmp_path, "new.gcode", b"n")
+    _local(tmp_path, "sub/deep.gcode", b"d")
+    ftp = FakeFTP([
+        _remote("same.gcode", 3), _remote("resized.gcode", 3), _remote("gone.gcode", 9),
+    ])
+
+    plan = plan_sync(ftp, str(tmp_path), "/sync")
+    actions = [(a.kind, a.remote_path, a.reason) for a in plan.actions]
+    assert actions == [
+        ("upload", "/sync/new.gcode", "new"),
+        ("upload", "/sync/resized.gcode", "changed"),
+        ("mkdir", "/sync/sub", "new"),
+        ("upload", "/sync/sub/deep.gcode", "new"),
+        ("delete", "/sync/gone.gcode", "deleted"),
+    ]
+    assert plan.unchanged == 1 and plan.unchanged_bytes == 3
+    assert plan.transfer_bytes == 1 + 6 + 1
+
+
+def test_plan_without_delete(tmp_path):
+    _local(tmp_path, "a.gcode", b"a")
+    plan = plan_sync(FakeFTP([_remote("a.gcode", 1), _remote("b.gcode", 1)]), str(tmp_path), "/sync", delete=False)
+    assert plan.actions == []
+
+
+def test_mtime_tolerance_widened_for_list(tmp_path):
+    # 本地比远程新 30 秒: MLSD 下视为变更，LIST (分钟精度) 下视为未变
+    _local(tmp_path, "a.gcode", b"a", MTIME + 30)
+    entries = [_remote("a.gcode", 1)]
+    assert len(plan_sync(FakeFTP(entries, supports_mlsd=True), str(tmp_path), "/sync").of_kind("upload")) == 1
+    assert plan_sync(FakeFTP(entries, supports_mlsd=False), str(tmp_path), "/sync").unchanged == 1
+
+
+def test_invalidate_drops_parent_and_subtree():
+    ftp = BambuFTP("127.0.0.1", "code")
+    assert ftp.supports_mlsd
+    for key in ("/", "/cache", "/cache/sub", "/cache/sub/x", "/cached", "/other"):
+        ftp._list_cache[key] = (time.monotonic(), [])
+    ftp.invalidate("/cache/sub")
+    assert sorted(ftp._list_cache) == ["/", "/cached", "/other"]
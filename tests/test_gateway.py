@@ -0,0 +1,151 @@
+"""
+状态网关测试
+不连接打印机: 直接向 BambuClient 注入 MQTT 消息，网关监听本机随机端口
+"""
+
+import base64
+import json
+import os
+import socket
+import struct
+import urllib.error
+import urllib.request
+
+import pytest
+
+from bambu_h2s.client import BambuClient
+from bambu_h2s.gateway import StatusGateway
+
+
+class _Message:
+    def __init__(self, topic: str, payload: dict):
+        self.topic = topic
+        self.payload = json.dumps(payload).encode()
+
+
+def _report(client: BambuClient, section: dict):
+    client._on_message(None, None, _Message("device/SERIAL/report", {"print": section}))
+
+
+@pytest.fixture
+def gateway():
+    client = BambuClient("127.0.0.1", "code", serial="SERIAL")
+    gateway = StatusGateway(client, host="127.0.0.1", port=0, history=4, keepalive=0.2)
+    assert gateway.start()
+    yield client, gateway
+    gateway.stop()
+
+
+def test_failing_listener_does_not_block_others(gateway):
+    client, gw = gateway
+
+    def broken(diff):
+        raise RuntimeError("boom")
+
+    client._state_listeners.insert(0, broken)
+    _report(client, {"nozzle_temper": 210})
+    assert gw.version == 1
+    assert json.loads(gw.snapshot()[1]) == {"nozzle_temper": 210}
+
+
+def test_frames_since(gateway):
+    client, gw = gateway
+    for i in range(3):
+        _report(client, {"layer_num": i})
+    with gw._cond:
+        version, frames = gw._frames_since(1)
+        assert version == 3 and len(frames) == 2
+        assert gw._frames_since(3) == (3, [])
+    for i in range(5):
+        _report(client, {"layer_num": i})
+    with gw._cond:
+        # 落后超过历史长度时改发完整快照
+        version, frames = gw._frames_since(0)
+        assert version == 8 and len(frames) == 1 and b'"state"' in frames[0]
+
+
+def test_http_etag(gateway):
+    client, gw = gateway
+    _report(client, {"mc_percent": 5})
+    url = f"http://127.0.0.1:{gw.port}/state"
+    with urllib.request.urlopen(url) as resp:
+        etag = resp.headers["ETag"]
+        assert json.loads(resp.read()) == {"mc_percent": 5}
+    request = urllib.request.Request(url, headers={"If-None-Match": etag})
+    with pytest.raises(urllib.error.HTTPError) as e:
+        urllib.request.urlopen(request)
+    assert e.value.code == 304
+
+
+def _ws_connect(port: int) -> socket.socket:
+    sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+    key = base64.b64encode(os.urandom(16)).decode()
+    sock.sendall((
+        f"GET /ws HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+        f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+    ).encode())
+    response = b""
+    while b"\r\n\r\n" not in response:
+        response += sock.recv(1)
+    assert response.startswith(b"HTTP/1.1 101")
+    return sock
+
+
+def _recv_frame(sock: socket.socket):
+    def read(n):
+        data = b""
+        while len(data) < n:
+            chunk = sock.recv(n - len(data))
+            if not chunk:
+                raise EOFError
+            data += chunk
+        return data
+
+    b0, b1 = read(2)
+    length = b1 & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", read(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", read(8))[0]
+    return b0 & 0x0F, read(length)
+
+
+def _client_frame(opcode: int, payload: bytes, length: int = None) -> bytes:
+    mask = b"\x01\x02\x03\x04"
+    length = len(payload) if length is None else length
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, 0x80 | length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, length)
+    return header + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+def _recv_until(sock: socket.socket, opcode: int):
+    while True:
+        op, payload = _recv_frame(sock)
+        if op == opcode:
+            return payload
+
+
+def test_websocket_snapshot_and_ping(gateway):
+    client, gw = gateway
+    _report(client, {"gcode_state": "RUNNING"})
+    with _ws_connect(gw.port) as sock:
+        opcode, payload = _recv_frame(sock)
+        assert opcode == 0x1 and json.loads(payload)["state"] == {"gcode_state": "RUNNING"}
+        sock.sendall(_client_frame(0x9, b"hi"))
+        assert _recv_until(sock, 0xA) == b"hi"
+
+
+def test_websocket_rejects_oversized_frames(gateway):
+    _, gw = gateway
+    with _ws_connect(gw.port) as sock:
+        _recv_frame(sock)
+        # 只发送头部，声明 2^40 字节: 不应按声明长度分配，直接以 1009 关闭
+        sock.sendall(_client_frame(0x1, b"", length=1 << 40)[:10])
+        assert _recv_until(sock, 0x8) == struct.pack("!H", 1009)
+
+    with _ws_connect(gw.port) as sock:
+        _recv_frame(sock)
+        sock.sendall(_client_frame(0x9, b"x" * 126))
+        assert _recv_until(sock, 0x8) == struct.pack("!H", 1002)
@@ -0,0 +1,162 @@
+"""
+G-code 层索引测试
+小文件配合缩小的扫描块和行步长，覆盖跨块边界的情况
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from bambu_h2s import gcode_index
+from bambu_h2s.gcode_index import INDEX_SUFFIX, GcodeIndex, MappedFile, analyze, build_index
+
+GCODE = b"""; total filament length [mm] : 10.5, 2
+M83
+; CHANGE_LAYER
+; Z_HEIGHT: 0.2
+M73 P0
+; start printing object, unique label id: 7
+G1 X1 E1.5
+G1 X2 E0.5
+; stop printing object, unique label id: 7
+; CHANGE_LAYER
+; Z_HEIGHT: 0.4
+M73 P50
+; start printing object, unique label id: 7
+G1 X3 E2
+; stop printing object, unique label id: 7
+EXCLUDE_OBJECT_START NAME=cube
+G1 X4 E1 ; wipe
+EXCLUDE_OBJECT_END
+G1 X5"""
+
+
+@pytest.fixture
+def gcode(tmp_path):
+    path = tmp_path / "job.gcode"
+    path.write_bytes(GCODE)
+    return str(path)
+
+
+def _line(offset: int) -> int:
+    return GCODE[:offset].count(b"\n")
+
+
+def test_layers_and_filament(gcode):
+    index = build_index(gcode)
+    layer1 = GCODE.index(b"; CHANGE_LAYER")
+    layer2 = GCODE.index(b"; CHANGE_LAYER", layer1 + 1)
+
+    assert index.layer_count == 2
+    assert index.layer_offsets.tolist() == [layer1, layer2]
+    assert index.layer_lines.tolist() == [2, 9]
+    assert index.layer_z.tolist() == [0.2, 0.4]
+    assert index.layer_filament.tolist() == [0.0, 2.0, 5.0]
+    assert index.filament_mm == 5.0
+    assert index.header_filament == 12.5
+    assert index.lines == GCODE.count(b"\n") + 1
+
+    assert index.layer_at(0) == -1
+    assert index.layer_at(layer2) == 1
+    assert index.layer_range(1) == (layer2, len(GCODE))
+    assert index.offset_for_layer_num(2) == layer2
+    assert index.filament_until(1) == 2.0
+    assert index.read_layer(0) == GCODE[layer1:layer2]
+    with pytest.raises(IndexError):
+        index.layer_range(2)
+
+
+def test_absolute_extrusion_uses_header(tmp_path):
+    path = tmp_path / "abs.gcode"
+    path.write_bytes(GCODE.replace(b"M83", b"M82"))
+    index = build_index(str(path))
+    assert not index.relative_e
+    assert index.filament_mm == 12.5
+
+
+def test_percent_offsets(gcode):
+    index = build_index(gcode)
+    p50 = GCODE.index(b"M73 P50")
+    assert index.offset_for_percent(0) == GCODE.index(b"M73 P0")
+    assert index.offset_for_percent(75) == p50
+    assert index.layer_for_percent(50) == 1
+
+
+def test_percent_without_m73_is_proportional(tmp_path):
+    path = tmp_path / "plain.gcode"
+    path.write_bytes(b"G1 X1\n" * 10)
+    index = build_index(str(path))
+    assert index.offset_for_percent(50) == 30
+
+
+def test_object_spans(gcode):
+    index = build_index(gcode)
+    assert index.objects == ["7", "cube"]
+
+    spans = index.object_spans("7")
+    assert [(s.start_line, s.end_line, s.layer) for s in spans] == [(5, 8, 0), (12, 14, 1)]
+    first = GCODE.index(b"; start printing object")
+    assert spans[0].start == first
+    assert GCODE[spans[0].start:spans[0].end].endswith(b"unique label id: 7")
+
+    cube = index.object_spans("cube")[0]
+    assert (cube.start_line, cube.end_line) == (15, 17)
+    assert index.object_at(GCODE.index(b"G1 X4")) == "cube"
+    assert index.object_at(GCODE.index(b"G1 X1")) == "7"
+    assert index.object_at(GCODE.index(b"G1 X5")) is None
+
+
+def test_lines(gcode):
+    index = build_index(gcode)
+    offset = GCODE.index(b"G1 X3")
+    assert index.line_at(offset) == _line(offset)
+    assert index.offset_of_line(_line(offset)) == offset
+    with pytest.raises(IndexError):
+        index.offset_of_line(index.lines)
+
+
+def test_small_chunks_and_stride_match(gcode, monkeypatch):
+    expected = build_index(gcode)
+    monkeypatch.setattr(gcode_index, "SCAN_CHUNK", 16)
+    monkeypatch.setattr(gcode_index, "LINE_STRIDE", 3)
+    index = build_index(gcode)
+
+    for name in ("layer_offsets", "layer_lines", "layer_filament", "percent_offsets",
+                 "object_starts", "object_ends", "object_lines", "object_ids"):
+        assert getattr(index, name).tolist() == getattr(expected, name).tolist(), name
+    assert index.line_offsets.tolist() == [
+        i for i in range(len(GCODE)) if i == 0 or GCODE[i - 1:i] == b"\n"
+    ][::3]
+    for line in range(index.lines):
+        assert index.line_at(index.offset_of_line(line)) == line
+
+
+def test_analyze_saves_and_reuses_index(gcode, monkeypatch):
+    first = analyze(gcode)
+    assert os.path.exists(gcode + INDEX_SUFFIX)
+
+    monkeypatch.setattr(gcode_index, "build_index", lambda path: pytest.fail("索引未复用"))
+    loaded = analyze(gcode)
+    assert loaded.layer_offsets.tolist() == first.layer_offsets.tolist()
+    assert loaded.objects == first.objects
+    assert loaded.header_filament == first.header_filament
+
+
+def test_stale_index_ignored(gcode):
+    analyze(gcode)
+    with open(gcode, "ab") as f:
+        f.write(b"\n; CHANGE_LAYER\n")
+    assert GcodeIndex.load(gcode) is None
+    assert analyze(gcode).layer_count == 3
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.gcode"
+    path.write_bytes(b"")
+    with MappedFile(str(path)) as mm:
+        assert mm == b""
+    index = build_index(str(path))
+    assert (index.lines, index.layer_count, index.filament_mm) == (0, 0, 0.0)
+    assert index.offset_for_percent(50) == 0
@@ -0,0 +1,63 @@
+"""
+视频收取测试
+discover 只依赖目录列表，用假的 FTP 对象代替打印机
+"""
+
+import os
+import time
+
+from bambu_h2s.ftp import RemoteEntry
+from bambu_h2s.harvest import MediaHarvester
+
+OLD = time.time() - 3600
+
+
+class FakeFTP:
+    def __init__(self, tree: dict):
+        self.tree = tree
+
+    def walk(self, directory: str, refresh: bool = False):
+        yield directory, [], self.tree.get(directory, [])
+
+
+def _entry(path: str, size: int = 10, mtime: float = OLD) -> RemoteEntry:
+    return RemoteEntry(os.path.basename(path), path, "file", size, mtime)
+
+
+def _harvester(tmp_path) -> MediaHarvester:
+    return MediaHarvester("127.0.0.1", "code", str(tmp_path), name="p1")
+
+
+def _write_local(harvester: MediaHarvester, entry: RemoteEntry, size: int):
+    local = harvester.local_path(entry)
+    os.makedirs(os.path.dirname(local), exist_ok=True)
+    with open(local, "wb") as f:
+        f.write(b"x" * size)
+
+
+def test_discover_filters_extension_and_age(tmp_path):
+    harvester = _harvester(tmp_path)
+    video = _entry("/timelapse/a.mp4")
+    ftp = FakeFTP({"/timelapse": [
+        video,
+        _entry("/timelapse/a.jpg"),
+        _entry("/timelapse/recording.mp4", mtime=time.time()),
+    ]})
+    assert harvester.discover(ftp) == [video]
+
+
+def test_discover_skips_complete_local_copy(tmp_path):
+    harvester = _harvester(tmp_path)
+    done, partial = _entry("/timelapse/done.mp4", 10), _entry("/timelapse/partial.mp4", 10)
+    _write_local(harvester, done, 10)
+    _write_local(harvester, partial, 4)
+    ftp = FakeFTP({"/timelapse": [done, partial]})
+    assert harvester.discover(ftp) == [partial]
+
+
+def test_discover_unknown_size_not_downloaded_again(tmp_path):
+    harvester = _harvester(tmp_path)
+    fetched, new = _entry("/ipcam/fetched.avi", -1), _entry("/ipcam/new.avi", -1)
+    _write_local(harvester, fetched, 7)
+    ftp = FakeFTP({"/ipcam": [fetched, new]})
+    assert harvester.discover(ftp) == [new]
@@ -0,0 +1,52 @@
+"""
+任务启动测试
+首层目标温度的读取 (G-code 和 3MF)
+"""
+
+import zipfile
+
+from bambu_h2s.launcher import JobTemperatures, LaunchReport, read_temperatures
+
+GCODE = b"""; HEADER_BLOCK_START
+M140 S0
+M104 S0
+M190 S60 ; wait for bed
+T2
+M104 S220
+M109 S250 T1
+M104 S230 H5
+; CHANGE_LAYER
+M104 S200
+M140 S55
+"""
+
+
+def test_read_temperatures_before_first_layer(tmp_path):
+    path = tmp_path / "job.gcode"
+    path.write_bytes(GCODE)
+    temps = read_temperatures(str(path))
+    # 单独的 T2 是 AMS 槽位；H5 超出挤出机范围；首层之后的设定不计
+    assert temps == JobTemperatures(bed=60, nozzles={0: 220, 1: 250})
+
+
+def test_read_temperatures_from_3mf(tmp_path):
+    path = tmp_path / "job.gcode.3mf"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("Metadata/plate_1.gcode", b"M104 S200\n")
+        z.writestr("Metadata/plate_2.gcode", GCODE)
+    assert read_temperatures(str(path), plate=2).bed == 60
+    assert read_temperatures(str(path)).nozzles == {0: 200}
+
+
+def test_read_temperatures_max_bytes(tmp_path):
+    path = tmp_path / "job.gcode"
+    path.write_bytes(GCODE)
+    temps = read_temperatures(str(path), max_bytes=len(b"; HEADER_BLOCK_START\nM140 S0\n"))
+    assert temps.empty
+
+
+def test_report_time_saved():
+    report = LaunchReport("job.gcode", upload_time=30.0, preheat_time=90.0, elapsed=95.0)
+    assert report.serial_time == 120.0
+    assert report.time_saved == 25.0
+    assert LaunchReport("job.gcode", upload_time=1.0, elapsed=5.0).time_saved == 0.0
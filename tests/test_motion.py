@@ -0,0 +1,84 @@
+"""
+运动时间估算测试
+与梯形速度曲线的解析解对照
+"""
+
+import math
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from bambu_h2s.motion import MotionEstimator
+
+
+@pytest.fixture
+def estimator():
+    return MotionEstimator(max_accel=1000.0, max_velocity=500.0)
+
+
+def test_trapezoid(estimator):
+    # 100 mm/s，加速和减速各 5 mm，巡航 90 mm
+    assert estimator.estimate_line("G1 X100 F6000") == pytest.approx(1.1)
+
+
+def test_triangle(estimator):
+    # 1 mm 达不到巡航速度: 峰值 sqrt(a * d)
+    assert estimator.estimate_line("G1 X1 F6000") == pytest.approx(2 * math.sqrt(1000.0) / 1000.0)
+
+
+def test_collinear_segments_do_not_stop(estimator):
+    assert estimator.estimate_line("G1 X50 F6000\nG1 X100") == pytest.approx(1.1)
+    corner = estimator.estimate_line("G1 X50 F6000\nG1 Y50")
+    reverse = estimator.estimate_line("G1 X50 F6000\nG1 X0")
+    assert 1.1 < corner < reverse
+
+
+def test_velocity_clamped(estimator):
+    assert estimator.estimate_line("G1 X100 F60000") == estimator.estimate_line("G1 X100 F30000")
+
+
+def test_modes_and_position(estimator):
+    result = estimator.estimate_lines([
+        "G1 X10 Y10 F6000",
+        "G91",
+        "G1 X5 ; 相对",
+        "G90",
+        "M83",
+        "G1 E2",
+        "G1 E2",
+        "G92 X0",
+        "G4 P500",
+        "G4 S1",
+        "G28 Y",
+    ])
+    assert result.position == (0.0, 0.0, 0.0, 4.0)
+    assert result.dwell == pytest.approx(1.5)
+    assert result.moves == 6
+    # G92 / G28 只重设位置，不计时
+    assert result.durations[-2:].tolist() == [0.0, 0.0]
+    assert result.feedrate == pytest.approx(100.0)
+
+
+def test_e_only_move(estimator):
+    assert estimator.estimate_line("G1 E100 F6000") == pytest.approx(1.1)
+
+
+def test_arc_longer_than_chord(estimator):
+    # 半圆: 弧长 pi * 10
+    arc = estimator.estimate_line("G1 X0 Y0 F600\nG2 X20 Y0 I10 J0", position=(0, 0))
+    assert arc == pytest.approx(math.pi * 10 / 10.0, rel=0.05)
+    result = estimator.estimate_lines(["G3 X20 Y0 I10 J0"])
+    assert result.position[:2] == (20.0, 0.0)
+
+
+def test_file_matches_lines(estimator, tmp_path):
+    lines = ["G1 X10 F3000", "G1 Y10", "G2 X20 Y20 I10 J0"]
+    path = tmp_path / "moves.gcode"
+    path.write_text("\n".join(lines) + "\n")
+    assert estimator.estimate_file(str(path)).total == pytest.approx(estimator.estimate_lines(lines).total)
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        MotionEstimator(max_accel=0)
@@ -0,0 +1,93 @@
+"""
+对象索引测试
+用最小的已切片 3MF 和带对象标签的 G-code 代替真实切片文件
+"""
+
+import hashlib
+import json
+import zipfile
+
+import pytest
+
+from bambu_h2s import objects
+from bambu_h2s.objects import ObjectIndex, PrintObject, index_objects
+
+SLICE_INFO = """<?xml version="1.0" encoding="UTF-8"?>
+<config>
+  <plate>
+    <metadata key="index" value="1"/>
+    <object identify_id="101" name="cube" skipped="false"/>
+    <object id="7" name="legacy"/>
+    <object name="no id"/>
+    <object identify_id="abc" name="bad id"/>
+  </plate>
+</config>
+"""
+
+LAYOUT = {"bbox_objects": [{"id": 101, "name": "cube", "bbox": [10, 10, 30, 30]}]}
+
+
+def _make_3mf(tmp_path) -> str:
+    path = tmp_path / "job.3mf"
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("Metadata/slice_info.config", SLICE_INFO)
+        z.writestr("Metadata/plate_1.gcode", "G28\n")
+        z.writestr("Metadata/plate_1.json", json.dumps(LAYOUT))
+    return str(path)
+
+
+def test_3mf_skips_objects_without_usable_id(tmp_path):
+    index = index_objects(_make_3mf(tmp_path), cache_dir=str(tmp_path / "idx"))
+    assert [(o.id, o.name, o.bbox) for o in index.objects] == [
+        (101, "cube", (10.0, 10.0, 30.0, 30.0)),
+        (7, "legacy", None),
+    ]
+
+
+def test_default_hash_without_upload_cache(tmp_path, monkeypatch):
+    # 没有传入 cache 时不创建上传缓存 (SQLite)，直接计算哈希
+    def no_cache(*args, **kwargs):
+        raise AssertionError("不应创建 UploadCache")
+
+    monkeypatch.setattr(objects, "UploadCache", no_cache)
+    path = _make_3mf(tmp_path)
+    index = index_objects(path, cache_dir=str(tmp_path / "idx"))
+    with open(path, "rb") as f:
+        assert index.digest == hashlib.sha256(f.read()).hexdigest()
+    assert (tmp_path / "idx" / f"{index.digest}-1.json").exists()
+
+
+def test_gcode_objects_from_labels(tmp_path):
+    pytest.importorskip("numpy")
+    path = tmp_path / "job.gcode"
+    path.write_text(
+        "G28\n"
+        "M624 AQAAAAAAAAA=\n"
+        "; start printing object, unique label id: 5\n"
+        "G1 X10 Y20 E1\nG1 X40 Y25 E1\n"
+        "; stop printing object, unique label id: 5\n"
+        "M625\n"
+    )
+    found = objects._objects_from_gcode(str(path))
+    assert [(o.id, o.bbox) for o in found] == [(5, (10.0, 20.0, 40.0, 25.0))]
+
+
+def test_resolve():
+    index = ObjectIndex("d", 1, [
+        PrintObject(1, "Cube", (0, 0, 10, 10)),
+        PrintObject(2, "Cube copy", (20, 0, 30, 10)),
+        PrintObject(3, "Cylinder", None),
+    ])
+    assert index.resolve(names=["cylinder"], points=[(25, 5)], ids=[1, 3]) == [1, 3, 2]
+    assert index.nearest(12, 5).id == 1
+    with pytest.raises(ValueError):
+        index.resolve(names=["cu"])     # 匹配多个
+    with pytest.raises(ValueError):
+        index.resolve(ids=[9])
+    with pytest.raises(ValueError):
+        index.resolve(points=[(100, 100)])
+
+
+def test_roundtrip():
+    index = ObjectIndex("d", 2, [PrintObject(1, "a", (0.0, 0.0, 1.0, 1.0)), PrintObject(2, "b")])
+    assert ObjectIndex.from_dict(json.loads(json.dumps(index.to_dict()))) == index
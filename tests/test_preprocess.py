@@ -0,0 +1,118 @@
+"""
+G-code 预处理 (压缩) 测试
+"""
+
+import pytest
+
+from bambu_h2s.preprocess import GcodeMinifier, MinifyStats
+
+SOURCE = """; HEADER_BLOCK_START
+; total layers count = 2
+; HEADER_BLOCK_END
+; generated by slicer
+G90
+M83
+G1 X0 Y0 F3000 ; travel
+G1 X10.00004 Y0 E0.5
+G1 X20 Y0 E0.5
+G1 X30 Y0 E0.5
+G1 X30 Y10 E0.5
+G1 X30 Y10 F3000
+G1 F3000
+; CHANGE_LAYER
+; Z_HEIGHT: 0.4
+G1 Z0.4
+M106 S255 ; fan
+G1 X40 Y10 E1 F1200
+G91
+G1 X1
+G90
+G1 X41 Y10
+"""
+
+EXPECTED = [
+    "; HEADER_BLOCK_START",
+    "; total layers count = 2",
+    "; HEADER_BLOCK_END",
+    "G90",
+    "M83",
+    "G1 X0 Y0 F3000",
+    "G1 X30 E1.5",          # 三段共线、挤出比例相同，合并
+    "G1 Y10 E0.5",
+    "; CHANGE_LAYER",
+    "; Z_HEIGHT: 0.4",
+    "G1 Z0.4",
+    "M106 S255",
+    "G1 X40 E1 F1200",
+    "G91",
+    "G1 X1",
+    "G90",
+]
+
+
+def _lines(text: str):
+    return text.splitlines(keepends=True)
+
+
+def test_process():
+    minifier = GcodeMinifier()
+    assert list(minifier.process(_lines(SOURCE))) == EXPECTED
+    assert minifier.stats.merged_moves == 2
+    assert minifier.stats.lines_in == len(_lines(SOURCE))
+
+
+def test_options_disable_rewrites():
+    minifier = GcodeMinifier(strip_comments=False, drop_redundant=False, merge_collinear=False)
+    out = list(minifier.process(_lines(SOURCE)))
+    assert "; generated by slicer" in out
+    # 仍然按精度舍入
+    assert "G1 X10 Y0 E0.5" in out and "G1 X30 Y10 F3000" in out and "G1 X41 Y10" in out
+    assert minifier.stats.merged_moves == 0
+
+
+def test_no_merge_with_absolute_e_or_different_rate():
+    absolute_e = "G90\nM82\nG1 X0 Y0\nG1 X10 E1\nG1 X20 E2\n"
+    assert list(GcodeMinifier().process(_lines(absolute_e)))[-2:] == ["G1 X10 E1", "G1 X20 E2"]
+    rate = "M83\nG1 X0 Y0\nG1 X10 E1\nG1 X20 E2\n"
+    assert list(GcodeMinifier().process(_lines(rate)))[-2:] == ["G1 X10 E1", "G1 X20 E2"]
+
+
+def test_unknown_words_kept_verbatim():
+    out = list(GcodeMinifier().process(_lines("G1 X0 Y0\nG1 X5 A1\nG1 X5 Y0\n")))
+    # 未解析的运动之后位置未知，后面的移动不能当作冗余去掉
+    assert out == ["G1 X0 Y0", "G1 X5 A1", "G1 X5 Y0"]
+
+
+def test_iter_bytes_and_stats(tmp_path):
+    src = tmp_path / "in.gcode"
+    src.write_text(SOURCE)
+    minifier = GcodeMinifier()
+    chunks = list(minifier.iter_bytes(str(src), chunk_size=32))
+    assert len(chunks) > 1
+    assert b"".join(chunks).decode() == "\n".join(EXPECTED) + "\n"
+    stats = minifier.stats
+    assert (stats.bytes_in, stats.lines_out) == (len(SOURCE.encode()), len(EXPECTED))
+    assert stats.bytes_out == sum(map(len, chunks)) and stats.ratio < 1
+
+    dst = tmp_path / "out.gcode"
+    GcodeMinifier().minify_file(str(src), str(dst))
+    assert dst.read_bytes() == b"".join(chunks)
+
+
+def test_same_motion():
+    pytest.importorskip("numpy")
+    from bambu_h2s.motion import MotionEstimator
+
+    estimator = MotionEstimator()
+    before = estimator.estimate_lines(_lines(SOURCE))
+    after = estimator.estimate_lines(list(GcodeMinifier().process(_lines(SOURCE))))
+    assert after.position == before.position
+    assert after.total == pytest.approx(before.total, rel=0.05)
+
+
+def test_time_saved():
+    stats = MinifyStats(bytes_in=1000, bytes_out=600, upload_time=2.0)
+    assert stats.bytes_saved == 400
+    assert stats.time_saved() == pytest.approx(400 / 300)
+    assert stats.time_saved(throughput=100) == pytest.approx(4.0)
+    assert MinifyStats().time_saved() == 0.0
@@ -0,0 +1,138 @@
+"""
+存储配额管理测试
+假的 FTP 对象按路径保存文件大小，假的客户端只提供 state
+"""
+
+import itertools
+import posixpath
+from types import SimpleNamespace
+
+import pytest
+
+from bambu_h2s import upload_cache
+from bambu_h2s.ftp import RemoteEntry
+from bambu_h2s.storage import StorageManager
+from bambu_h2s.upload_cache import UploadCache
+
+
+class FakeFTP:
+    ip = "127.0.0.1"
+    port = 990
+
+    def __init__(self, files: dict):
+        self.files = dict(files)
+        self.deleted = []
+
+    def walk(self, root, refresh=False):
+        yield root, [], [
+            RemoteEntry(posixpath.basename(path), path, "file", size)
+            for path, size in sorted(self.files.items()) if path.startswith(root + "/")
+        ]
+
+    def delete_file(self, remote_path):
+        self.deleted.append(remote_path)
+        return self.files.pop(remote_path, None) is not None
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    # 记录时间单调递增，LRU 顺序与记录顺序一致
+    clock = itertools.count(1)
+    monkeypatch.setattr(upload_cache, "time", SimpleNamespace(time=lambda: float(next(clock))))
+    return UploadCache(str(tmp_path / "uploads.sqlite"))
+
+
+def _manager(cache, files: dict, state: dict, quota: int = 100, uploaded=None) -> StorageManager:
+    """uploaded 为我们上传过的文件，按从旧到新的顺序记录到缓存"""
+    ftp = FakeFTP(files)
+    for path in (files if uploaded is None else uploaded):
+        cache.record(UploadCache.printer_key(ftp), path, "digest-" + path, files[path], None)
+    client = SimpleNamespace(state=state)
+    return StorageManager(ftp, client, quota, high_water=1.0, cache=cache)
+
+
+IDLE = {"gcode_state": "IDLE"}
+
+
+def test_invalid_arguments(cache):
+    with pytest.raises(ValueError):
+        StorageManager(FakeFTP({}), SimpleNamespace(state=IDLE), 0, cache=cache)
+    with pytest.raises(ValueError):
+        StorageManager(FakeFTP({}), SimpleNamespace(state=IDLE), 100, high_water=1.5, cache=cache)
+
+
+def test_usage_and_limit(cache):
+    manager = _manager(cache, {"/cache/a.3mf": 30, "/cache/b.3mf": 20, "/other/c.3mf": 50}, IDLE)
+    assert manager.usage() == 50
+    manager.high_water = 0.9
+    assert manager.limit == 90
+
+
+def test_no_eviction_below_high_water(cache):
+    manager = _manager(cache, {"/cache/a.3mf": 30}, IDLE)
+    assert manager.ensure_space(70)
+    assert manager.ftp.deleted == []
+
+
+def test_evicts_least_recently_used_first(cache):
+    files = {"/cache/old.3mf": 40, "/cache/mid.3mf": 30, "/cache/new.3mf": 20}
+    manager = _manager(cache, files, IDLE, uploaded=["/cache/old.3mf", "/cache/mid.3mf", "/cache/new.3mf"])
+    assert manager.ensure_space(50)
+    assert manager.ftp.deleted == ["/cache/old.3mf"]
+    assert [p for p, _, _ in cache.entries(manager.printer)] == ["/cache/mid.3mf", "/cache/new.3mf"]
+
+
+def test_touch_moves_file_to_back(cache):
+    files = {"/cache/old.3mf": 40, "/cache/new.3mf": 40}
+    manager = _manager(cache, files, IDLE, uploaded=["/cache/old.3mf", "/cache/new.3mf"])
+    cache.touch(manager.printer, "/cache/old.3mf")
+    assert manager.ensure_space(30)
+    assert manager.ftp.deleted == ["/cache/new.3mf"]
+
+
+@pytest.mark.parametrize("state", [
+    {"gcode_state": "RUNNING", "gcode_file": "/data/Metadata/plate_1.gcode", "subtask_name": "old"},
+    {"gcode_state": "PAUSE", "subtask_name": "Old.gcode.3mf"},
+])
+def test_printing_file_never_evicted(cache, state):
+    files = {"/cache/old.3mf": 40, "/cache/new.3mf": 40}
+    manager = _manager(cache, files, state, uploaded=["/cache/old.3mf", "/cache/new.3mf"])
+    assert manager.is_protected("/cache/old.3mf")
+    assert manager.ensure_space(30)
+    assert manager.ftp.deleted == ["/cache/new.3mf"]
+
+
+@pytest.mark.parametrize("state", [{}, {"gcode_state": "RUNNING"}])
+def test_unknown_printing_file_skips_eviction(cache, state):
+    manager = _manager(cache, {"/cache/a.3mf": 90}, state)
+    assert manager.candidates() is None
+    assert not manager.ensure_space(30)
+    assert manager.evict(30) == []
+    assert manager.ftp.deleted == []
+
+
+def test_foreign_files_count_but_are_not_evicted(cache):
+    files = {"/cache/ours.3mf": 30, "/cache/slicer.3mf": 60}
+    manager = _manager(cache, files, IDLE, uploaded=["/cache/ours.3mf"])
+    # 只有 30 字节可淘汰，不足时不删除任何文件
+    assert not manager.ensure_space(50)
+    assert manager.ftp.deleted == []
+    assert manager.ensure_space(30)
+    assert manager.ftp.deleted == ["/cache/ours.3mf"]
+
+
+def test_target_not_double_counted_or_evicted(cache):
+    files = {"/cache/job.3mf": 60, "/cache/other.3mf": 30}
+    manager = _manager(cache, files, IDLE, uploaded=["/cache/job.3mf", "/cache/other.3mf"])
+    assert manager.ensure_space(65, target="/cache/job.3mf")
+    assert manager.ftp.deleted == []
+    assert manager.ensure_space(80, target="/cache/job.3mf")
+    assert manager.ftp.deleted == ["/cache/other.3mf"]
+
+
+def test_candidates_forget_files_removed_elsewhere(cache):
+    manager = _manager(cache, {"/cache/a.3mf": 10, "/cache/b.3mf": 10}, IDLE)
+    del manager.ftp.files["/cache/a.3mf"]
+    manager.usage()
+    assert [e.path for e in manager.candidates()] == ["/cache/b.3mf"]
+    assert [p for p, _, _ in cache.entries(manager.printer)] == ["/cache/b.3mf"]
@@ -0,0 +1,106 @@
+"""
+G-code 流式发送测试
+假打印机: 拦截 publish，在另一个线程从 report 主题确认
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from bambu_h2s.client import BambuClient
+from bambu_h2s.commands import BambuCommands
+from bambu_h2s.stream import GcodeStreamer, iter_gcode_lines
+
+
+class _Message:
+    def __init__(self, topic: str, payload: dict):
+        self.topic = topic
+        self.payload = json.dumps(payload).encode()
+
+
+class FakePrinter:
+    def __init__(self, result: str = "success", ack: bool = True):
+        self.client = BambuClient("127.0.0.1", "code", serial="SERIAL")
+        self.client.publish = self.publish
+        self.result = result
+        self.ack = ack
+        self.payloads = []
+
+    def report(self, section: dict):
+        self.client._on_message(None, None, _Message("device/SERIAL/report", {"print": section}))
+
+    def publish(self, payload):
+        section = json.loads(payload)["print"]
+        self.payloads.append(section["param"])
+        if self.ack:
+            reply = dict(section, result=self.result)
+            threading.Thread(target=self.report, args=(reply,), daemon=True).start()
+        return {"status": "sent"}
+
+
+def test_iter_gcode_lines():
+    source = ["G28 ; home\n", "\n", "; only comment\n", "  G1 X1  \n"]
+    assert list(iter_gcode_lines(source)) == ["G28", "G1 X1"]
+
+
+def test_chunking_limits():
+    streamer = GcodeStreamer(BambuCommands(FakePrinter().client), chunk_lines=3, max_chunk_bytes=12)
+    chunks = list(streamer._chunks(iter(["G1 X1", "G1 X2", "G1 X3", "G1 X4", "G28"])))
+    # 每块不超过 3 行、12 字节 (含换行)
+    assert chunks == [["G1 X1", "G1 X2"], ["G1 X3", "G1 X4"], ["G28"]]
+    with pytest.raises(ValueError):
+        GcodeStreamer(BambuCommands(FakePrinter().client), window=0)
+
+
+def test_stream_all_acked():
+    printer = FakePrinter()
+    lines = [f"G1 X{i}" for i in range(50)]
+    stats = GcodeStreamer(BambuCommands(printer.client), chunk_lines=8, window=2).stream(lines)
+    assert stats.aborted is None
+    assert (stats.lines, stats.chunks, stats.acked) == (50, 7, 7)
+    assert "".join(printer.payloads).splitlines() == lines
+    assert not printer.client._pending and not printer.client._state_listeners
+
+
+def test_rejected_payload_aborts():
+    printer = FakePrinter(result="failed")
+    stats = GcodeStreamer(BambuCommands(printer.client), chunk_lines=1, window=1).stream(["G1 X1", "G1 X2", "G1 X3"])
+    assert stats.aborted and "拒绝" in stats.aborted
+    assert stats.chunks == 1
+
+
+def test_ack_timeout_aborts():
+    printer = FakePrinter(ack=False)
+    streamer = GcodeStreamer(BambuCommands(printer.client), chunk_lines=1, window=2, ack_timeout=0.1)
+    stats = streamer.stream(["G1 X1", "G1 X2", "G1 X3"])
+    assert stats.aborted and "超时" in stats.aborted
+    assert stats.chunks == 2 and stats.timeouts >= 1
+    assert not printer.client._pending
+
+
+def test_pause_holds_and_failed_state_aborts():
+    printer = FakePrinter()
+    streamer = GcodeStreamer(BambuCommands(printer.client), chunk_lines=1, window=1)
+
+    def lines():
+        yield "G1 X1"
+        printer.report({"gcode_state": "PAUSE"})
+        threading.Timer(0.2, printer.report, args=({"gcode_state": "RUNNING"},)).start()
+        yield "G1 X2"
+
+    start = time.monotonic()
+    stats = streamer.stream(lines())
+    assert stats.aborted is None and stats.chunks == 2
+    assert time.monotonic() - start >= 0.2 and stats.stall_time >= 0.15
+
+    def failing():
+        # 分块会预读一行: 读取 G1 X3 时 G1 X1 已发出
+        yield "G1 X1"
+        yield "G1 X2"
+        printer.report({"gcode_state": "FAILED"})
+        yield "G1 X3"
+
+    stats = streamer.stream(failing())
+    assert stats.aborted == "打印机状态 FAILED" and stats.chunks == 1
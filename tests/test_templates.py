@@ -0,0 +1,82 @@
+"""
+预编译命令模板测试
+模板输出必须与 json.dumps(payload).encode() 逐字节一致
+"""
+
+import json
+
+import pytest
+
+from bambu_h2s.templates import CommandTemplate, Slot
+
+SEQUENCE_IDS = ("0", "12345", "序号-\"1\"\n")
+
+TRICKY_STRINGS = (
+    "",
+    "plain",
+    "引号 \"quoted\" 和 \\反斜杠\\",
+    "控制字符 \n\r\t\b\f\x00\x1f",
+    "/sdcard/模型 (副本).3mf",
+    "emoji \U0001f600 ü é",
+    "\x000\x00",       # 与模板内部占位符相同的文本
+)
+
+
+def _expected(namespace: str, command: str, fields: dict, values: dict, sequence_id: str) -> bytes:
+    body = {"command": command}
+    for key, value in fields.items():
+        body[key] = values[key] if isinstance(value, Slot) else value
+    body["sequence_id"] = sequence_id
+    return json.dumps({namespace: body}).encode()
+
+
+# ========================================
+# CommandTemplate
+# ========================================
+
+@pytest.mark.parametrize("sequence_id", SEQUENCE_IDS)
+@pytest.mark.parametrize("value", TRICKY_STRINGS)
+def test_str_slot(value, sequence_id):
+    fields = {"param": Slot(str), "const": "常量 \"x\""}
+    template = CommandTemplate("print", "gcode_line", fields)
+    assert template.render({"param": value}, sequence_id) == \
+        _expected("print", "gcode_line", fields, {"param": value}, sequence_id)
+
+
+@pytest.mark.parametrize("kind, value", [
+    (int, 0), (int, -1), (int, 2 ** 70),
+    (float, 0.0), (float, -0.0), (float, 1.5), (float, 0.1), (float, 1e-7), (float, 1e22),
+    (float, 3), (float, float("nan")), (float, float("inf")),
+    (bool, True), (bool, False),
+    # 类型不符时回退到 json.dumps
+    (int, True), (int, 2.5), (float, True), (bool, 1), (str, 5), (str, None),
+    (int, None), (float, None), (bool, None),
+    ("json", None), ("json", [1, "二", None, True, 0.5]), ("json", {"键": {"a": [False]}}),
+])
+def test_typed_slots(kind, value):
+    fields = {"before": None, "value": Slot(kind), "after": True}
+    template = CommandTemplate("system", "test", fields)
+    assert template.render({"value": value}, "7") == \
+        _expected("system", "test", fields, {"value": value}, "7")
+
+
+def test_constant_fields():
+    fields = {
+        "none": None, "flag": False, "ratio": 0.95, "count": 3,
+        "text": "中文 \"常量\"", "nested": {"list": [1, None, "é"]},
+    }
+    template = CommandTemplate("info", "get_version", fields)
+    assert template.render({}, "42") == _expected("info", "get_version", fields, {}, "42")
+
+
+def test_multiple_slots_keep_order():
+    fields = {"a": Slot(int), "b": "常量", "c": Slot(str), "d": Slot("json"), "e": Slot(bool)}
+    values = {"a": 1, "c": "\"c\"", "d": None, "e": False}
+    template = CommandTemplate("print", "multi", fields)
+    assert template.render(values, "9") == _expected("print", "multi", fields, values, "9")
+
+
+def test_unknown_slot_kind():
+    with pytest.raises(ValueError):
+        Slot(list)
+
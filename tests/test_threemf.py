@@ -0,0 +1,138 @@
+"""
+3MF 流式读取测试
+用最小的多盘 3MF 和记录上传内容的假 FTP 对象
+"""
+
+import hashlib
+import json
+import zipfile
+
+import pytest
+
+from bambu_h2s.threemf import ThreeMFReader
+
+PLATE_1 = b"G28\nG1 X10 E1\n" * 20
+PLATE_2 = b"G28\nG1 Y20 E2\n"
+
+SLICE_INFO = """<?xml version="1.0" encoding="UTF-8"?>
+<config>
+  <plate>
+    <metadata key="index" value="1"/>
+    <metadata key="prediction" value="1234"/>
+    <metadata key="weight" value="5.67"/>
+  </plate>
+  <plate>
+    <metadata key="index" value="2"/>
+  </plate>
+</config>
+"""
+
+
+class FakeFTP:
+    def __init__(self, ok: bool = True):
+        self.ok = ok
+        self.files = {}
+        self.deleted = []
+
+    def upload_stream(self, source, remote_path, progress_callback=None):
+        data = bytearray()
+        while True:
+            chunk = source.read(7)
+            if not chunk:
+                break
+            data += chunk
+            if progress_callback:
+                progress_callback(len(data))
+        if not self.ok:
+            return False
+        self.files[remote_path] = bytes(data)
+        return True
+
+    def delete_file(self, remote_path):
+        self.deleted.append(remote_path)
+        return self.files.pop(remote_path, None) is not None
+
+
+@pytest.fixture
+def project(tmp_path):
+    path = tmp_path / "Benchy.gcode.3mf"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("3D/3dmodel.model", "<model/>")
+        z.writestr("Metadata/slice_info.config", SLICE_INFO)
+        z.writestr("Metadata/plate_2.gcode", PLATE_2)
+        z.writestr("Metadata/plate_1.gcode", PLATE_1)
+        z.writestr("Metadata/plate_1.gcode.md5", hashlib.md5(PLATE_1).hexdigest().upper() + "\n")
+        z.writestr("Metadata/plate_2.gcode.md5", "0" * 32)
+        z.writestr("Metadata/plate_1.json", json.dumps({"bbox_objects": [{"name": "benchy"}]}))
+        z.writestr("Metadata/plate_1.png", b"png")
+        z.writestr("Metadata/plate_1_small.png", b"png")
+        z.writestr("Metadata/plate_11.png", b"png")
+        z.writestr("Metadata/top_2.png", b"png")
+    return str(path)
+
+
+def test_plates(project):
+    with ThreeMFReader(project) as reader:
+        plates = reader.plates
+        assert [p.index for p in plates] == [1, 2]
+        first, second = plates
+        assert (first.gcode, first.size) == ("Metadata/plate_1.gcode", len(PLATE_1))
+        assert first.compressed_size < first.size
+        assert first.md5 == hashlib.md5(PLATE_1).hexdigest()
+        assert first.layout == "Metadata/plate_1.json"
+        assert first.thumbnails == ["Metadata/plate_1.png", "Metadata/plate_1_small.png"]
+        assert second.thumbnails == ["Metadata/top_2.png"]
+        assert second.layout is None
+        assert reader.plate(2) is second
+        with pytest.raises(ValueError):
+            reader.plate(3)
+
+
+def test_members(project):
+    with ThreeMFReader(project) as reader:
+        assert "Metadata/plate_1.gcode" in reader
+        assert b"".join(reader.iter_entry("Metadata/plate_1.gcode", chunk_size=10)) == PLATE_1
+        assert all(len(c) <= 10 for c in reader.iter_entry("Metadata/plate_1.gcode", chunk_size=10))
+        with pytest.raises(ValueError):
+            reader.read("Metadata/missing")
+
+
+def test_metadata(project):
+    with ThreeMFReader(project) as reader:
+        assert reader.plate_metadata(1) == {"index": "1", "prediction": "1234", "weight": "5.67"}
+        assert reader.plate_metadata(3) == {}
+        assert reader.plate_layout(1) == {"bbox_objects": [{"name": "benchy"}]}
+        assert reader.plate_layout(2) == {}
+
+
+def test_unsliced_project(tmp_path):
+    path = tmp_path / "model.3mf"
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("3D/3dmodel.model", "<model/>")
+    with ThreeMFReader(str(path)) as reader:
+        assert reader.plates == []
+        assert reader.slice_info is None
+        assert reader.plate_metadata(1) == {}
+
+
+def test_upload_plate(project):
+    ftp = FakeFTP()
+    progress = []
+    with ThreeMFReader(project) as reader:
+        remote = reader.upload_plate(ftp, 1, progress_callback=lambda done, total: progress.append((done, total)))
+    assert remote == "/cache/Benchy_plate_1.gcode"
+    assert ftp.files[remote] == PLATE_1
+    assert progress[-1] == (len(PLATE_1), len(PLATE_1))
+
+
+def test_upload_plate_md5_mismatch_deletes_remote(project):
+    ftp = FakeFTP()
+    with ThreeMFReader(project) as reader:
+        assert reader.upload_plate(ftp, 2, "/cache/p2.gcode") is None
+        assert ftp.deleted == ["/cache/p2.gcode"] and ftp.files == {}
+        assert reader.upload_plate(ftp, 2, "/cache/p2.gcode", verify=False) == "/cache/p2.gcode"
+
+
+def test_upload_plate_failure(project):
+    with ThreeMFReader(project) as reader:
+        assert reader.upload_plate(FakeFTP(ok=False), 1) is None
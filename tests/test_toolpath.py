@@ -0,0 +1,72 @@
+"""
+空走轨迹测试
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from bambu_h2s import toolpath
+
+
+def test_shapes_closed():
+    for path in (toolpath.square((50, 50), 10), toolpath.circle((50, 50), 5), toolpath.polygon((0, 0), 1, 6)):
+        assert np.allclose(path[0], path[-1])
+    assert toolpath.square((50, 50), 10)[0].tolist() == [45, 45]
+
+
+def test_raster_serpentine():
+    path = toolpath.raster((0, 0), 10, 4, 2)
+    assert path.tolist() == [[0, 0], [10, 0], [10, 2], [0, 2], [0, 4], [10, 4]]
+
+
+def test_probe_grid_serpentine():
+    grid = toolpath.probe_grid((0, 0), 10, 10, 2, 2)
+    assert grid.tolist() == [[0, 0], [10, 0], [10, 10], [0, 10]]
+
+
+def test_merge_collinear():
+    path = np.array([[0, 0], [1, 0], [1, 0], [2, 0], [2, 1], [2, 2], [2, 1]], dtype=float)
+    # 反向折返的点保留
+    assert toolpath.merge_collinear(path).tolist() == [[0, 0], [2, 0], [2, 2], [2, 1]]
+
+
+def test_clip_inside_unchanged():
+    path = toolpath.square((128, 128), 20)
+    pieces = toolpath.clip_to_volume(path)
+    assert len(pieces) == 1 and np.array_equal(pieces[0], path)
+
+
+def test_clip_splits_at_boundary():
+    path = np.array([[100, 100], [300, 100], [300, 120], [100, 120]], dtype=float)
+    pieces = toolpath.clip_to_volume(path, margin=5)
+    assert [p.tolist() for p in pieces] == [[[100, 100], [251, 100]], [[251, 120], [100, 120]]]
+
+
+def test_clip_does_not_clamp_outside_points():
+    # 整条路径在空间外时不再被压到边界上
+    assert toolpath.clip_to_volume(np.array([[300, 10], [300, 200]], dtype=float)) == []
+    assert toolpath.clip_to_volume(np.array([[300, 10]], dtype=float)) == []
+    pieces = toolpath.clip_to_volume(np.array([[0, 0], [100, 100]], dtype=float), margin=5)
+    assert [p.tolist() for p in pieces] == [[[5, 5], [100, 100]]]
+
+
+def test_gcode_preamble_absolute():
+    lines = toolpath.to_gcode(toolpath.square((128, 128), 20), z=50, feedrate=2000, travel_feedrate=6000)
+    assert lines == [
+        "G90", "G1 Z50 F6000", "G1 X118 Y118 F6000",
+        "G1 X138 F2000", "G1 Y138", "G1 X118", "G1 Y118",
+    ]
+    assert toolpath.to_gcode(np.zeros((0, 2)), z=1) == ["G90", "G1 Z10 F2000"]
+
+
+def test_gcode_travels_between_pieces():
+    path = np.array([[100, 100], [300, 100], [300, 120], [100, 120]], dtype=float)
+    assert toolpath.to_gcode(path, feedrate=1000, travel_feedrate=3000) == [
+        "G90", "G1 Z50 F3000", "G1 X100 Y100 F3000", "G1 X251 F1000",
+        "G1 X251 Y120 F3000", "G1 X100 F1000",
+    ]
+
+
+def test_batch_newline_terminated():
+    assert toolpath.to_batch(np.array([[10, 10]], dtype=float)).endswith("G1 X10 Y10\n")
@@ -0,0 +1,102 @@
+"""
+上传缓存测试
+假的 FTP 对象按路径保存 (大小, MDTM)
+"""
+
+import os
+
+import pytest
+
+from bambu_h2s import upload_cache
+from bambu_h2s.upload_cache import UploadCache, file_digest
+
+
+class FakeFTP:
+    ip = "127.0.0.1"
+    port = 990
+
+    def __init__(self):
+        self.files = {}
+        self.uploads = []
+        self.clock = 0
+
+    def upload_file(self, local_path, remote_path, progress_callback=None):
+        self.uploads.append(remote_path)
+        self.clock += 1
+        self.files[remote_path] = (os.path.getsize(local_path), f"2024010100000{self.clock}")
+        return True
+
+    def get_size(self, remote_path):
+        return self.files.get(remote_path, (-1, None))[0]
+
+    def get_mtime(self, remote_path):
+        return self.files.get(remote_path, (-1, None))[1]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return UploadCache(str(tmp_path / "db" / "uploads.sqlite"))
+
+
+@pytest.fixture
+def job(tmp_path):
+    path = tmp_path / "job.gcode"
+    path.write_bytes(b"G28\nG1 X10\n")
+    return str(path)
+
+
+def test_digest_cached_until_file_changes(cache, job, monkeypatch):
+    calls = []
+
+    def counting(path):
+        calls.append(path)
+        return file_digest(path)
+
+    monkeypatch.setattr(upload_cache, "file_digest", counting)
+    first = cache.digest(job)
+    assert cache.digest(job) == first and len(calls) == 1
+
+    with open(job, "ab") as f:
+        f.write(b"M400\n")
+    assert cache.digest(job) != first and len(calls) == 2
+
+
+def test_skip_when_content_on_printer(cache, job, tmp_path):
+    ftp = FakeFTP()
+    assert cache.upload(ftp, job) == "/cache/job.gcode"
+    assert cache.upload(ftp, job) == "/cache/job.gcode"
+    assert ftp.uploads == ["/cache/job.gcode"]
+
+    # 同样内容、不同文件名: 不指定目标时复用已有副本
+    copy = tmp_path / "copy.gcode"
+    copy.write_bytes(open(job, "rb").read())
+    assert cache.upload(ftp, str(copy)) == "/cache/job.gcode"
+    # 指定了其他目标时上传
+    assert cache.upload(ftp, str(copy), "/sdcard/copy.gcode") == "/sdcard/copy.gcode"
+    assert ftp.uploads == ["/cache/job.gcode", "/sdcard/copy.gcode"]
+
+
+def test_reupload_when_remote_changed(cache, job):
+    ftp = FakeFTP()
+    cache.upload(ftp, job)
+    ftp.files["/cache/job.gcode"] = (999, "20240101000009")
+    assert cache.upload(ftp, job) == "/cache/job.gcode"
+    assert len(ftp.uploads) == 2
+    assert len(cache.lookup(cache.printer_key(ftp), cache.digest(job))) == 1
+
+
+def test_missing_local_file(cache, tmp_path):
+    assert cache.upload(FakeFTP(), str(tmp_path / "missing.gcode")) is None
+
+
+def test_entries_touch_forget(cache):
+    cache.record("p", "/a", "d1", 1, None)
+    cache.record("p", "/b", "d2", 2, None)
+    cache.record("q", "/a", "d1", 1, None)
+    assert [e[0] for e in cache.entries("p")] == ["/a", "/b"]
+    cache.touch("p", "/a")
+    assert [e[0] for e in cache.entries("p")] == ["/b", "/a"]
+    cache.forget("p", "/b")
+    assert [e[0] for e in cache.entries("p")] == ["/a"]
+    cache.forget("p")
+    assert cache.entries("p") == [] and len(cache.entries("q")) == 1